@@ -0,0 +1,298 @@
+"""Pre-aggregated report counts for the notebook's charts.
+
+The cube holds one count per (hour, location, kategorie) as integer-coded
+numpy arrays. Reports rarely share an hour, location and kategorie, so there
+are almost as many cells as reports (13,204 for 13,424); the saving is in
+dropping the text columns: 18 bytes per cell instead of ~1.3 KB per CSV row.
+Every chart of Berlin_police_reports.ipynb – category counts, reports per
+year/month, top locations, monthly series, day of week, category × year,
+category × location, reports per km² / 100k inhabitants – is answered from it.
+
+Counts are kept per source CSV: a file that only had rows appended is read
+from where it ended last time; a rewritten file is re-read on its own.
+
+    python analytics_cube.py build     # from scratch
+    python analytics_cube.py update    # pick up appended / changed files
+    python analytics_cube.py summary   # print every query with its timing
+
+    from analytics_cube import AnalyticsCube
+    cube = AnalyticsCube.load()
+    cube.category_by_year()
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from report_index import read_new_rows
+from report_normalize import clean_categories, clean_locations, parse_dates
+
+# === CONFIG ===
+CSV_FOLDER = "berlin_reports_yearly_classified"
+CSV_GLOB = "berlin_polizei_*_classified.csv"
+CUBE_FILE = "analytics_cube.npz"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# 10.09.2025 https://en.wikipedia.org/wiki/Boroughs_and_quarters_of_Berlin (same as the notebook)
+REGION_DATA = {
+    "Charlottenburg-Wilmersdorf": {"population": 343081, "area_km2": 64.72},
+    "Friedrichshain-Kreuzberg": {"population": 293454, "area_km2": 20.16},
+    "Lichtenberg": {"population": 311881, "area_km2": 52.29},
+    "Marzahn-Hellersdorf": {"population": 291948, "area_km2": 61.74},
+    "Mitte": {"population": 397134, "area_km2": 39.47},
+    "Neukölln": {"population": 330017, "area_km2": 44.93},
+    "Pankow": {"population": 424307, "area_km2": 103.01},
+    "Reinickendorf": {"population": 268792, "area_km2": 89.46},
+    "Spandau": {"population": 257091, "area_km2": 91.91},
+    "Steglitz-Zehlendorf": {"population": 310446, "area_km2": 102.50},
+    "Tempelhof-Schöneberg": {"population": 355868, "area_km2": 53.09},
+    "Treptow-Köpenick": {"population": 294081, "area_km2": 168.42},
+}
+
+
+def clean_frame(df):
+    """date -> hours since epoch, location / kategorie cleaned like the notebook"""
+    dates = parse_dates(df["date"])
+    location = clean_locations(df["location"])
+    kategorie = clean_categories(df["kategorie"])
+    keep = dates.notna()
+    hours = dates[keep].to_numpy().astype("datetime64[h]").astype(np.int64)
+    return hours, location[keep].to_numpy(dtype=object), kategorie[keep].to_numpy(dtype=object)
+
+
+class AnalyticsCube:
+    """Counts by (hour, location code, kategorie code), kept per source file.
+
+    `hours` is int64 hours since 1970, `loc` / `cat` index into the
+    `locations` / `categories` code tables, `source` into `sources`.
+    """
+
+    def __init__(self):
+        self.hours = np.empty(0, dtype=np.int64)
+        self.loc = np.empty(0, dtype=np.int16)
+        self.cat = np.empty(0, dtype=np.int16)
+        self.count = np.empty(0, dtype=np.int32)
+        self.source = np.empty(0, dtype=np.int16)
+        self.locations = []
+        self.categories = []
+        self.sources = {}  # path -> {"code", "size", "mtime_ns", "digest", "header"}
+
+    # --- persistence ---
+
+    @classmethod
+    def load(cls, path=CUBE_FILE):
+        cube = cls()
+        with np.load(path, allow_pickle=False) as data:
+            for name in ("hours", "loc", "cat", "count", "source"):
+                setattr(cube, name, data[name])
+            meta = json.loads(str(data["meta"]))
+        cube.locations, cube.categories, cube.sources = meta["locations"], meta["categories"], meta["sources"]
+        return cube
+
+    def save(self, path=CUBE_FILE):
+        meta = json.dumps({"locations": self.locations, "categories": self.categories, "sources": self.sources})
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, hours=self.hours, loc=self.loc, cat=self.cat, count=self.count,
+                 source=self.source, meta=np.array(meta))
+        os.replace(tmp_path, path)
+
+    # --- building ---
+
+    @staticmethod
+    def _codes(values, table):
+        lookup = {value: i for i, value in enumerate(table)}
+        for value in pd.unique(values):
+            if value not in lookup:
+                lookup[value] = len(table)
+                table.append(value)
+        return np.array([lookup[value] for value in values], dtype=np.int16)
+
+    def _add(self, source_code, hours, locations, categories):
+        loc = self._codes(locations, self.locations)
+        cat = self._codes(categories, self.categories)
+        keys = pd.DataFrame({"hours": hours, "loc": loc, "cat": cat})
+        grouped = keys.groupby(["hours", "loc", "cat"], sort=False).size().reset_index(name="count")
+        self.hours = np.concatenate([self.hours, grouped["hours"].to_numpy(np.int64)])
+        self.loc = np.concatenate([self.loc, grouped["loc"].to_numpy(np.int16)])
+        self.cat = np.concatenate([self.cat, grouped["cat"].to_numpy(np.int16)])
+        self.count = np.concatenate([self.count, grouped["count"].to_numpy(np.int32)])
+        self.source = np.concatenate([self.source, np.full(len(grouped), source_code, dtype=np.int16)])
+
+    def _drop_source(self, source_code):
+        keep = self.source != source_code
+        for name in ("hours", "loc", "cat", "count", "source"):
+            setattr(self, name, getattr(self, name)[keep])
+
+    def update(self, csv_folder=CSV_FOLDER, pattern=CSV_GLOB):
+        """Bring the cube up to date with the CSVs; returns the number of reports read"""
+        read = 0
+        for path in sorted(glob.glob(os.path.join(csv_folder, pattern))):
+            known = self.sources.get(path)
+            df, appended, record = read_new_rows(path, known)
+            if df is None:
+                continue
+
+            if appended:
+                code = known["code"]
+            else:
+                code = known["code"] if known is not None else max(
+                    [s["code"] for s in self.sources.values()], default=-1) + 1
+                self._drop_source(code)
+
+            if len(df):
+                self._add(code, *clean_frame(df))
+            self.sources[path] = dict(record, code=code)
+            read += len(df)
+            print(f"🧊 {path}: {'appended' if appended else 'read'} {len(df)} reports")
+        return read
+
+    # --- queries ---
+
+    def _by(self, codes, table):
+        counts = np.bincount(codes, weights=self.count, minlength=len(table)).astype(np.int64)
+        return pd.Series(counts, index=table)
+
+    @property
+    def total(self):
+        return int(self.count.sum())
+
+    def category_counts(self):
+        return self._by(self.cat, self.categories).sort_values(ascending=False)
+
+    def location_counts(self):
+        return self._by(self.loc, self.locations).sort_values(ascending=False)
+
+    def top_locations(self, n=10):
+        return self.location_counts().head(n)
+
+    def _calendar(self):
+        stamps = self.hours.astype("datetime64[h]")
+        years = stamps.astype("datetime64[Y]").astype(np.int64) + 1970
+        months = stamps.astype("datetime64[M]").astype(np.int64)  # months since 1970-01
+        days = stamps.astype("datetime64[D]").astype(np.int64)
+        weekdays = (days + 3) % 7  # 1970-01-01 was a Thursday
+        return years, months, weekdays
+
+    def per_year(self):
+        years, _, _ = self._calendar()
+        first = years.min()
+        counts = np.bincount(years - first, weights=self.count).astype(np.int64)
+        return pd.Series(counts, index=np.arange(first, first + len(counts))).loc[lambda s: s > 0]
+
+    def per_month_of_year(self):
+        _, months, _ = self._calendar()
+        counts = np.bincount(months % 12, weights=self.count, minlength=12).astype(np.int64)
+        return pd.Series(counts, index=np.arange(1, 13))
+
+    def monthly(self, kategorie=None):
+        """Reports per calendar month (like resample("ME").size()), optionally for one category"""
+        _, months, _ = self._calendar()
+        weights = self.count
+        if kategorie is not None:
+            weights = np.where(self.cat == self.categories.index(kategorie), self.count, 0)
+        first = months.min()
+        counts = np.bincount(months - first, weights=weights).astype(np.int64)
+        month_starts = (np.arange(first, first + len(counts))).astype("datetime64[M]")
+        index = pd.DatetimeIndex(month_starts.astype("datetime64[ns]")) + pd.offsets.MonthEnd(0)
+        return pd.Series(counts, index=index)
+
+    def day_of_week(self):
+        _, _, weekdays = self._calendar()
+        counts = np.bincount(weekdays, weights=self.count, minlength=7).astype(np.int64)
+        return pd.Series(counts, index=WEEKDAYS)
+
+    def _crosstab(self, row_codes, row_labels, keep_rows=None):
+        table = np.zeros((len(row_labels), len(self.categories)), dtype=np.int64)
+        np.add.at(table, (row_codes, self.cat), self.count)
+        df = pd.DataFrame(table, index=row_labels, columns=self.categories)
+        if keep_rows is not None:
+            df = df.loc[keep_rows]
+        return df.loc[:, df.sum() > 0]
+
+    def category_by_year(self):
+        years, _, _ = self._calendar()
+        first = years.min()
+        labels = list(range(first, years.max() + 1))
+        df = self._crosstab(years - first, labels)
+        return df[df.sum(axis=1) > 0]
+
+    def category_by_location(self, top=10):
+        keep = list(self.top_locations(top).index) if top else None
+        return self._crosstab(self.loc, self.locations, keep)
+
+    def density(self, region_data=REGION_DATA):
+        """Reports per km² and per 100k inhabitants for the 12 districts"""
+        counts = self.location_counts()
+        regions = pd.DataFrame(region_data).T
+        df = regions.assign(reports=counts.reindex(regions.index).fillna(0).astype(np.int64))
+        df["reports_per_km2"] = df["reports"] / df["area_km2"]
+        df["reports_per_100k"] = df["reports"] / df["population"] * 100000
+        return df.sort_values("reports_per_100k", ascending=False)
+
+
+def build(csv_folder=CSV_FOLDER, path=CUBE_FILE):
+    cube = AnalyticsCube()
+    cube.update(csv_folder)
+    cube.save(path)
+    print(f"✅ {cube.total} reports in {len(cube.count)} cells -> {path}")
+    return cube
+
+
+def update(csv_folder=CSV_FOLDER, path=CUBE_FILE):
+    """Incremental update of an existing cube (builds one if missing)"""
+    if not os.path.exists(path):
+        return build(csv_folder, path)
+    cube = AnalyticsCube.load(path)
+    if cube.update(csv_folder):
+        cube.save(path)
+    print(f"✅ {cube.total} reports in {len(cube.count)} cells")
+    return cube
+
+
+def summary(path=CUBE_FILE):
+    start = time.perf_counter()
+    cube = AnalyticsCube.load(path)
+    print(f"📂 Loaded {path} in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({cube.total} reports, {len(cube.count)} cells)")
+
+    queries = [
+        ("category_counts", cube.category_counts),
+        ("per_year", cube.per_year),
+        ("per_month_of_year", cube.per_month_of_year),
+        ("top_locations", cube.top_locations),
+        ("monthly", cube.monthly),
+        ("monthly Gewaltverbrechen", lambda: cube.monthly("Gewaltverbrechen")),
+        ("day_of_week", cube.day_of_week),
+        ("category_by_year", cube.category_by_year),
+        ("category_by_location", cube.category_by_location),
+        ("density", cube.density),
+    ]
+    for name, query in queries:
+        start = time.perf_counter()
+        result = query()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n⏱️ {name}: {elapsed:.2f} ms")
+        print(result.head(12).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-aggregated analytics cube")
+    parser.add_argument("command", choices=["build", "update", "summary"])
+    parser.add_argument("--csv-folder", default=CSV_FOLDER)
+    parser.add_argument("--cube", default=CUBE_FILE)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.csv_folder, args.cube)
+    elif args.command == "update":
+        update(args.csv_folder, args.cube)
+    else:
+        summary(args.cube)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare load times: notebook-style pd.read_csv concat vs. the Parquet store.
+
+    python dataset_store.py import
+    python benchmark_dataset_store.py
+"""
+import os
+import time
+
+import pandas as pd
+
+import dataset_store
+
+# ---- CONFIG ----
+REPEATS = 5
+DASHBOARD_COLUMNS = ["date", "location", "kategorie"]
+
+
+def load_csv_concat(folder=dataset_store.CSV_FOLDER):
+    """What Berlin_police_reports.ipynb does: read every CSV, concat, parse dates"""
+    dfs = [pd.read_csv(os.path.join(folder, name)) for name in sorted(os.listdir(folder)) if name.endswith(".csv")]
+    df = pd.concat(dfs, ignore_index=True)
+    df["date_clean"] = pd.to_datetime(df["date"].str.replace(" Uhr", ""), format="%d.%m.%Y %H:%M", errors="coerce")
+    return df
+
+
+def best_of(fn, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    if not os.path.isdir(dataset_store.STORE_FOLDER):
+        dataset_store.import_csv()
+
+    cases = [
+        ("pd.read_csv concat + to_datetime", load_csv_concat),
+        ("parquet, all columns", lambda: dataset_store.load()),
+        ("parquet, date+location+kategorie", lambda: dataset_store.load(DASHBOARD_COLUMNS)),
+    ]
+
+    print("\n📊 RESULTS (best of %d):" % REPEATS)
+    print("=" * 70)
+    baseline = None
+    for name, fn in cases:
+        elapsed, df = best_of(fn)
+        baseline = baseline or elapsed
+        memory = df.memory_usage(deep=True).sum() / 1e6
+        print(f"{name:<36} {elapsed * 1000:>8.1f} ms {baseline / elapsed:>6.1f}x {memory:>8.1f} MB")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Near-duplicate detection on the full archive: build time, recall and per-report check latency.
+
+Recall compares the pairs the LSH index stored with every pair a numpy scan
+over all signatures finds at >= SIMILARITY. Latency compares a check through
+the LSH buckets with comparing the report against every stored signature, and
+with exact Jaccard similarity against every description's shingle set (what
+a plain pairwise scan would do).
+
+    python benchmark_near_duplicates.py
+"""
+import glob
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from dedup_index import extract_report_id
+from http_fetch import percentile
+from near_duplicates import SIMILARITY, NearDuplicateIndex, band_keys, shingles, signatures
+
+# ---- CONFIG ----
+DATA_FOLDER = "berlin_reports_yearly"
+QUERIES = 300
+SEED = 7
+SCAN_BLOCK = 256  # rows of the all-pairs signature scan compared at once
+
+
+def load_descriptions(folder=DATA_FOLDER):
+    frames = []
+    for path in sorted(glob.glob(os.path.join(folder, "berlin_polizei_*.csv"))):
+        df = pd.read_csv(path, usecols=["link", "description"], dtype="string", keep_default_na=False)
+        df["year"] = int(os.path.basename(path).split("_")[2].split(".")[0])
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df["report_id"] = df["link"].map(extract_report_id)
+    return df.dropna(subset=["report_id"]).drop_duplicates("report_id", keep="last")
+
+
+def scan_pairs(ids, matrix, block=SCAN_BLOCK):
+    """Every (smaller id, larger id) pair whose signatures agree on >= SIMILARITY of the values"""
+    pairs = set()
+    for start in range(0, len(matrix), block):
+        agree = (matrix[start:start + block, None, :] == matrix[None, :, :]).mean(axis=2) >= SIMILARITY
+        rows, cols = np.nonzero(agree)
+        keep = cols > rows + start
+        pairs.update(zip(np.minimum(ids[rows[keep] + start], ids[cols[keep]]).tolist(),
+                         np.maximum(ids[rows[keep] + start], ids[cols[keep]]).tolist()))
+    return pairs
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    df = load_descriptions()
+    print(f"📚 {len(df)} descriptions")
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = NearDuplicateIndex(os.path.join(folder, "near_duplicates.sqlite"))
+        sig_time, sigs = timed(lambda: signatures(df["description"].tolist()))
+
+        build_time, _ = timed(lambda: [index.add_reports(group, year) for year, group in df.groupby("year")])
+        cluster_time, clusters = timed(index.update_clusters)
+
+        stored = {int(rid): sig for rid, sig in zip(df["report_id"], sigs) if sig is not None}
+        ids = np.array(list(stored))
+        matrix = np.stack(list(stored.values()))
+        doc, grams = shingles(df["description"].tolist())
+        per_report = np.split(grams, np.cumsum(np.bincount(doc, minlength=len(df)))[:-1])
+        shingle_sets = {int(rid): set(values.tolist()) for rid, values in zip(df["report_id"], per_report)
+                        if int(rid) in stored}
+
+        true_time, true_pairs = timed(lambda: scan_pairs(ids, matrix))
+        lsh_pairs = {(min(a, b), max(a, b)) for a, b in index.conn.execute("SELECT report_id, other_id FROM pairs")}
+        missed = true_pairs - lsh_pairs
+
+        # Random reports plus every report the scan pairs, so both paths have matches to find
+        random.seed(SEED)
+        paired = {rid for pair in true_pairs for rid in pair}
+        sample = random.sample(sorted(set(stored) - paired), QUERIES) + sorted(paired)
+        lsh, scan, exact = [], [], []
+        found_lsh = found_scan = 0
+        for rid in sample:
+            sig = stored[rid]
+            elapsed, matches = timed(lambda: index._similar(sig, band_keys(sig[None, :])[0], exclude=rid))
+            lsh.append(elapsed)
+            found_lsh += len(matches)
+
+            elapsed, hits = timed(lambda: ids[((matrix == sig).mean(axis=1) >= SIMILARITY) & (ids != rid)])
+            scan.append(elapsed)
+            found_scan += len(hits)
+
+        for rid in sample[:QUERIES // 10]:  # slow
+            query = shingle_sets[rid]
+            elapsed, _ = timed(lambda: [len(query & other) / len(query | other)
+                                        for other in shingle_sets.values()])
+            exact.append(elapsed)
+        index.close()
+
+    print("\n📊 RESULTS:")
+    print("=" * 70)
+    print(f"Signatures (vectorized):  {sig_time:>8.2f} s ({sig_time / len(df) * 1e6:.0f} µs per report)")
+    print(f"Index build (SQLite):     {build_time:>8.2f} s (signatures + buckets + pairs)")
+    print(f"Clusters (union-find):    {cluster_time * 1000:>8.1f} ms, {clusters} clusters")
+    print(f"All-pairs numpy scan:     {true_time:>8.2f} s, {len(true_pairs)} pairs >= {SIMILARITY}")
+    recall = (len(true_pairs) - len(missed)) / len(true_pairs) if true_pairs else 1.0
+    print(f"LSH recall:               {recall:>8.1%} ({len(missed)} missed, {len(lsh_pairs)} pairs stored)")
+    print("-" * 70)
+    print(f"{len(sample)} checked reports ({len(sample) - QUERIES} with a near-duplicate)")
+    print(f"{'check one report':<28}{'p50':>10}{'p95':>10}{'matches':>10}")
+    print(f"{'LSH buckets':<28}{percentile(lsh, 50) * 1000:>8.2f}ms{percentile(lsh, 95) * 1000:>8.2f}ms"
+          f"{found_lsh:>10}")
+    print(f"{'all signatures (numpy)':<28}{percentile(scan, 50) * 1000:>8.2f}ms{percentile(scan, 95) * 1000:>8.2f}ms"
+          f"{found_scan:>10}")
+    print(f"{'exact Jaccard, all reports':<28}{percentile(exact, 50) * 1000:>8.2f}ms"
+          f"{percentile(exact, 95) * 1000:>8.2f}ms{'':>10}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Benchmark OllamaPoliceClassifier against a local fake Ollama server.
+
+The fake server answers POST /api/chat after a configurable latency with a
+category picked by keyword, so rows/s can be measured without a real model.
+Set REAL_OLLAMA_HOST to also compare the free-text and structured prompt
+modes on a real model (latency and generated tokens per request).
+
+    python benchmark_ollama_classifier.py
+"""
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ollama_classifier import OllamaPoliceClassifier
+
+# ---- CONFIG ----
+INPUT_FILE = "berlin_reports_yearly/berlin_polizei_2025.csv"
+ROWS = 200
+LATENCY_SECONDS = 0.05      # simulated generation time per request
+SERVER_SLOTS = 8            # parallel requests the fake server handles (OLLAMA_NUM_PARALLEL)
+CONCURRENCY_LEVELS = [1, 4, 8, 16]
+REAL_OLLAMA_HOST = None     # e.g. "http://localhost:11434" to compare prompt modes on a real model
+REAL_MODEL = "llama3.1:8b"
+REAL_ROWS = 50
+
+KEYWORDS = {
+    "Verkehrsdelikte": ["verkehr", "unfall", "fahrer"],
+    "Brandstiftung": ["brand", "feuer"],
+    "Betäubungsmittel": ["drogen", "rauschgift"],
+    "Eigentumsdelikte": ["diebstahl", "einbruch", "betrug"],
+    "Gewaltverbrechen": ["raub", "angriff", "verletzt"],
+}
+
+
+def fake_answer(prompt):
+    report = prompt.rsplit("MELDUNG:", 1)[-1].lower()
+    for category, words in KEYWORDS.items():
+        if any(word in report for word in words):
+            return category
+    return "Sonstiges"
+
+
+def start_fake_ollama(latency, slots):
+    slot_semaphore = threading.BoundedSemaphore(slots)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with slot_semaphore:
+                time.sleep(latency)
+            answer = fake_answer(payload["messages"][-1]["content"])
+            if payload.get("format"):
+                answer = json.dumps({"kategorie": answer}, ensure_ascii=False)
+            body = json.dumps({
+                "model": payload["model"],
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": answer},
+                "done": True,
+                "done_reason": "stop",
+                "eval_count": len(answer) // 3,
+                "prompt_eval_count": sum(len(m["content"]) for m in payload["messages"]) // 4,
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_rows():
+    with open(INPUT_FILE, newline="", encoding="utf-8") as f:
+        rows = [(row["title"], row["description"]) for row in csv.DictReader(f)]
+    return rows[:ROWS]
+
+
+def compare_prompt_modes(rows):
+    """Free-text prompt vs structured output on a real Ollama model, one request at a time"""
+    print(f"\n🧪 Prompt modes on {REAL_MODEL} at {REAL_OLLAMA_HOST}, {len(rows)} rows")
+    answers = {}
+    for structured in (False, True):
+        classifier = OllamaPoliceClassifier(model_name=REAL_MODEL, host=REAL_OLLAMA_HOST, structured=structured)
+        classifier.classify_event(*rows[0])  # warm-up: load the model
+        classifier.timings.clear()
+        answers[structured] = [classifier.classify_event(title, description) for title, description in rows]
+        classifier.timing_report()
+    same = sum(a == b for a, b in zip(answers[False], answers[True])) / len(rows)
+    print(f"🔁 Same category in both modes: {same:.0%}")
+
+
+def main():
+    rows = load_rows()
+    server = start_fake_ollama(LATENCY_SECONDS, SERVER_SLOTS)
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    classifier = OllamaPoliceClassifier(host=host)
+
+    print(f"\n🖥️ Fake Ollama on {host}: {LATENCY_SECONDS * 1000:.0f} ms/request, {SERVER_SLOTS} slots, {len(rows)} rows")
+
+    # Old driver loop: one classify_event per row plus time.sleep(0.1)
+    start = time.perf_counter()
+    baseline = []
+    for title, description in rows:
+        baseline.append(classifier.classify_event(title, description))
+        time.sleep(0.1)
+    results = [("classify_event + sleep", time.perf_counter() - start, baseline)]
+
+    for concurrency in CONCURRENCY_LEVELS:
+        start = time.perf_counter()
+        categories = list(classifier.classify_many(rows, concurrency=concurrency))
+        results.append((f"classify_many x{concurrency}", time.perf_counter() - start, categories))
+
+    # Persistent cache: cold run fills it, warm run should not reach the server
+    with tempfile.TemporaryDirectory() as cache_folder:
+        cached = OllamaPoliceClassifier(host=host, cache=os.path.join(cache_folder, "cache.sqlite"))
+        for name in ["cache cold x8", "cache warm x8"]:
+            start = time.perf_counter()
+            categories = list(cached.classify_many(rows, concurrency=8))
+            results.append((name, time.perf_counter() - start, categories))
+        cached.cache.report()
+
+        keys = [cached._cache_key(title, description) for title, description in rows]
+        cached.cache.memory.clear()
+        start = time.perf_counter()
+        for key in keys:
+            cached.cache.get(key)
+        sqlite_hit = (time.perf_counter() - start) / len(keys)
+        start = time.perf_counter()
+        for key in keys:
+            cached.cache.get(key)
+        memory_hit = (time.perf_counter() - start) / len(keys)
+        print(f"🗃️ Hit cost: {sqlite_hit * 1e6:.1f} µs from SQLite, {memory_hit * 1e6:.2f} µs from memory")
+        cached.cache.close()
+
+    # Structured mode through the same plumbing (the fake server answers with JSON when `format` is set)
+    structured = OllamaPoliceClassifier(host=host, structured=True)
+    start = time.perf_counter()
+    categories = list(structured.classify_many(rows, concurrency=8))
+    results.append(("structured x8", time.perf_counter() - start, categories))
+
+    server.shutdown()
+
+    print("\n📊 RESULTS:")
+    print("=" * 60)
+    print(f"{'mode':<26} {'seconds':>10} {'rows/s':>10} {'same as baseline':>17}")
+    for name, elapsed, categories in results:
+        print(f"{name:<26} {elapsed:>10.2f} {len(rows) / elapsed:>10.1f} {str(categories == baseline):>17}")
+    print("=" * 60)
+
+    if REAL_OLLAMA_HOST:
+        compare_prompt_modes(rows[:REAL_ROWS])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Micro-benchmark of the parser backends in report_parsing.py.
+
+Runs parse_listing / extract_description over a corpus of saved pages
+(saved_pages/archive/<year>/<page>.html and saved_pages/detail/*.html).
+If no pages are saved, a corpus is rendered from the yearly CSVs with the
+berlin.de markup. Every backend's output is checked against BeautifulSoup.
+
+    python benchmark_parsers.py
+"""
+import csv
+import html
+import os
+import time
+
+from benchmark_scraper_async import render_listing
+from report_parsing import PARSER_BACKENDS, extract_description, parse_listing
+
+# ---- CONFIG ----
+SAVED_PAGES_FOLDER = "saved_pages"
+CSV_FILE = "berlin_reports_yearly/berlin_polizei_2024.csv"
+LISTING_PAGES = 200
+DETAIL_PAGES = 500
+ENTRIES_PER_PAGE = 10
+REPEATS = 3
+
+PAGE_CHROME = """<!DOCTYPE html><html lang="de"><head><meta charset="utf-8">
+<title>Polizeimeldungen - Berlin.de</title><script>window.dataLayer = [];</script>
+<style>.text {{ margin: 0 }}</style></head><body>
+<header class="header"><nav class="nav"><ul>{nav}</ul></nav></header>
+<main class="main">{content}</main>
+<footer class="footer"><!-- footer --><p>&copy; Berlin.de</p></footer></body></html>"""
+
+NAV = "".join(f'<li><a href="/polizei/{i}/">Menüpunkt {i}</a></li>' for i in range(40))
+
+
+def render_detail(row):
+    paragraphs = "".join(f"<p>{html.escape(line)}</p>\n" for line in row["description"].split("\n"))
+    content = (
+        f'<h1 class="title">{html.escape(row["title"])}</h1>'
+        '<div class="emergency-box"><div class="textile"><p>Notruf 110</p></div></div>'
+        f'<div class="text"><div class="textile"><!-- body -->{paragraphs}'
+        '<script>track("detail");</script></div></div>'
+    )
+    return PAGE_CHROME.format(nav=NAV, content=content)
+
+
+def load_corpus():
+    listing_dir = os.path.join(SAVED_PAGES_FOLDER, "archive")
+    detail_dir = os.path.join(SAVED_PAGES_FOLDER, "detail")
+    listings, details = [], []
+
+    for folder, target in ((listing_dir, listings), (detail_dir, details)):
+        if os.path.isdir(folder):
+            for root, _, names in os.walk(folder):
+                for name in sorted(names):
+                    if name.endswith(".html"):
+                        with open(os.path.join(root, name), encoding="utf-8") as f:
+                            target.append(f.read())
+
+    if not listings or not details:
+        with open(CSV_FILE, newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if row.get("description")]
+        if not listings:
+            for i in range(0, min(len(rows), LISTING_PAGES * ENTRIES_PER_PAGE), ENTRIES_PER_PAGE):
+                listings.append(PAGE_CHROME.format(nav=NAV, content=render_listing(rows[i:i + ENTRIES_PER_PAGE])))
+        if not details:
+            details = [render_detail(row) for row in rows[:DETAIL_PAGES]]
+
+    return listings, details
+
+
+def run(fn, pages, backend):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        output = [fn(page, backend=backend) for page in pages]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    listings, details = load_corpus()
+    print(f"📚 Corpus: {len(listings)} listing pages, {len(details)} detail pages")
+
+    print("\n📊 RESULTS (best of %d):" % REPEATS)
+    print("=" * 72)
+    print(f"{'backend':<12} {'listing docs/s':>16} {'detail docs/s':>16} {'same records':>14}")
+    reference = None
+    for backend in PARSER_BACKENDS:
+        try:
+            listing_time, listing_out = run(parse_listing, listings, backend)
+            detail_time, detail_out = run(extract_description, details, backend)
+        except ImportError as e:
+            print(f"{backend:<12} not installed ({e})")
+            continue
+        if reference is None:
+            reference = (listing_out, detail_out)
+        same = (listing_out, detail_out) == reference
+        print(f"{backend:<12} {len(listings) / listing_time:>16.0f} {len(details) / detail_time:>16.0f} {str(same):>14}")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark the async listing crawler against a local stand-in for berlin.de.
+
+The stand-in serves saved archive pages from SAVED_PAGES_FOLDER
+(<folder>/<year>/<page>.html). If that folder does not exist, pages are
+rendered from the CSVs in berlin_csv/ using the same markup the selectors expect.
+
+    python benchmark_scraper_async.py
+"""
+import asyncio
+import csv
+import html
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper_async import AsyncListingCrawler
+
+# ---- CONFIG ----
+SAVED_PAGES_FOLDER = "saved_pages/archive"
+CSV_FOLDER = "berlin_csv"
+YEARS = [2020, 2021]
+ENTRIES_PER_PAGE = 10
+LATENCY_SECONDS = 0.15       # simulated server response time per page
+CONCURRENCY_LEVELS = [1, 4, 8, 16]
+
+URL_PATTERN = re.compile(r"/archiv/(\d{4})/\?page_at_1_0=(\d+)")
+
+
+def render_listing(rows):
+    """Render rows in the berlin.de archive markup"""
+    items = []
+    for row in rows:
+        href = row["link"].replace("https://www.berlin.de", "")
+        location = row["location"].replace("Ereignisort:", "").strip()
+        items.append(
+            "<li>"
+            f'<div class="cell nowrap date">{html.escape(row["date"])}</div>'
+            f'<div class="cell text"><a href="{html.escape(href)}">{html.escape(row["title"])}</a>'
+            f'<span class="category"><span class="label">Ereignisort:</span> {html.escape(location)}</span></div>'
+            "</li>"
+        )
+    return f'<html><body><ul class="list--tablelist">{"".join(items)}</ul></body></html>'
+
+
+def load_pages(years):
+    """Map (year, page) -> html from saved pages, or render them from the CSVs"""
+    pages = {}
+    for year in years:
+        saved_dir = os.path.join(SAVED_PAGES_FOLDER, str(year))
+        if os.path.isdir(saved_dir):
+            for name in os.listdir(saved_dir):
+                if name.endswith(".html"):
+                    with open(os.path.join(saved_dir, name), encoding="utf-8") as f:
+                        pages[(year, int(name[:-5]))] = f.read()
+            continue
+
+        with open(os.path.join(CSV_FOLDER, f"berlin_polizei_{year}.csv"), newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        for i in range(0, len(rows), ENTRIES_PER_PAGE):
+            pages[(year, i // ENTRIES_PER_PAGE + 1)] = render_listing(rows[i:i + ENTRIES_PER_PAGE])
+    return pages
+
+
+def start_server(pages, latency):
+    empty_page = render_listing([]).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            match = URL_PATTERN.search(self.path)
+            body = empty_page
+            if match:
+                page = pages.get((int(match.group(1)), int(match.group(2))))
+                if page is not None:
+                    body = page.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_once(fetch_base, concurrency, output_folder):
+    start = time.perf_counter()
+    async with AsyncListingCrawler(fetch_base=fetch_base, max_in_flight=concurrency,
+                                   rate=1000, burst=concurrency, verbose=False, cache=None) as crawler:
+        counts = await crawler.crawl_years(YEARS, output_folder)
+        pages = crawler.pages_fetched
+    return time.perf_counter() - start, pages, sum(counts.values())
+
+
+def main():
+    pages = load_pages(YEARS)
+    server = start_server(pages, LATENCY_SECONDS)
+    fetch_base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"🖥️ Serving {len(pages)} archive pages on {fetch_base} ({LATENCY_SECONDS * 1000:.0f} ms latency)")
+
+    results = []
+    with tempfile.TemporaryDirectory() as output_folder:
+        for concurrency in CONCURRENCY_LEVELS:
+            elapsed, fetched, entries = asyncio.run(run_once(fetch_base, concurrency, output_folder))
+            results.append((concurrency, elapsed, fetched, entries))
+
+    server.shutdown()
+
+    # Selenium baseline: one page at a time plus random.uniform(1.5, 3.0) sleep
+    selenium_estimate = len(pages) * (LATENCY_SECONDS + 2.25)
+
+    print("\n📊 RESULTS:")
+    print("=" * 60)
+    print(f"{'in flight':>10} {'seconds':>10} {'pages':>8} {'pages/s':>10} {'entries':>8}")
+    for concurrency, elapsed, fetched, entries in results:
+        print(f"{concurrency:>10} {elapsed:>10.2f} {fetched:>8} {fetched / elapsed:>10.2f} {entries:>8}")
+    print("=" * 60)
+    print(f"Sequential Selenium loop (estimated, sleeps only): {selenium_estimate:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+from report_normalize import normalize_rows
+
+
+class CheckpointJournal:
+    """Crash-safe, append-only journal of per-report field updates for one yearly CSV.
+
+    Updates are recorded as `link -> {field: value}` and flushed every
+    `flush_every` records into a new segment file inside `<csv>.journal/`.
+    Each segment is written to a temp file and atomically renamed, so a crash
+    leaves either the whole segment or nothing. On restart `replay()` applies
+    all segments to the freshly loaded rows, and `compact()` rewrites the CSV
+    once (temp file + rename) and drops the journal.
+    """
+
+    def __init__(self, csv_path, flush_every=25):
+        self.csv_path = csv_path
+        self.folder = csv_path + ".journal"
+        self.flush_every = flush_every
+        self.pending = []
+        self.recorded = 0
+
+    def _segments(self):
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(name for name in os.listdir(self.folder) if name.endswith(".jsonl"))
+
+    def load(self):
+        """Read all flushed segments into {link: {field: value}} (later entries win)"""
+        updates = {}
+        for name in self._segments():
+            with open(os.path.join(self.folder, name), encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    updates.setdefault(entry["link"], {}).update(entry["fields"])
+        return updates
+
+    def replay(self, rows):
+        """Apply journaled updates to rows loaded from the CSV; returns how many rows changed"""
+        updates = self.load()
+        if not updates:
+            return 0
+        applied = 0
+        for row in rows:
+            fields = updates.get(row.get("link"))
+            if fields:
+                row.update(fields)
+                applied += 1
+        print(f"♻️ Replayed {applied} journaled updates for {self.csv_path}")
+        return applied
+
+    def record(self, link, **fields):
+        """Queue an update; flushes automatically every `flush_every` records"""
+        self.pending.append({"link": link, "fields": fields})
+        self.recorded += 1
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write pending updates as a new segment (temp file + atomic rename)"""
+        if not self.pending:
+            return
+        os.makedirs(self.folder, exist_ok=True)
+        segments = self._segments()
+        next_id = int(segments[-1].split(".")[0]) + 1 if segments else 0
+        target = os.path.join(self.folder, f"{next_id:06d}.jsonl")
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for entry in self.pending:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+        self.pending = []
+
+    def compact(self, rows, fieldnames):
+        """Rewrite the yearly CSV with all updates applied, then drop the journal"""
+        self.flush()
+        write_csv_atomic(self.csv_path, rows, fieldnames)
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+def write_csv_atomic(path, rows, fieldnames):
+    """Write rows to a temp file next to `path` and atomically rename it over `path`"""
+    normalize_rows(rows, fieldnames)
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".csv.tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
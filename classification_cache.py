@@ -0,0 +1,104 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+CACHE_FILE = "classification_cache.sqlite"
+MAX_ENTRIES = 500_000
+COMMIT_EVERY = 100       # inserts between automatic commits
+DESCRIPTION_CHARS = 800  # same truncation as the classifier prompt
+
+
+class ClassificationCache:
+    """Disk-backed category cache keyed by a hash of (model, prompt version, title, description).
+
+    Stored in SQLite with a last-used stamp per entry; once more than
+    `max_entries` are stored the least recently used ones are evicted.
+    Recent keys are also kept in an in-process dict so repeated hits do not
+    touch SQLite at all.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.memory = {}
+        self._touched = set()
+        self._uncommitted = 0
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS categories ("
+            " key BLOB PRIMARY KEY, category TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS categories_last_used ON categories(last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model_name, prompt_version, title, description):
+        payload = "\x1f".join([
+            model_name, str(prompt_version), str(title or ""), str(description or "")[:DESCRIPTION_CHARS]
+        ])
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key):
+        """Return the cached category or None"""
+        category = self.memory.get(key)
+        if category is None:
+            row = self.conn.execute("SELECT category FROM categories WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            category = row[0]
+            self.memory[key] = category
+        self._touched.add(key)
+        self.hits += 1
+        return category
+
+    def put(self, key, category):
+        self.memory[key] = category
+        self.conn.execute(
+            "INSERT OR REPLACE INTO categories (key, category, last_used) VALUES (?, ?, ?)",
+            (key, category, time.time()),
+        )
+        self._touched.discard(key)
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        """Persist inserts and last-used stamps, then evict the LRU tail if over size"""
+        if self._touched:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE categories SET last_used = ? WHERE key = ?",
+                [(now, key) for key in self._touched],
+            )
+            self._touched.clear()
+        count = self.conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM categories WHERE key IN ("
+                " SELECT key FROM categories ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            self.memory.clear()
+        self.conn.commit()
+        self._uncommitted = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        print(f"🗃️ Classification cache: {self.hits} hits, {self.misses} misses "
+              f"({self.hit_rate * 100:.1f}% hit rate)")
+
+    def close(self):
+        self.commit()
+        self.conn.close()
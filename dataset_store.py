@@ -0,0 +1,163 @@
+"""Columnar Parquet store for the yearly report files.
+
+The dataset is kept as one Parquet file per year (hive layout
+`year=<year>/part-0.parquet`) with typed columns:
+
+    date            timestamp     parsed from "05.11.2014 12:15 Uhr"
+    date_raw        string        the original text of a date that did not parse (null otherwise)
+    location        categorical
+    kategorie       categorical
+    kategorie_tier  categorical   cascade tier that decided kategorie (rules / fast / llm), null before the cascade
+    title, link, description, en_title   strings
+
+Loading only some columns (e.g. date + location + kategorie) never reads the
+description bytes.
+
+    python dataset_store.py import            # yearly CSVs -> Parquet
+    python dataset_store.py export out_folder # Parquet -> yearly CSVs
+"""
+import argparse
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from report_normalize import DATE_FORMAT, normalize_frame, parse_dates
+
+# === CONFIG ===
+STORE_FOLDER = "berlin_reports_parquet"
+CSV_FOLDER = "berlin_reports_yearly_classified"
+CSV_PATTERN = "berlin_polizei_{year}_classified.csv"
+YEARS = list(range(2014, datetime.now().year + 1))  # through the year still being updated
+COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title", "kategorie", "kategorie_tier"]
+
+SCHEMA = pa.schema([
+    ("date", pa.timestamp("s")),
+    ("date_raw", pa.string()),
+    ("title", pa.string()),
+    ("link", pa.string()),
+    ("location", pa.dictionary(pa.int32(), pa.string())),
+    ("description", pa.string()),
+    ("en_title", pa.string()),
+    ("kategorie", pa.dictionary(pa.int32(), pa.string())),
+    ("kategorie_tier", pa.dictionary(pa.int32(), pa.string())),
+])
+
+
+def format_dates(values, raw=None):
+    """Inverse of parse_dates, back to the CSV representation; unparsed dates come from `raw`"""
+    formatted = values.dt.strftime(DATE_FORMAT + " Uhr")
+    if raw is not None:
+        formatted = formatted.fillna(raw.astype("string"))
+    return formatted.fillna("")
+
+
+def frame_to_table(df):
+    """Convert a CSV-layout DataFrame into an Arrow table with the store schema"""
+    df = df.reindex(columns=COLUMN_NAMES)
+    raw_dates = df["date"].astype("string")
+    dates = parse_dates(raw_dates).astype("datetime64[s]")
+    unparsed = dates.isna() & raw_dates.fillna("").str.strip().ne("")
+    if unparsed.any():
+        print(f"⚠️ {unparsed.sum()} dates could not be parsed (e.g. {raw_dates[unparsed].iloc[0]!r}); "
+              f"kept as text in date_raw")
+    typed = pd.DataFrame({
+        "date": dates,
+        "date_raw": raw_dates.where(unparsed),
+        "title": df["title"].astype("string"),
+        "link": df["link"].astype("string"),
+        "location": df["location"].astype("string"),
+        "description": df["description"].astype("string"),
+        "en_title": df["en_title"].astype("string"),
+        "kategorie": df["kategorie"].astype("string"),
+        "kategorie_tier": df["kategorie_tier"].astype("string").replace("", pd.NA),
+    })
+    return pa.Table.from_pandas(typed, schema=SCHEMA, preserve_index=False)
+
+
+def year_path(year, store_folder=STORE_FOLDER):
+    return os.path.join(store_folder, f"year={year}", "part-0.parquet")
+
+
+def write_year(df, year, store_folder=STORE_FOLDER):
+    """Replace one year's partition with the rows of `df` (CSV layout)"""
+    path = year_path(year, store_folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    pq.write_table(frame_to_table(df), tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+    return path
+
+
+def import_csv(csv_folder=CSV_FOLDER, years=YEARS, store_folder=STORE_FOLDER, pattern=CSV_PATTERN):
+    """Convert the yearly CSVs into Parquet partitions"""
+    total = 0
+    for year in years:
+        filename = os.path.join(csv_folder, pattern.format(year=year))
+        if not os.path.exists(filename):
+            print(f"⏭️ Skipping missing file: {filename}")
+            continue
+        df = pd.read_csv(filename, dtype="string", keep_default_na=False)
+        write_year(df, year, store_folder)
+        total += len(df)
+        print(f"📦 {filename} -> {year_path(year, store_folder)} ({len(df)} rows)")
+    print(f"✅ Imported {total} rows into {store_folder}")
+    return total
+
+
+def load(columns=None, years=None, store_folder=STORE_FOLDER):
+    """Load the dataset as a DataFrame, reading only `columns` and the `years` partitions.
+
+    location and kategorie come back as pandas categoricals, date as datetime64.
+    """
+    dataset = ds.dataset(store_folder, format="parquet", partitioning="hive")
+    filter_expr = ds.field("year").isin(list(years)) if years is not None else None
+    table = dataset.to_table(columns=columns, filter=filter_expr)
+    return table.to_pandas()
+
+
+def to_csv_layout(df):
+    """Turn a loaded DataFrame back into the string columns of the yearly CSVs"""
+    out = pd.DataFrame({"date": format_dates(df["date"], df.get("date_raw"))})
+    for column in COLUMN_NAMES[1:]:
+        if column == "kategorie_tier" and (column not in df or df[column].isna().all()):
+            continue  # classified before the cascade: the CSV had no tier column
+        out[column] = df[column].astype("string").fillna("")
+    return normalize_frame(out)
+
+
+def export_csv(output_folder, years=YEARS, store_folder=STORE_FOLDER, pattern=CSV_PATTERN):
+    """Write the Parquet partitions back out as yearly CSVs"""
+    os.makedirs(output_folder, exist_ok=True)
+    for year in years:
+        if not os.path.exists(year_path(year, store_folder)):
+            continue
+        df = to_csv_layout(pq.read_table(year_path(year, store_folder)).to_pandas())
+        filename = os.path.join(output_folder, pattern.format(year=year))
+        df.to_csv(filename, index=False)
+        print(f"📁 Saved {len(df)} entries to {filename}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet store for the yearly report CSVs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="yearly CSVs -> Parquet")
+    p_import.add_argument("--csv-folder", default=CSV_FOLDER)
+    p_export = sub.add_parser("export", help="Parquet -> yearly CSVs")
+    p_export.add_argument("output_folder")
+    for p in (p_import, p_export):
+        p.add_argument("--store", default=STORE_FOLDER)
+        p.add_argument("--years", type=int, nargs="*", default=YEARS)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_csv(args.csv_folder, args.years, args.store)
+    else:
+        export_csv(args.output_folder, args.years, args.store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Archive-wide identity index keyed on the numeric press-release ID.
+
+Every report link ends in `pressemitteilung.<id>.php`; that ID is the
+identity of a report regardless of title/date edits or which yearly file it
+ended up in. The index is a SQLite table (INTEGER PRIMARY KEY = B-tree,
+O(log n) lookups); `ids()` loads it into a set for O(1) checks in hot loops.
+
+    python dedup_index.py build    # (re)build the index from the yearly files
+    python dedup_index.py repair   # drop duplicate reports from the yearly files
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from checkpoint_journal import write_csv_atomic
+
+# === CONFIG ===
+INDEX_FILE = "report_ids.sqlite"
+DATA_FOLDER = "berlin_reports_yearly"
+CSV_PATTERN = "berlin_polizei_{year}.csv"
+YEARS = list(range(2014, datetime.now().year + 1))  # through the year still being updated
+
+REPORT_ID_PATTERN = re.compile(r"pressemitteilung\.(\d+)\.php")
+
+
+def extract_report_id(link):
+    """Numeric pressemitteilung ID from a report link, or None"""
+    match = REPORT_ID_PATTERN.search(link or "")
+    return int(match.group(1)) if match else None
+
+
+class ReportIdIndex:
+    """Persistent set of known report IDs with the year file they live in"""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            " report_id INTEGER PRIMARY KEY, year INTEGER NOT NULL, link TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def __contains__(self, link_or_id):
+        report_id = link_or_id if isinstance(link_or_id, int) else extract_report_id(link_or_id)
+        if report_id is None:
+            return False
+        return self.conn.execute("SELECT 1 FROM reports WHERE report_id = ?", (report_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def ids(self, year=None):
+        """All known IDs as a set (optionally for one year)"""
+        if year is None:
+            cursor = self.conn.execute("SELECT report_id FROM reports")
+        else:
+            cursor = self.conn.execute("SELECT report_id FROM reports WHERE year = ?", (year,))
+        return {row[0] for row in cursor}
+
+    def add_many(self, rows, year):
+        """Register rows (dicts with a `link`); existing IDs keep their original year"""
+        entries = [
+            (report_id, year, row["link"]) for row in rows
+            if (report_id := extract_report_id(row.get("link"))) is not None
+        ]
+        self.conn.executemany("INSERT OR IGNORE INTO reports (report_id, year, link) VALUES (?, ?, ?)", entries)
+        self.conn.commit()
+        return len(entries)
+
+    def clear(self):
+        self.conn.execute("DELETE FROM reports")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def dedupe_rows(rows, seen=None):
+    """Drop rows whose report ID was already seen, keeping the first copy.
+
+    Empty fields of the kept copy are filled from dropped duplicates (e.g. a
+    description scraped into only one of them). `seen` maps report_id -> kept
+    row and may be shared across files. Returns (kept_rows, dropped_count,
+    filled_rows). Rows without a parseable ID are always kept.
+    """
+    if seen is None:
+        seen = {}
+    kept = []
+    filled = []
+    dropped = 0
+    for row in rows:
+        report_id = extract_report_id(row.get("link"))
+        if report_id is None:
+            kept.append(row)
+            continue
+        previous = seen.get(report_id)
+        if previous is None:
+            seen[report_id] = row
+            kept.append(row)
+            continue
+        gaps = [key for key, value in row.items() if value and not previous.get(key)]
+        for key in gaps:
+            previous[key] = row[key]
+        if gaps:
+            filled.append(previous)
+        dropped += 1
+    return kept, dropped, filled
+
+
+def read_year(folder, year, pattern=CSV_PATTERN):
+    filename = os.path.join(folder, pattern.format(year=year))
+    if not os.path.exists(filename):
+        return filename, None, None
+    with open(filename, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    return filename, rows, reader.fieldnames
+
+
+def build(index, folder=DATA_FOLDER, years=YEARS, pattern=CSV_PATTERN):
+    """Rebuild the index from the yearly files"""
+    index.clear()
+    for year in years:
+        filename, rows, _ = read_year(folder, year, pattern)
+        if rows is None:
+            continue
+        index.add_many(rows, year)
+        print(f"🧮 Indexed {filename}")
+    print(f"✅ {len(index)} unique reports in {index.path}")
+
+
+def repair(index, folder=DATA_FOLDER, years=YEARS, pattern=CSV_PATTERN):
+    """Remove duplicate reports (same ID) within and across yearly files, then rebuild the index"""
+    seen = {}
+    files = []
+    filled_ids = set()
+    total_dropped = 0
+    for year in years:
+        filename, rows, fieldnames = read_year(folder, year, pattern)
+        if rows is None:
+            continue
+        kept, dropped, filled = dedupe_rows(rows, seen)
+        filled_ids.update(id(row) for row in filled)
+        files.append((filename, kept, fieldnames, dropped))
+        total_dropped += dropped
+
+    # Write after all years are read: a later duplicate may fill an earlier file's row
+    for filename, kept, fieldnames, dropped in files:
+        if dropped or any(id(row) in filled_ids for row in kept):
+            write_csv_atomic(filename, kept, fieldnames)
+            print(f"🧹 {filename}: removed {dropped} duplicate reports")
+    print(f"✅ Removed {total_dropped} duplicates in total.")
+    build(index, folder, years, pattern)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report ID index and duplicate repair")
+    parser.add_argument("command", choices=["build", "repair"])
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--pattern", default=CSV_PATTERN)
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--years", type=int, nargs="*", default=YEARS)
+    args = parser.parse_args()
+
+    index = ReportIdIndex(args.index)
+    if args.command == "build":
+        build(index, args.folder, args.years, args.pattern)
+    else:
+        repair(index, args.folder, args.years, args.pattern)
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import asyncio
+import csv
+import os
+import time
+
+from checkpoint_journal import CheckpointJournal
+from dedup_index import extract_report_id
+from http_cache import CACHE_FILE
+from http_fetch import AsyncFetcher, print_fetch_stats
+from rate_limiter import get_limiter
+from report_normalize import NORMALIZED_COLUMNS
+from report_parsing import extract_description
+
+# === CONFIG ===
+DATA_FOLDER = "berlin_reports_yearly"  # folder where CSV files are stored
+YEARS = list(range(2014, 2026))  # adjust as needed
+COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"] + NORMALIZED_COLUMNS
+WORKERS = 8                  # concurrent description fetches
+MAX_IN_FLIGHT_PER_HOST = 6   # open requests per host (berlin.de)
+RATE_PER_SECOND = 6.0        # starting rate per host (adapts, see rate_limiter.py)
+MAX_RETRIES = 3
+SELENIUM_FALLBACK = False    # render pages with headless Chrome when plain HTTP has no div.textile
+FLUSH_EVERY = 25             # journal fetched descriptions every N rows
+
+
+class SeleniumFallback:
+    """Single headless Chrome, started lazily, for pages that only render with JS"""
+
+    def __init__(self, wait_seconds=10):
+        self.wait_seconds = wait_seconds
+        self.driver = None
+        self.lock = asyncio.Lock()
+        self.limiter = get_limiter("www.berlin.de")
+        self.pages_rendered = 0
+
+    def _render(self, url):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        if self.driver is None:
+            options = Options()
+            options.add_argument('--headless')
+            self.driver = webdriver.Chrome(options=options)
+
+        self.limiter.acquire()
+        start = time.perf_counter()
+        self.driver.get(url)
+        self.limiter.observe(time.perf_counter() - start)
+        try:
+            WebDriverWait(self.driver, self.wait_seconds).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.textile"))
+            )
+        except Exception:
+            print(f"⚠️ Timeout waiting for div.textile on {url}")
+        self.pages_rendered += 1
+        return self.driver.page_source
+
+    async def render(self, url):
+        async with self.lock:
+            return await asyncio.to_thread(self._render, url)
+
+    def quit(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+class DescriptionFetcher:
+    """Fetches report descriptions with a pool of async workers.
+
+    Detail pages are requested over plain HTTP through AsyncFetcher (per-host
+    concurrency cap, token bucket, retries with backoff). Pages without any
+    div.textile can optionally be re-rendered by a SeleniumFallback. `parser`
+    picks the report_parsing backend ("bs4", "lxml", "selectolax").
+    """
+
+    def __init__(self, workers=WORKERS, max_in_flight=MAX_IN_FLIGHT_PER_HOST,
+                 rate=RATE_PER_SECOND, max_retries=MAX_RETRIES,
+                 selenium_fallback=SELENIUM_FALLBACK, cache=CACHE_FILE, parser=None):
+        self.workers = workers
+        self.parser = parser
+        self.fetcher = AsyncFetcher(max_in_flight=max_in_flight, rate=rate, max_retries=max_retries,
+                                    cache=cache)
+        self.fallback = SeleniumFallback() if selenium_fallback else None
+
+    async def __aenter__(self):
+        await self.fetcher.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.fallback is not None:
+            self.fallback.quit()
+        return await self.fetcher.__aexit__(exc_type, exc, tb)
+
+    async def fetch_description(self, url):
+        """Return the description text for one report link ("" on failure)"""
+        try:
+            html = await self.fetcher.fetch(url)
+            if self.fallback is not None and "textile" not in html:
+                html = await self.fallback.render(url)
+            return extract_description(html, backend=self.parser)
+        except Exception as e:
+            print(f"❌ Error scraping {url}: {e}")
+            return ""
+
+    async def fetch_many(self, links, on_result=None):
+        """Fetch descriptions for many links; returns {link: description}.
+
+        Each report ID is fetched once, even if it appears under several links.
+        `on_result(link, description)` is called as soon as each page is done.
+        """
+        by_report = {}
+        for link in links:
+            by_report.setdefault(extract_report_id(link) or link, []).append(link)
+
+        queue = asyncio.Queue()
+        for same_report in by_report.values():
+            queue.put_nowait(same_report)
+
+        results = {}
+
+        async def worker():
+            while True:
+                try:
+                    same_report = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                description = await self.fetch_description(same_report[0])
+                for link in same_report:
+                    results[link] = description
+                    if on_result is not None:
+                        on_result(link, description)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers)))
+        return results
+
+
+async def process_year(fetcher, year, data_folder=DATA_FOLDER):
+    filename = os.path.join(data_folder, f"berlin_polizei_{year}.csv")
+    if not os.path.exists(filename):
+        print(f"⏭️ Skipping missing file: {filename}")
+        return 0
+
+    print(f"\n📂 Processing {filename}...")
+
+    with open(filename, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+
+    for row in rows:
+        row.setdefault("description", "")
+        row.setdefault("en_title", "")
+        row["description"] = row["description"] or ""
+
+    # Re-apply descriptions fetched by an interrupted run
+    journal = CheckpointJournal(filename, flush_every=FLUSH_EVERY)
+    replayed = journal.replay(rows)
+
+    # Scrape only missing descriptions
+    missing = [row for row in rows if not row["description"].strip()]
+    if not missing:
+        if replayed:
+            journal.compact(rows, COLUMN_NAMES)
+        print(f"✅ No missing descriptions in {filename}.")
+        return 0
+
+    print(f"[{year}] Fetching {len(missing)}/{len(rows)} missing descriptions with {fetcher.workers} workers...")
+    try:
+        descriptions = await fetcher.fetch_many(
+            [row["link"] for row in missing],
+            on_result=lambda link, description: journal.record(link, description=description),
+        )
+    finally:
+        journal.flush()
+    for row in missing:
+        row["description"] = descriptions.get(row["link"], "")
+
+    journal.compact(rows, COLUMN_NAMES)
+    print(f"✅ Updated {filename} with new descriptions.")
+    return len(missing)
+
+
+async def main(years=YEARS, data_folder=DATA_FOLDER, **fetcher_options):
+    start = time.perf_counter()
+    async with DescriptionFetcher(**fetcher_options) as fetcher:
+        for year in years:
+            await process_year(fetcher, year, data_folder)
+    elapsed = time.perf_counter() - start
+
+    print("\n🎉 All CSVs processed.")
+    print_fetch_stats(fetcher.fetcher, elapsed)
+    if fetcher.fallback is not None:
+        print(f"🧭 Pages rendered with Selenium: {fetcher.fallback.pages_rendered}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
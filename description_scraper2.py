@@ -1,23 +1,28 @@
 import os
 import csv
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 import time
-import random
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from checkpoint_journal import CheckpointJournal
+from rate_limiter import get_limiter
+from report_normalize import NORMALIZED_COLUMNS
+from report_parsing import extract_description
+
 # === CONFIG ===
 DATA_FOLDER = "berlin_reports_yearly"  # folder where CSV files are stored
 YEARS = list(range(2014, 2026))  # adjust as needed
-COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"]
+COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"] + NORMALIZED_COLUMNS
+FLUSH_EVERY = 25  # journal scraped descriptions every N rows
 
 # === Setup headless Selenium ===
 options = Options()
 options.add_argument('--headless')
 driver = webdriver.Chrome(options=options)
+limiter = get_limiter("www.berlin.de")  # adaptive pace shared with the other berlin.de requests
 
 def scrape_description(url):
     try:
@@ -28,7 +33,10 @@ def scrape_description(url):
         # # Find all <div class="textile"> blocks
         # textile_divs = soup.select("div.textile")
 
+        limiter.acquire()
+        start = time.perf_counter()
         driver.get(url)
+        limiter.observe(time.perf_counter() - start)
 
         # Waiting for div.textile
         start_wait = time.time()
@@ -42,21 +50,7 @@ def scrape_description(url):
             wait_time = time.time() - start_wait
             print(f"⚠️ Timeout after {wait_time:.2f} seconds waiting for div.textile")
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        textile_divs = soup.select("div.textile")
-
-        for div in textile_divs:
-            parent_classes = div.find_parent().get("class", [])
-            if "text" in parent_classes and "emergency-box" not in parent_classes:
-                text = div.get_text(separator="\n", strip=True)
-
-                # Optional: skip if it's still the known generic content
-                if "Durchsuchungsbeschlüsse bei drei Polizeibeamten" in text:
-                    return "[warning_placeholder]"
-
-                return text
-
-        return ""
+        return extract_description(driver.page_source)
     except Exception as e:
         print(f"❌ Error scraping {url}: {e}")
         return ""
@@ -84,21 +78,25 @@ for year in YEARS:
             if 'description' not in row:
                 row['description'] = ""
 
+    # Re-apply descriptions scraped by an interrupted run
+    journal = CheckpointJournal(filename, flush_every=FLUSH_EVERY)
+    updated = journal.replay(rows) > 0
+
     # Scrape only missing descriptions
-    updated = False
-    for i, row in enumerate(rows):
-        if not row["description"].strip():
-            print(f"[{year}] Scraping ({i+1}/{len(rows)}): {row['title']}")
-            row["description"] = scrape_description(row["link"])
-            updated = True
-        else:
-            print(f"[{year}] Skipping ({i+1}/{len(rows)}): already has description")
+    try:
+        for i, row in enumerate(rows):
+            if not row["description"].strip():
+                print(f"[{year}] Scraping ({i+1}/{len(rows)}): {row['title']}")
+                row["description"] = scrape_description(row["link"])
+                journal.record(row["link"], description=row["description"])
+                updated = True
+            else:
+                print(f"[{year}] Skipping ({i+1}/{len(rows)}): already has description")
+    finally:
+        journal.flush()
 
     if updated:
-        with open(filename, "w", newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES)
-            writer.writeheader()
-            writer.writerows(rows)
+        journal.compact(rows, COLUMN_NAMES)
         print(f"✅ Updated {filename} with new descriptions.")
     else:
         print(f"✅ No missing descriptions in {filename}.")
@@ -0,0 +1,415 @@
+"""Dense report embeddings for "similar incidents" and a kNN category predictor.
+
+Title + description are encoded by a local multilingual sentence-transformer
+on CPU and kept in report_embeddings/:
+
+    vectors.bin     n x dim matrix, float16 (or int8 with per-row scales), memory-mapped
+    ids.npy         press-release ID of each row        links.txt   link of each row
+    years.npy       year file the row came from
+    kategorie.npy   category code of each row (report_normalize.CATEGORIES), from the classified CSVs
+    ivf.npz         optional inverted-file index (k-means centroids + row lists)
+    meta.json       model, dim, dtype and the number of valid rows
+
+Vectors are unit length, so the dot product is the cosine similarity. Search
+is a flat matrix product over the memmap in blocks (BLAS), or over the rows
+of the `nprobe` nearest IVF lists once `build-ivf` has been run. Only reports
+not in the store yet are encoded on update.
+
+    python embedding_store.py update
+    python embedding_store.py similar https://www.berlin.de/polizei/polizeimeldungen/2024/pressemitteilung.1516253.php
+    python embedding_store.py search "Radfahrer von Lkw erfasst" --k 5
+    python embedding_store.py build-ivf
+    python embedding_store.py evaluate --holdout-year 2025
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from dedup_index import extract_report_id
+from report_index import write_json_atomic
+from report_normalize import CATEGORIES, category_codes, llm_labelled
+
+# === CONFIG ===
+STORE_FOLDER = "report_embeddings"
+DATA_FOLDER = "berlin_reports_yearly"
+CLASSIFIED_FOLDER = "berlin_reports_yearly_classified"
+MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+DTYPE = "float16"          # or "int8": half the size, slightly lower recall
+THREADS = 4                # torch intra-op threads
+BATCH_SIZE = 64            # texts per forward pass (sentence-transformers sorts them by length)
+ENCODE_CHUNK = 1024        # rows encoded before they are appended to the store
+DESCRIPTION_CHARS = 800    # the model reads ~128 tokens anyway
+SEARCH_BLOCK = 65536       # rows scored per matrix product in a flat search
+KNN_K = 15
+IVF_ITERATIONS = 10
+IVF_NPROBE = 8
+
+
+def embedding_text(title, description):
+    title = title if isinstance(title, str) else ""
+    description = description if isinstance(description, str) else ""
+    return f"{title}. {description[:DESCRIPTION_CHARS]}"
+
+
+class SentenceEncoder:
+    """Local sentence-transformer on CPU; the model is loaded once per instance"""
+
+    def __init__(self, model_name=MODEL_NAME, threads=THREADS, batch_size=BATCH_SIZE):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(threads)
+        start = time.perf_counter()
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+        print(f"🧩 Loaded {model_name} in {time.perf_counter() - start:.1f}s ({threads} threads)")
+
+    def encode(self, texts):
+        """Unit-length float32 vectors, one row per text"""
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32)
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped vector matrix aligned with report IDs.
+
+    `meta.json` holds the number of valid rows and is written last, so rows
+    appended by an interrupted update are cut off again on the next open
+    (vectors.bin, links.txt and the IVF lists are all trimmed to it).
+    """
+
+    def __init__(self, folder=STORE_FOLDER, dtype=DTYPE):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.meta_path = os.path.join(folder, "meta.json")
+        self.vectors_path = os.path.join(folder, "vectors.bin")
+        self.links_path = os.path.join(folder, "links.txt")
+        self.meta = {"model": None, "dim": None, "dtype": dtype, "count": 0}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+        self.dtype = np.dtype(self.meta["dtype"])
+
+        count = self.meta["count"]
+        self.ids = self._load("ids.npy", np.empty(0, dtype=np.int64))[:count]
+        self.years = self._load("years.npy", np.empty(0, dtype=np.int16))[:count]
+        self.scales = self._load("scales.npy", np.empty(0, dtype=np.float32))[:count]
+        self.kategorie = self._load("kategorie.npy", np.empty(0, dtype=np.int8))
+        self.links = []
+        if os.path.exists(self.links_path):
+            with open(self.links_path, encoding="utf-8") as f:
+                self.links = f.read().splitlines()
+        self.row_of = {int(report_id): row for row, report_id in enumerate(self.ids)}
+        self.ivf = self._load_ivf()
+        self._vectors = None
+        self._truncate(count)
+
+    def _truncate(self, count):
+        """Cut every append-only file back to `count` rows (the tail of an interrupted add)"""
+        if os.path.exists(self.vectors_path) and self.meta["dim"]:
+            valid_bytes = count * self.meta["dim"] * self.dtype.itemsize
+            if os.path.getsize(self.vectors_path) > valid_bytes:
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(valid_bytes)
+        if len(self.links) > count:
+            self.links = self.links[:count]
+            with open(self.links_path + ".tmp", "w", encoding="utf-8") as f:
+                f.writelines(f"{link}\n" for link in self.links)
+            os.replace(self.links_path + ".tmp", self.links_path)
+        if self.ivf is not None and len(self.ivf["rows"]) and self.ivf["rows"].max() >= count:
+            keep = self.ivf["rows"] < count
+            self.ivf["rows"] = self.ivf["rows"][keep]
+            self.ivf["assign"] = self.ivf["assign"][keep]
+            self._save_ivf()
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _load(self, name, default):
+        path = os.path.join(self.folder, name)
+        return np.load(path) if os.path.exists(path) else default
+
+    def _save_array(self, name, array):
+        path = os.path.join(self.folder, name)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+    @property
+    def vectors(self):
+        """The stored matrix as a read-only memmap (float16 or int8)"""
+        if self._vectors is None or len(self._vectors) != len(self):
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r",
+                                      shape=(len(self), self.meta["dim"])) if len(self) else None
+        return self._vectors
+
+    # --- writing ---
+
+    def _quantize(self, vectors):
+        if self.dtype == np.int8:
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return vectors.astype(self.dtype), None
+
+    def add(self, report_ids, links, years, vectors, model_name=None):
+        """Append rows; `vectors` are unit-length float32"""
+        if not len(report_ids):
+            return
+        if self.meta["dim"] is None:
+            self.meta.update(model=model_name, dim=int(vectors.shape[1]))
+        elif model_name and model_name != self.meta["model"]:
+            raise ValueError(f"Store was built with {self.meta['model']}, not {model_name}")
+
+        stored, scales = self._quantize(vectors)
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(stored).tobytes())
+        with open(self.links_path, "a", encoding="utf-8") as f:
+            f.writelines(f"{link}\n" for link in links)
+
+        first = len(self)
+        self.ids = np.concatenate([self.ids, np.asarray(report_ids, dtype=np.int64)])
+        self.links.extend(links)
+        self.row_of.update((int(report_id), first + i) for i, report_id in enumerate(report_ids))
+        self.years = np.concatenate([self.years, np.asarray(years, dtype=np.int16)])
+        self._save_array("ids.npy", self.ids)
+        self._save_array("years.npy", self.years)
+        if scales is not None:
+            self.scales = np.concatenate([self.scales, scales])
+            self._save_array("scales.npy", self.scales)
+        if self.ivf is not None:
+            self._ivf_assign(vectors, first)
+
+        self.meta["count"] = len(self.ids)
+        write_json_atomic(self.meta_path, self.meta)
+
+    def update(self, encoder, data_folder=DATA_FOLDER, years=None):
+        """Encode and append every report of the yearly files (or the given years) that is not stored yet"""
+        frames = []
+        for path in sorted(glob.glob(os.path.join(data_folder, "berlin_polizei_*.csv"))):
+            year = int(os.path.basename(path).split("_")[2].split(".")[0])
+            if years is not None and year not in years:
+                continue
+            df = pd.read_csv(path, usecols=["title", "link", "description"], dtype="string", keep_default_na=False)
+            df["year"] = year
+            frames.append(df)
+        if not frames:
+            return 0
+        df = pd.concat(frames, ignore_index=True)
+        df["report_id"] = df["link"].map(extract_report_id)
+        df = df.dropna(subset=["report_id"]).drop_duplicates("report_id", keep="last")
+        df = df[~df["report_id"].isin(self.row_of)]
+        if df.empty:
+            return 0
+
+        print(f"🧠 Encoding {len(df)} new reports...")
+        start = time.perf_counter()
+        for begin in range(0, len(df), ENCODE_CHUNK):
+            chunk = df.iloc[begin:begin + ENCODE_CHUNK]
+            vectors = encoder.encode([embedding_text(t, d) for t, d in zip(chunk["title"], chunk["description"])])
+            self.add(chunk["report_id"].astype(np.int64).tolist(), chunk["link"].tolist(), chunk["year"].tolist(),
+                     vectors, encoder.model_name)
+            done = begin + len(chunk)
+            print(f"   {done}/{len(df)} ({done / (time.perf_counter() - start):.0f} reports/s)")
+        return len(df)
+
+    def refresh_labels(self, classified_folder=CLASSIFIED_FOLDER):
+        """Category code of every stored row from the LLM labels of the classified CSVs (0 = none yet)"""
+        labels = {}
+        for path in sorted(glob.glob(os.path.join(classified_folder, "berlin_polizei_*_classified.csv"))):
+            df = llm_labelled(pd.read_csv(path, usecols=lambda c: c in ("link", "kategorie", "kategorie_tier"),
+                                          dtype="string", keep_default_na=False))
+            labels.update(zip(df["link"].map(extract_report_id), category_codes(df["kategorie"])))
+        self.kategorie = np.array([labels.get(int(report_id), 0) for report_id in self.ids], dtype=np.int8)
+        self._save_array("kategorie.npy", self.kategorie)
+
+    # --- search ---
+
+    def _block(self, rows):
+        """Stored rows (slice or index array) as float32"""
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        return block * self.scales[rows, None] if self.dtype == np.int8 else block
+
+    def vector(self, row):
+        return self._block(slice(row, row + 1))[0]
+
+    def _scores(self, query, rows=None):
+        """Dot products of `query` with all rows (or the given sorted row indices), in blocks"""
+        if rows is not None:
+            return self._block(rows) @ query
+        scores = np.empty(len(self), dtype=np.float32)
+        for begin in range(0, len(self), SEARCH_BLOCK):
+            block = self._block(slice(begin, begin + SEARCH_BLOCK))
+            scores[begin:begin + len(block)] = block @ query
+        return scores
+
+    def search(self, query, k=10, exclude=None, nprobe=None):
+        """(rows, scores) of the k nearest stored vectors, best first; IVF is used if built (nprobe > 0)"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = IVF_NPROBE if nprobe is None else nprobe
+        if self.ivf is not None and nprobe > 0:
+            lists = np.argsort(self.ivf["centroids"] @ query)[::-1][:nprobe]
+            rows = np.sort(np.concatenate([self.ivf["rows"][self.ivf["assign"] == i] for i in lists]))
+            scores = self._scores(query, rows)
+        else:
+            rows = np.arange(len(self))
+            scores = self._scores(query)
+        if exclude is not None:
+            scores = np.where(rows == exclude, -np.inf, scores)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def neighbours(self, query, k=10, exclude=None, nprobe=None):
+        rows, scores = self.search(query, k, exclude, nprobe)
+        return [{"link": self.links[row], "score": float(score), "kategorie": self.category(row)}
+                for row, score in zip(rows, scores)]
+
+    def category(self, row):
+        code = int(self.kategorie[row]) if row < len(self.kategorie) else 0
+        return CATEGORIES[code] if code else None
+
+    def similar(self, link_or_id, k=10, nprobe=None):
+        """Top-k stored reports most similar to a stored report"""
+        report_id = link_or_id if isinstance(link_or_id, int) else extract_report_id(link_or_id)
+        row = self.row_of.get(report_id)
+        if row is None:
+            raise KeyError(f"{link_or_id} is not in the embedding store")
+        return self.neighbours(self.vector(row), k, exclude=row, nprobe=nprobe)
+
+    def predict(self, query, k=KNN_K, exclude=None, nprobe=None):
+        """(kategorie, share of the similarity-weighted vote) from the k nearest classified reports"""
+        rows, scores = self.search(query, k, exclude, nprobe)
+        votes = Counter()
+        for row, score in zip(rows, scores):
+            if self.category(row):
+                votes[self.category(row)] += max(float(score), 0.0)
+        if not votes:
+            return None, 0.0
+        category, weight = votes.most_common(1)[0]
+        return category, weight / sum(votes.values())
+
+    # --- IVF ---
+
+    def _ivf_path(self):
+        return os.path.join(self.folder, "ivf.npz")
+
+    def _load_ivf(self):
+        if not os.path.exists(self._ivf_path()):
+            return None
+        with np.load(self._ivf_path()) as data:
+            return {name: data[name] for name in ("centroids", "rows", "assign")}
+
+    def _ivf_assign(self, vectors, first):
+        assign = np.argmax(vectors @ self.ivf["centroids"].T, axis=1)
+        self.ivf["rows"] = np.concatenate([self.ivf["rows"], np.arange(first, first + len(vectors))])
+        self.ivf["assign"] = np.concatenate([self.ivf["assign"], assign])
+        self._save_ivf()
+
+    def _save_ivf(self):
+        with open(self._ivf_path() + ".tmp", "wb") as f:
+            np.savez(f, **self.ivf)
+        os.replace(self._ivf_path() + ".tmp", self._ivf_path())
+
+    def build_ivf(self, n_lists=None, iterations=IVF_ITERATIONS, seed=0):
+        """Spherical k-means over all rows (sqrt(n) lists by default); returns the number of lists (0 if empty)"""
+        if not len(self):
+            return 0
+        data = np.vstack([self._block(slice(begin, begin + SEARCH_BLOCK))
+                          for begin in range(0, len(self), SEARCH_BLOCK)])
+        n_lists = n_lists or max(1, int(np.sqrt(len(data))))
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(len(data), n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = data[rng.choice(len(data), empty.sum(), replace=False)]
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        assign = np.argmax(data @ centroids.T, axis=1)
+        self.ivf = {"centroids": centroids.astype(np.float32), "rows": np.arange(len(data)), "assign": assign}
+        self._save_ivf()
+        return n_lists
+
+
+def evaluate(store, holdout_year, k=KNN_K):
+    """kNN categories of one year's reports, voting only with other years, against the LLM labels"""
+    test_rows = np.flatnonzero((store.years == holdout_year) & (store.kategorie > 0))
+    if not len(test_rows):
+        print(f"⚠️ No classified {holdout_year} reports in the store")
+        return
+    train = store.kategorie.copy()
+    store.kategorie = np.where(store.years == holdout_year, 0, train).astype(np.int8)  # hide the held-out labels
+
+    start = time.perf_counter()
+    predictions = [store.predict(store.vector(row), k, exclude=row)[0] for row in test_rows]
+    elapsed = time.perf_counter() - start
+    store.kategorie = train
+
+    labels = [CATEGORIES[code] for code in train[test_rows]]
+    agreement = np.mean([p == label for p, label in zip(predictions, labels)])
+    print(f"\n📊 kNN (k={k}) on {len(test_rows)} reports of {holdout_year}:")
+    print("=" * 60)
+    print(f"Agreement with LLM labels: {agreement:.1%}")
+    print(f"Per prediction:            {elapsed / len(test_rows) * 1000:.2f} ms")
+    print("=" * 60)
+
+
+def print_neighbours(results, elapsed):
+    for result in results:
+        print(f"{result['score']:.3f}  {result['kategorie'] or '-':<20} {result['link']}")
+    print(f"\n⏱️ {len(results)} neighbours in {elapsed * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report embeddings: similar incidents and kNN categories")
+    parser.add_argument("command", choices=["update", "similar", "search", "build-ivf", "evaluate"])
+    parser.add_argument("query", nargs="?", help="report link / ID (similar) or text (search)")
+    parser.add_argument("--store", default=STORE_FOLDER)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, help="IVF lists to scan (0 = flat search)")
+    parser.add_argument("--lists", type=int, help="IVF lists (default sqrt(n))")
+    parser.add_argument("--holdout-year", type=int)
+    args = parser.parse_args()
+    if args.command in ("similar", "search") and not args.query:
+        parser.error(f"{args.command} needs a query")
+
+    store = EmbeddingStore(args.store)
+    if not len(store) and args.command != "update":
+        print(f"⚠️ {args.store} is empty; run `python embedding_store.py update` first")
+        return
+    if args.command == "update":
+        added = store.update(SentenceEncoder(store.meta["model"] or MODEL_NAME))
+        store.refresh_labels()
+        print(f"✅ {added} reports encoded, {len(store)} in {args.store} ({store.dtype})")
+    elif args.command == "build-ivf":
+        start = time.perf_counter()
+        n_lists = store.build_ivf(args.lists)
+        print(f"✅ IVF with {n_lists} lists over {len(store)} rows in {time.perf_counter() - start:.1f}s")
+    elif args.command == "similar":
+        start = time.perf_counter()
+        query = int(args.query) if args.query.isdigit() else args.query
+        print_neighbours(store.similar(query, args.k, args.nprobe), time.perf_counter() - start)
+    elif args.command == "search":
+        encoder = SentenceEncoder(store.meta["model"] or MODEL_NAME)
+        start = time.perf_counter()
+        query = encoder.encode([args.query])[0]
+        print_neighbours(store.neighbours(query, args.k, nprobe=args.nprobe), time.perf_counter() - start)
+    else:
+        evaluate(store, args.holdout_year or int(store.years.max()), args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Fast local classifier trained on the categories the LLM already assigned.
+
+TF-IDF (word 1-2 grams of title + description) and a multinomial logistic
+regression, fitted on the `kategorie` column of the classified CSVs. Rows it
+is unsure about (probability below the threshold) go to a fallback classifier,
+normally OllamaPoliceClassifier.
+
+    python fast_classifier.py train                      # fit on all years, save fast_classifier.joblib
+    python fast_classifier.py evaluate --holdout-year 2025
+"""
+import argparse
+import glob
+import math
+import os
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from report_normalize import llm_labelled
+
+# ---- CONFIG ----
+CLASSIFIED_FOLDER = "berlin_reports_yearly_classified"
+MODEL_FILE = "fast_classifier.joblib"
+CONFIDENCE_THRESHOLD = 0.8   # below this the row is sent to the fallback (LLM)
+DESCRIPTION_CHARS = 800      # same truncation as the LLM prompt
+MAX_FEATURES = 200_000
+
+
+def training_text(title, description):
+    """Title counted twice: it carries most of the signal"""
+    title = title if isinstance(title, str) else ""
+    description = description if isinstance(description, str) else ""
+    return f"{title} | {title} | {description[:DESCRIPTION_CHARS]}"
+
+
+def load_labels(folder=CLASSIFIED_FOLDER, years=None):
+    """Rows the LLM classified, plus a `year` column taken from the file name.
+
+    Rows decided by the rules or fast tiers of the cascade (`kategorie_tier`) are
+    left out, so the fast model never trains or gets evaluated on its own output.
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(folder, "berlin_polizei_*_classified.csv"))):
+        year = int(os.path.basename(path).split("_")[2])
+        if years is not None and year not in years:
+            continue
+        df = llm_labelled(pd.read_csv(path, usecols=lambda c: c in ("title", "description", "kategorie",
+                                                                     "kategorie_tier")))
+        df = df.drop(columns="kategorie_tier", errors="ignore")
+        df["year"] = year
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    return df[df["kategorie"].notna() & (df["kategorie"].astype(str).str.strip() != "")]
+
+
+class FastPoliceClassifier:
+    """TF-IDF + logistic regression with the same classify_event interface as OllamaPoliceClassifier.
+
+    Single rows are scored without going through sklearn: tokens are looked
+    up in the vocabulary and multiplied with the coefficient rows directly,
+    which gives the same probabilities in a fraction of the time.
+    """
+
+    def __init__(self, vectorizer, model, threshold=CONFIDENCE_THRESHOLD, fallback=None):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.threshold = threshold
+        self.fallback = fallback
+        self.cache = getattr(fallback, "cache", None)
+        self.classes = list(model.classes_)
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_
+        self.idf = vectorizer.idf_.astype(np.float32)
+        self.weights = np.ascontiguousarray(model.coef_.T, dtype=np.float32)  # features x classes
+        self.intercept = model.intercept_.astype(np.float32)
+        self.fast_decisions = 0
+        self.fallback_decisions = 0
+
+    @classmethod
+    def train(cls, df, **options):
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True, max_features=MAX_FEATURES)
+        X = vectorizer.fit_transform([training_text(t, d) for t, d in zip(df["title"], df["description"])])
+        model = LogisticRegression(C=10, max_iter=2000)
+        model.fit(X, df["kategorie"].astype(str))
+        return cls(vectorizer, model, **options)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE, **options):
+        data = joblib.load(path)
+        return cls(data["vectorizer"], data["model"], **options)
+
+    def save(self, path=MODEL_FILE):
+        joblib.dump({"vectorizer": self.vectorizer, "model": self.model}, path)
+
+    def predict(self, title, description):
+        """Return (category, probability) for one report"""
+        counts = Counter(self.analyzer(training_text(title, description)))
+        indices, values = [], []
+        for term, count in counts.items():
+            index = self.vocabulary.get(term)
+            if index is not None:
+                indices.append(index)
+                values.append(1.0 + math.log(count))
+        if indices:
+            values = np.array(values, dtype=np.float32) * self.idf[indices]
+            values /= np.linalg.norm(values)
+            scores = values @ self.weights[indices] + self.intercept
+        else:
+            scores = self.intercept.copy()
+        scores = np.exp(scores - scores.max())
+        best = int(scores.argmax())
+        return self.classes[best], float(scores[best] / scores.sum())
+
+    def predict_many(self, rows):
+        """Batch version of predict: (categories, probabilities) arrays"""
+        texts = [training_text(*self._title_description(row)) for row in rows]
+        if not texts:
+            return np.array([], dtype=object), np.array([])
+        probabilities = self.model.predict_proba(self.vectorizer.transform(texts))
+        best = probabilities.argmax(axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(texts)), best]
+
+    @staticmethod
+    def _title_description(row):
+        if isinstance(row, dict):
+            return row.get("title"), row.get("description")
+        return row
+
+    def classify_event(self, title, description):
+        category, confidence = self.predict(title, description)
+        if confidence >= self.threshold or self.fallback is None:
+            self.fast_decisions += 1
+            return category
+        self.fallback_decisions += 1
+        return self.fallback.classify_event(title, description)
+
+    async def aclassify_event(self, title, description, client=None):
+        category, confidence = self.predict(title, description)
+        if confidence >= self.threshold or self.fallback is None:
+            self.fast_decisions += 1
+            return category
+        self.fallback_decisions += 1
+        return await self.fallback.aclassify_event(title, description, client)
+
+    def classify_many(self, rows, concurrency=None):
+        """Generator of categories in input order; only low-confidence rows reach the fallback"""
+        rows = list(rows)
+        categories, confidences = self.predict_many(rows)
+        unsure = [i for i, confidence in enumerate(confidences)
+                  if confidence < self.threshold and self.fallback is not None]
+        from_fallback = iter(self.fallback.classify_many([rows[i] for i in unsure], concurrency)) if unsure else None
+        unsure = set(unsure)
+
+        for i, category in enumerate(categories):
+            if i in unsure:
+                self.fallback_decisions += 1
+                yield next(from_fallback)
+            else:
+                self.fast_decisions += 1
+                yield str(category)
+
+    def report(self):
+        total = self.fast_decisions + self.fallback_decisions
+        share = self.fallback_decisions / total if total else 0.0
+        print(f"⚡ Fast classifier: {self.fast_decisions} rows decided locally, "
+              f"{self.fallback_decisions} sent to the LLM ({share:.1%})")
+        if self.cache is not None:
+            self.cache.report()
+
+
+def evaluate(classifier, df):
+    """Agreement with the LLM labels, share of rows that would go to the LLM, and speed"""
+    rows = list(zip(df["title"], df["description"]))
+    labels = df["kategorie"].astype(str).to_numpy()
+
+    start = time.perf_counter()
+    categories, confidences = classifier.predict_many(rows)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [classifier.predict(title, description)[0] for title, description in rows]
+    single_time = time.perf_counter() - start
+
+    confident = confidences >= classifier.threshold
+    print(f"\n📊 EVALUATION on {len(rows)} rows:")
+    print("=" * 60)
+    print(f"Agreement with LLM (all rows):       {np.mean(categories == labels):.1%}")
+    print(f"Agreement with LLM (confident rows): {np.mean(categories[confident] == labels[confident]):.1%}")
+    print(f"Rows decided locally (>= {classifier.threshold}):   {confident.mean():.1%}")
+    print(f"Rows sent to the LLM:                {1 - confident.mean():.1%}")
+    print(f"Single-row path = batch path:        {np.mean(np.array(single) == categories):.1%}")
+    print(f"Batch:  {len(rows) / batch_time:,.0f} rows/s")
+    print(f"Single: {len(rows) / single_time:,.0f} rows/s ({single_time / len(rows) * 1e6:.0f} µs per report)")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train / evaluate the fast local classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--folder", default=CLASSIFIED_FOLDER)
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--holdout-year", type=int, help="evaluate on this year, train on the others")
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    df = load_labels(args.folder)
+    if args.command == "evaluate":
+        holdout_year = args.holdout_year or int(df["year"].max())
+        train_df, test_df = df[df["year"] != holdout_year], df[df["year"] == holdout_year]
+    else:
+        train_df, test_df = df, None
+
+    print(f"🏋️ Training on {len(train_df)} LLM-labelled rows...")
+    start = time.perf_counter()
+    classifier = FastPoliceClassifier.train(train_df, threshold=args.threshold)
+    print(f"✅ Trained in {time.perf_counter() - start:.1f}s ({len(classifier.vocabulary)} features)")
+
+    if test_df is not None:
+        print(f"🧪 Held-out year: {holdout_year}")
+        evaluate(classifier, test_df)
+    else:
+        classifier.save(args.model)
+        print(f"💾 Saved {args.model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import re
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+
+CACHE_FILE = "http_cache.sqlite"
+
+# --- TTLs per URL class (seconds) ---
+CURRENT_YEAR_LISTING_TTL = 0            # always revalidate: new reports appear on page 1
+PAST_YEAR_LISTING_TTL = 30 * 24 * 3600  # archive pages of finished years barely change
+DETAIL_PAGE_TTL = 365 * 24 * 3600       # published press releases are effectively immutable
+DEFAULT_TTL = 3600
+
+LISTING_PATTERN = re.compile(r"/archiv/(\d{4})/")
+DETAIL_PATTERN = re.compile(r"pressemitteilung\.\d+\.php")
+
+
+def ttl_for(url, now=None):
+    """Freshness lifetime for a URL, by URL class"""
+    listing = LISTING_PATTERN.search(url)
+    if listing:
+        current_year = (now or datetime.now()).year
+        return CURRENT_YEAR_LISTING_TTL if int(listing.group(1)) >= current_year else PAST_YEAR_LISTING_TTL
+    if DETAIL_PATTERN.search(url):
+        return DETAIL_PAGE_TTL
+    return DEFAULT_TTL
+
+
+class ResponseCache:
+    """On-disk HTTP response cache: zlib-compressed bodies plus ETag/Last-Modified validators.
+
+    Fresh entries (younger than their URL class TTL) are served without any
+    request; stale ones are revalidated with a conditional GET. Counters track
+    hits, revalidations (304), misses and the body bytes not downloaded.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=ttl_for):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, url):
+        """Return (body, fresh, validators) or None if the URL was never cached"""
+        row = self.conn.execute(
+            "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        fresh = time.time() - fetched_at < self.ttl(url)
+        validators = {}
+        if etag:
+            validators["If-None-Match"] = etag
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        return zlib.decompress(body).decode("utf-8"), fresh, validators
+
+    def store(self, url, text, headers):
+        data = text.encode("utf-8")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (url, body, size, etag, last_modified, fetched_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (url, zlib.compress(data, 6), len(data), headers.get("ETag"), headers.get("Last-Modified"), time.time()),
+        )
+        self.conn.commit()
+        self.misses += 1
+
+    def record_hit(self, text):
+        self.hits += 1
+        self.bytes_saved += len(text.encode("utf-8"))
+
+    def record_not_modified(self, url, text):
+        """A 304 answer: keep the body, restart its TTL"""
+        self.conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        self.conn.commit()
+        self.revalidated += 1
+        self.bytes_saved += len(text.encode("utf-8"))
+
+    def report(self):
+        print(f"💾 HTTP cache: {self.hits} fresh hits, {self.revalidated} revalidated (304), "
+              f"{self.misses} downloaded, {self.bytes_saved / 1e6:.2f} MB saved")
+
+    def close(self):
+        self.conn.close()
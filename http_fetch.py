@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import aiohttp
+from yarl import URL
+
+from http_cache import ResponseCache
+from rate_limiter import HostLimiter
+
+USER_AGENT = "Mozilla/5.0 (Berlin-Polizei-reports)"
+
+
+class AsyncFetcher:
+    """Shared aiohttp session with pooled keep-alive connections, a per-host
+    limiter and retries with exponential backoff on 429/5xx/network errors.
+
+    `rate` is where each host's adaptive limit starts; it climbs while responses
+    are healthy (up to `max_rate` or the host's budget) and is cut on 429/5xx
+    and timeouts.
+
+    With a `cache` (ResponseCache or path to one) fresh responses are served
+    from disk and stale ones are revalidated with a conditional GET.
+    Latency of every network request is kept in `latencies` (seconds).
+    """
+
+    def __init__(self, max_in_flight=4, rate=4.0, burst=None, max_retries=3,
+                 timeout=30, backoff=1.0, cache=None, max_rate=None):
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.latencies = []
+        self.failures = 0
+        self.session = None
+        self.limiters = {}
+        self._owns_cache = isinstance(cache, str)
+        self.cache = ResponseCache(cache) if self._owns_cache else cache
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_in_flight, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        if self._owns_cache:
+            self.cache.close()
+        return False
+
+    @property
+    def pages_fetched(self):
+        return len(self.latencies)
+
+    def limiter_for(self, url):
+        host = URL(url).host
+        if host not in self.limiters:
+            self.limiters[host] = HostLimiter(self.max_in_flight, self.rate, self.burst, host, self.max_rate)
+        return self.limiters[host]
+
+    async def fetch(self, url):
+        """GET a page as text, retrying transient errors with exponential backoff"""
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        if cached is not None:
+            text, fresh, validators = cached
+            if fresh:
+                self.cache.record_hit(text)
+                return text
+        else:
+            validators = {}
+
+        limiter = self.limiter_for(url)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with limiter:
+                    start = time.perf_counter()
+                    async with self.session.get(url, headers=validators) as response:
+                        if response.status == 429 or response.status >= 500:
+                            limiter.bucket.throttled(retry_after(response.headers))
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history,
+                                status=response.status, message=response.reason)
+                        if response.status == 304 and cached is not None:
+                            html = None
+                        else:
+                            response.raise_for_status()
+                            html = await response.text()
+                        headers = response.headers
+                    self.latencies.append(time.perf_counter() - start)
+                    limiter.bucket.observe(self.latencies[-1])
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    limiter.bucket.throttled()
+                if attempt == self.max_retries or getattr(e, "status", 500) < 429:
+                    self.failures += 1
+                    limiter.bucket.failed()
+                    raise
+                delay = self.backoff * 2 ** attempt
+                print(f"⚠️ {url} failed ({e}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+        if self.cache is not None:
+            if html is None:
+                html = cached[0]
+                self.cache.record_not_modified(url, html)
+            else:
+                self.cache.store(url, html, headers)
+        return html
+
+
+def retry_after(headers):
+    """Seconds from a Retry-After header (the HTTP-date form is ignored)"""
+    value = headers.get("Retry-After", "")
+    return float(value) if value.strip().isdigit() else None
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (q in 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def print_fetch_stats(fetcher, elapsed, label="pages"):
+    """Print throughput and p50/p95 latency of a finished run"""
+    count = fetcher.pages_fetched
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"📈 {count} {label} in {elapsed:.1f}s ({rate:.2f} {label}/s), "
+          f"p50 {percentile(fetcher.latencies, 50) * 1000:.0f} ms, "
+          f"p95 {percentile(fetcher.latencies, 95) * 1000:.0f} ms, "
+          f"{fetcher.failures} failed")
+    for host, limiter in fetcher.limiters.items():
+        state = limiter.bucket.snapshot()
+        print(f"🚦 {host}: rate {state['rate']:.2f}/s (peak {state['peak_rate']:.2f}), "
+              f"{state['throttled']} throttled, {state['slowdowns']} slowdowns")
+    if fetcher.cache is not None:
+        fetcher.cache.report()
@@ -0,0 +1,301 @@
+"""Near-duplicate reports (follow-ups, corrections, re-published texts) via MinHash + LSH.
+
+Each description is cut into word 3-shingles (folded like the search index)
+and summarized by a 128-value MinHash signature. The signature is split into
+32 bands of 4 values; reports sharing a band bucket are candidates, and
+candidates whose signatures agree on >= SIMILARITY of the values (estimated
+Jaccard similarity) are stored as a pair. Checking a new report costs 32
+indexed lookups instead of a comparison with every description.
+
+Pairs are joined into clusters (union-find); a cluster is named after its
+oldest report (lowest press-release ID). Everything lives in
+near_duplicates.sqlite; only new reports or changed descriptions are
+(re)processed on update.
+
+    python near_duplicates.py update              # index new / changed descriptions
+    python near_duplicates.py clusters [--limit 20]
+
+    from near_duplicates import NearDuplicateIndex
+    with NearDuplicateIndex() as index:
+        df["duplicate_of"] = index.duplicate_of(df["link"])
+"""
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from dedup_index import extract_report_id
+from search_index import fold
+
+# === CONFIG ===
+INDEX_FILE = "near_duplicates.sqlite"
+DATA_FOLDER = "berlin_reports_yearly"
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+# 32 bands x 4 rows: LSH threshold (1/32)^(1/4) ~ 0.42, a pair at 0.7 Jaccard is a candidate with
+# probability 1 - (1 - 0.7^4)^32 > 99.9% (16 x 8 put the threshold at ~0.71 and found a 0.7 pair 61% of the time)
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY = 0.7           # estimated Jaccard similarity for a stored pair
+MIN_SHINGLES = 5           # shorter descriptions are not indexed
+CHUNK_SHINGLES = 20_000    # shingles hashed at once (x 128 permutations x 8 bytes)
+SEED = 20250910
+
+WORD = re.compile(r"\w+")
+
+_rng = np.random.default_rng(SEED)
+# Multiply-add-shift hashing of 32-bit keys: (a*h + b mod 2^64) >> 32, one (a, b) per permutation
+PERM_A = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+PERM_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) << np.uint64(1)
+SHINGLE_MIX = _rng.integers(0, 1 << 63, SHINGLE_WORDS, dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+BAND_MIX = _rng.integers(0, 1 << 63, ROWS_PER_BAND, dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+
+
+def shingles(texts):
+    """(document index, 32-bit shingle hash) arrays with each document's distinct word 3-grams"""
+    docs = [WORD.findall(fold(text)) for text in texts]
+    lengths = np.array([len(words) for words in docs], dtype=np.int64)
+    words = np.array([word for words in docs for word in words], dtype=object)
+    ids = pd.util.hash_array(words) >> np.uint64(32) if len(words) else np.empty(0, dtype=np.uint64)
+
+    counts = np.maximum(lengths - SHINGLE_WORDS + 1, 0)
+    first = np.repeat(np.cumsum(lengths) - lengths, counts)  # first word of each shingle
+    first += np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    grams = sum(ids[first + i] * SHINGLE_MIX[i] for i in range(SHINGLE_WORDS)) >> np.uint64(32)
+    doc = np.repeat(np.arange(len(docs), dtype=np.uint64), counts)
+    keys = np.sort(doc << np.uint64(32) | grams)
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    return (keys >> np.uint64(32)).astype(np.int64), keys & np.uint64(0xFFFFFFFF)
+
+
+def signatures(texts):
+    """MinHash signatures (128 uint32) of many descriptions; None for ones with < MIN_SHINGLES shingles"""
+    doc, grams = shingles(texts)
+    counts = np.bincount(doc, minlength=len(texts))
+    keep = counts[doc] >= MIN_SHINGLES
+    doc, grams = doc[keep], grams[keep]
+    docs = np.flatnonzero(counts >= MIN_SHINGLES)
+    starts = np.cumsum(counts[docs]) - counts[docs]
+
+    result = [None] * len(texts)
+    i = 0
+    while i < len(docs):
+        # Whole documents per chunk, about CHUNK_SHINGLES shingles
+        j = max(int(np.searchsorted(starts, starts[i] + CHUNK_SHINGLES, side="right")), i + 1)
+        end = starts[j] if j < len(docs) else len(grams)
+        values = (PERM_A[:, None] * grams[starts[i]:end] + PERM_B[:, None]) >> np.uint64(32)
+        minima = np.minimum.reduceat(values, starts[i:j] - starts[i], axis=1).T.astype(np.uint32)
+        for index, row in zip(docs[i:j], minima):
+            result[index] = row
+        i = j
+    return result
+
+
+def signature(text):
+    """MinHash signature of one description, or None if it is too short"""
+    return signatures([text])[0]
+
+
+def band_keys(signatures):
+    """(n, 128) signatures -> (n, BANDS) int64 bucket keys, one per band"""
+    bands = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND).astype(np.uint64)
+    return (bands * BAND_MIX).sum(axis=2).view(np.int64)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity: share of equal MinHash values"""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """Signatures, LSH buckets, similar pairs and cluster tags in one SQLite file"""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                report_id INTEGER PRIMARY KEY, year INTEGER, link TEXT, text_crc INTEGER, signature BLOB);
+            CREATE TABLE IF NOT EXISTS buckets (band INTEGER, bucket INTEGER, report_id INTEGER);
+            CREATE INDEX IF NOT EXISTS buckets_key ON buckets (band, bucket);
+            CREATE INDEX IF NOT EXISTS buckets_report ON buckets (report_id);
+            CREATE TABLE IF NOT EXISTS pairs (
+                report_id INTEGER, other_id INTEGER, similarity REAL, PRIMARY KEY (report_id, other_id));
+            CREATE INDEX IF NOT EXISTS pairs_other ON pairs (other_id);
+            CREATE TABLE IF NOT EXISTS clusters (report_id INTEGER PRIMARY KEY, cluster_id INTEGER);
+        """)
+        # user_version holds the band layout; buckets of another layout never match, so start over
+        layout = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if layout != BANDS:
+            if layout or len(self):
+                print(f"🧬 Band layout changed ({layout or 16} -> {BANDS} bands), re-indexing every description")
+                self.conn.executescript("DELETE FROM signatures; DELETE FROM buckets; DELETE FROM pairs;"
+                                        " DELETE FROM clusters;")
+            self.conn.execute(f"PRAGMA user_version = {BANDS}")
+            self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    # --- lookups ---
+
+    def candidates(self, keys):
+        """{report_id: signature} of reports sharing at least one band bucket with the BANDS `keys`"""
+        rows = self.conn.execute(
+            "SELECT report_id, signature FROM signatures WHERE report_id IN (SELECT report_id FROM buckets WHERE "
+            + " OR ".join(["(band = ? AND bucket = ?)"] * BANDS) + ")",
+            [value for band, key in enumerate(keys) for value in (band, int(key))])
+        return {report_id: np.frombuffer(blob, dtype=np.uint32) for report_id, blob in rows}
+
+    def query(self, text, exclude=None):
+        """[(report_id, similarity)] of indexed reports similar to `text`, most similar first"""
+        sig = signature(text)
+        if sig is None:
+            return []
+        return self._similar(sig, band_keys(sig[None, :])[0], exclude)
+
+    def _similar(self, sig, keys, exclude=None):
+        matches = []
+        for report_id, other in self.candidates(keys).items():
+            if report_id == exclude:
+                continue
+            score = similarity(sig, other)
+            if score >= SIMILARITY:
+                matches.append((report_id, score))
+        return sorted(matches, key=lambda match: -match[1])
+
+    # --- indexing ---
+
+    def _forget(self, report_ids):
+        params = [(report_id,) for report_id in report_ids]
+        self.conn.executemany("DELETE FROM buckets WHERE report_id = ?", params)
+        self.conn.executemany("DELETE FROM pairs WHERE report_id = ? ", params)
+        self.conn.executemany("DELETE FROM pairs WHERE other_id = ?", params)
+
+    def add_reports(self, df, year):
+        """Index rows whose report is new or whose description changed; returns how many"""
+        latest = {}  # a report listed twice: the last copy counts
+        for link, description in zip(df["link"], df["description"]):
+            report_id = extract_report_id(link)
+            if report_id is not None:
+                latest[report_id] = (link, zlib.crc32((description or "").encode("utf-8")), description)
+        known = dict(self.conn.execute("SELECT report_id, text_crc FROM signatures WHERE year = ?", (year,)))
+        todo = {report_id: entry for report_id, entry in latest.items() if known.get(report_id) != entry[1]}
+        if not todo:
+            return 0
+
+        self._forget(todo)
+        sigs = signatures([description for _, _, description in todo.values()])
+        entries = [(report_id, link, crc, sig) for (report_id, (link, crc, _)), sig in zip(todo.items(), sigs)]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO signatures (report_id, year, link, text_crc, signature) VALUES (?, ?, ?, ?, ?)",
+            [(report_id, year, link, crc, sig.tobytes() if sig is not None else None)
+             for report_id, link, crc, sig in entries])
+
+        entries = [(report_id, sig) for report_id, _, _, sig in entries if sig is not None]
+        if entries:
+            keys = band_keys(np.stack([sig for _, sig in entries]))
+            # Insert bucket rows first: reports in the same batch find each other
+            self.conn.executemany(
+                "INSERT INTO buckets (band, bucket, report_id) VALUES (?, ?, ?)",
+                [(band, int(key), report_id) for (report_id, _), row in zip(entries, keys)
+                 for band, key in enumerate(row)])
+            pairs = [(min(report_id, other), max(report_id, other), score)
+                     for (report_id, sig), row in zip(entries, keys)
+                     for other, score in self._similar(sig, row, exclude=report_id)]
+            self.conn.executemany("INSERT OR REPLACE INTO pairs (report_id, other_id, similarity) VALUES (?, ?, ?)",
+                                  pairs)
+        self.conn.commit()
+        return len(todo)
+
+    def update_clusters(self):
+        """Union-find over all pairs; every member is tagged with the lowest report ID of its cluster"""
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in self.conn.execute("SELECT report_id, other_id FROM pairs"):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        self.conn.execute("DELETE FROM clusters")
+        self.conn.executemany("INSERT INTO clusters (report_id, cluster_id) VALUES (?, ?)",
+                              [(report_id, find(report_id)) for report_id in parent])
+        self.conn.commit()
+        return len(set(map(find, parent)))
+
+    def add_file(self, path, year):
+        df = pd.read_csv(path, usecols=["link", "description"], dtype="string", keep_default_na=False)
+        added = self.add_reports(df, year)
+        if added:
+            print(f"🧬 {path}: {added} descriptions (re)indexed")
+        return added
+
+    def update(self, data_folder=DATA_FOLDER):
+        """Index new / changed descriptions of all yearly files and re-tag the clusters"""
+        processed = 0
+        for path in sorted(glob.glob(os.path.join(data_folder, "berlin_polizei_*.csv"))):
+            processed += self.add_file(path, int(os.path.basename(path).split("_")[2].split(".")[0]))
+        clusters = self.update_clusters()
+        return processed, clusters
+
+    # --- tags ---
+
+    def duplicate_of(self, links):
+        """For each link: the report ID of its cluster's oldest report, or None if it has no near-duplicate"""
+        tags = dict(self.conn.execute("SELECT report_id, cluster_id FROM clusters"))
+        return [tags.get(extract_report_id(link)) for link in links]
+
+    def clusters(self, min_size=2):
+        """{cluster_id: [links]} ordered by cluster size"""
+        members = {}
+        for cluster_id, link in self.conn.execute(
+                "SELECT c.cluster_id, s.link FROM clusters c JOIN signatures s USING (report_id) ORDER BY c.report_id"):
+            members.setdefault(cluster_id, []).append(link)
+        return dict(sorted(((k, v) for k, v in members.items() if len(v) >= min_size), key=lambda kv: -len(kv[1])))
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH near-duplicate detection over report descriptions")
+    parser.add_argument("command", choices=["update", "clusters"])
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--limit", type=int, default=20, help="clusters to print")
+    args = parser.parse_args()
+
+    with NearDuplicateIndex(args.index) as index:
+        if args.command == "update":
+            processed, clusters = index.update(args.data_folder)
+            print(f"✅ {processed} descriptions processed, {len(index)} indexed, {clusters} duplicate clusters")
+            return
+
+        clusters = index.clusters()
+        print(f"🧬 {len(clusters)} clusters, {sum(map(len, clusters.values()))} reports")
+        for cluster_id, links in list(clusters.items())[:args.limit]:
+            print(f"\n[{cluster_id}] {len(links)} reports")
+            for link in links:
+                print(f"   {link}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,22 @@
 import os
 import pandas as pd
+from cascade_classifier import CascadeClassifier
+from fast_classifier import FastPoliceClassifier
 from ollama_classifier import OllamaPoliceClassifier  # classifier module
+from report_normalize import normalize_frame
 from tqdm import tqdm
-import time
 
 # Folder containing yearly CSVs
 DATA_FOLDER = "berlin_reports_yearly"
 OUTPUT_FOLDER = "berlin_reports_yearly_classified"
-
-# Make sure output folder exists
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-
-# Initialize classifier
-classifier = OllamaPoliceClassifier(model_name="llama3.1:8b")
+CONCURRENCY = 4  # requests kept open against the Ollama server (match OLLAMA_NUM_PARALLEL)
+CACHE_FILE = "classification_cache.sqlite"  # reused across runs and input folders
+YEARS = list(range(2014, 2026))  # adjust end year if needed
+MODEL_NAME = "llama3.1:8b"
+STRUCTURED_OUTPUT = False  # constrain answers to the category labels via a JSON schema (short system-message prompt)
+# Rows are classified by keyword rules first, then by the fast model trained with
+# `python fast_classifier.py train` (if present); only what is left goes to the LLM
+FAST_MODEL_FILE = "fast_classifier.joblib"
 
 
 def needs_classification(value):
@@ -51,38 +55,40 @@ def needs_classification(value):
     return True  # Only classify if truly empty
 
 
-# Iterate over years starting from 2014
-for year in range(2014, 2026):  # adjust end year if needed
-    input_file = os.path.join(DATA_FOLDER, f"berlin_polizei_{year}.csv")
-    output_file = os.path.join(OUTPUT_FOLDER, f"berlin_polizei_{year}_classified.csv")
+def classify_year(classifier, year, data_folder=DATA_FOLDER, output_folder=OUTPUT_FOLDER):
+    """Classify rows of one yearly CSV without a category; returns the number of rows classified"""
+    input_file = os.path.join(data_folder, f"berlin_polizei_{year}.csv")
+    output_file = os.path.join(output_folder, f"berlin_polizei_{year}_classified.csv")
 
     if not os.path.exists(input_file):
         print(f"⚠️ File not found: {input_file}, skipping...")
-        continue
+        return 0
 
     print(f"\n📂 Processing {year}...")
 
-    # Load CSV - try output file first if it exists
-    df = None
+    # Load the input CSV (it may have new rows, descriptions or translations since the last run)
+    try:
+        df = pd.read_csv(input_file)
+        print(f"📂 Loaded original input file")
+    except Exception as e:
+        print(f"❌ Error loading {input_file}: {e}")
+        return 0
+
+    # Keep categories from an existing output file, matched by link
     if os.path.exists(output_file):
         try:
-            df = pd.read_csv(output_file)
-            print(f"📂 Loaded existing output file")
-        except:
+            previous = pd.read_csv(output_file, usecols=lambda c: c in ("link", "kategorie", "kategorie_tier"))
+            previous = previous.drop_duplicates("link").set_index("link")
+            for column in previous.columns:
+                df[column] = df["link"].map(previous[column])
+            print(f"📂 Reused categories from existing output file")
+        except Exception:
             pass
 
-    if df is None:
-        try:
-            df = pd.read_csv(input_file)
-            print(f"📂 Loaded original input file")
-        except Exception as e:
-            print(f"❌ Error loading {input_file}: {e}")
-            continue
-
     # Ensure required columns exist
     if "title" not in df.columns or "description" not in df.columns:
         print(f"⚠️ Required columns 'title' or 'description' not found in {input_file}")
-        continue
+        return 0
 
     # Add kategorie column if it doesn't exist
     if "kategorie" not in df.columns:
@@ -101,8 +107,8 @@ for year in range(2014, 2026):  # adjust end year if needed
 
     if rows_to_classify == 0:
         print(f"✨ All rows already classified for {year}, copying file...")
-        df.to_csv(output_file, index=False)
-        continue
+        normalize_frame(df).to_csv(output_file, index=False)
+        return 0
 
     # Classify ONLY the rows that need it
     classified_count = 0
@@ -110,26 +116,22 @@ for year in range(2014, 2026):  # adjust end year if needed
     # Create progress bar for only the rows that need classification
     pbar = tqdm(total=rows_to_classify, desc=f"Classifying {year}", unit="row")
 
-    for idx in df.index:
-        if mask[idx]:  # Only process rows that need classification
-            try:
-                title = str(df.at[idx, "title"])
-                description = str(df.at[idx, "description"])
-
-                # Classify the event
-                category = classifier.classify_event(title, description)
-                df.at[idx, "kategorie"] = category
-
-                classified_count += 1
-                pbar.update(1)
-
-                # Add small delay to prevent overwhelming the model
-                time.sleep(0.1)
+    # Requests are kept in flight concurrently; results stream back in row order
+    indices = df.index[mask]
+    rows = ((str(df.at[idx, "title"]), str(df.at[idx, "description"])) for idx in indices)
+    if "kategorie_tier" not in df.columns:
+        df["kategorie_tier"] = None
 
-            except Exception as e:
-                print(f"\n❌ Error classifying row {idx}: {e}")
-                df.at[idx, "kategorie"] = "Sonstiges"  # fallback
-                pbar.update(1)
+    try:
+        # The cascade also reports which tier (rules / fast / llm) decided each row
+        for idx, (category, tier) in zip(indices, classifier.classify_many_with_tiers(rows, concurrency=CONCURRENCY)):
+            df.at[idx, "kategorie"] = category
+            df.at[idx, "kategorie_tier"] = tier
+            classified_count += 1
+            pbar.update(1)
+    except Exception as e:
+        print(f"\n❌ Error classifying {year}: {e}")
+        df.loc[df['kategorie'].apply(needs_classification) & mask, "kategorie"] = "Sonstiges"  # fallback
 
     pbar.close()
 
@@ -142,7 +144,7 @@ for year in range(2014, 2026):  # adjust end year if needed
 
     # Save output
     try:
-        df.to_csv(output_file, index=False)
+        normalize_frame(df).to_csv(output_file, index=False)
         print(f"✅ Saved classified file: {output_file}")
         print(f"📈 Classified {classified_count} new rows")
 
@@ -156,7 +158,32 @@ for year in range(2014, 2026):  # adjust end year if needed
     except Exception as e:
         print(f"❌ Error saving {output_file}: {e}")
 
-print(f"\n🎉 Batch classification complete!")
+    return classified_count
+
+
+def build_classifier():
+    """Cascade of keyword rules → fast local model (if trained) → LLM"""
+    llm = OllamaPoliceClassifier(model_name=MODEL_NAME, concurrency=CONCURRENCY, cache=CACHE_FILE,
+                                 structured=STRUCTURED_OUTPUT)
+    fast = None
+    if os.path.exists(FAST_MODEL_FILE):
+        fast = FastPoliceClassifier.load(FAST_MODEL_FILE)
+        print(f"⚡ Using {FAST_MODEL_FILE}; low-confidence rows go to {MODEL_NAME}")
+    return CascadeClassifier(llm=llm, fast=fast)
+
+
+def main(years=YEARS, data_folder=DATA_FOLDER, output_folder=OUTPUT_FOLDER):
+    # Make sure output folder exists
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Initialize classifier
+    classifier = build_classifier()
+
+    for year in years:
+        classify_year(classifier, year, data_folder, output_folder)
+
+    print(f"\n🎉 Batch classification complete!")
+    classifier.report()
 
 
 # Optional: Summary statistics
@@ -168,7 +195,7 @@ def print_summary():
     total_files = 0
     total_rows = 0
 
-    for year in range(2014, 2026):
+    for year in YEARS:
         output_file = os.path.join(OUTPUT_FOLDER, f"berlin_polizei_{year}_classified.csv")
         if os.path.exists(output_file):
             df = pd.read_csv(output_file)
@@ -184,5 +211,8 @@ def print_summary():
     print("=" * 50)
     print(f"Total: {total_files} files, {total_rows:,} rows processed")
 
-# Uncomment to see summary
-# print_summary()
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
+    # Uncomment to see summary
+    # print_summary()
\ No newline at end of file
@@ -1,13 +1,60 @@
+import asyncio
+import json
+import time
+from collections import deque
+
 import pandas as pd
 import ollama
 from tqdm import tqdm
-import time
 import logging
 
+from classification_cache import ClassificationCache
+from rate_limiter import get_backoff
+
+PROMPT_VERSION = 1  # bump whenever PROMPT_TEMPLATE or the categories change
+STRUCTURED_PROMPT_VERSION = 1  # same for SYSTEM_TEMPLATE (structured mode)
+
+# --- Structured mode: static instructions in a system message, answer constrained by a JSON schema ---
+NUM_PREDICT = 16      # {"kategorie": "Öffentliche Ordnung"} is ~12 tokens
+KEEP_ALIVE = "30m"    # keep the model loaded between runs of the driver scripts
+LLM_RETRIES = 2       # retries of a request the server rejected as overloaded (429/503)
+
+PROMPT_TEMPLATE = """Du bist Experte für deutsche Polizeimeldungen. 
+
+Kategorisiere diese Meldung in GENAU EINE Kategorie:
+
+{categories_text}
+
+REGELN:
+1. Antworte nur mit dem Kategorienamen (z.B. "Gewaltverbrechen")
+2. Keine Erklärungen oder zusätzlicher Text
+3. Bei Unsicherheit: "Sonstiges"
+
+MELDUNG:
+"""
+
+
+SYSTEM_TEMPLATE = """Du bist Experte für deutsche Polizeimeldungen.
+Ordne jede Meldung GENAU EINER Kategorie zu:
+
+{categories_text}
+
+Bei Unsicherheit: "Sonstiges". Antworte nur mit dem JSON-Objekt."""
+
 
 class OllamaPoliceClassifier:
-    def __init__(self, model_name="llama3.1:8b"):
+    def __init__(self, model_name="llama3.1:8b", host=None, concurrency=4, cache=None, structured=False):
         self.model_name = model_name
+        self.host = host
+        self.concurrency = concurrency
+        self.structured = structured
+        self.timings = []  # (seconds, generated tokens, prompt tokens) per LLM request
+        self.cache = ClassificationCache(cache) if isinstance(cache, str) else cache
+        self.client = ollama.Client(host=host)
+        self._async_client = None  # shared by aclassify_event calls without a client, see async_client()
+        self._async_loop = None
+        # Concurrency is the bound for a local server; this only pauses after 429/503 (queue full) or timeouts
+        self.backoff = get_backoff("ollama")
         self.categories = {
             "Gewaltverbrechen": "Körperverletzung, Raub, Überfall, sexuelle Belästigung, Bedrohung, Angriffe mit Waffen",
             "Eigentumsdelikte": "Diebstahl, Betrug, Einbruch, Urkundenfälschung, Sachbeschädigung, Trickbetrug",
@@ -18,13 +65,28 @@ class OllamaPoliceClassifier:
             "Sonstiges": "Vermisste Personen, sonstige Delikte"
         }
 
+        # Static part of the prompt, built once instead of per report
+        categories_text = "\n".join([
+            f"- {cat}: {desc}" for cat, desc in self.categories.items()
+        ])
+        self.prompt_prefix = PROMPT_TEMPLATE.format(categories_text=categories_text)
+
+        # Structured mode: same system message for every row, so the server can reuse its prompt cache
+        self.system_message = {'role': 'system', 'content': SYSTEM_TEMPLATE.format(categories_text=categories_text)}
+        self.output_format = {
+            "type": "object",
+            "properties": {"kategorie": {"type": "string", "enum": list(self.categories)}},
+            "required": ["kategorie"],
+        }
+        self.options = {"num_predict": NUM_PREDICT, "temperature": 0}
+
         # Test connection
         self._test_connection()
 
     def _test_connection(self):
         """Test if Ollama is running and model is available"""
         try:
-            response = ollama.chat(
+            response = self.client.chat(
                 model=self.model_name,
                 messages=[{'role': 'user', 'content': 'Hallo'}]
             )
@@ -35,62 +97,216 @@ class OllamaPoliceClassifier:
             print(f"  ollama run {self.model_name}")
             raise
 
-    def classify_event(self, title, description):
-        """Classify a single police event"""
+    def build_prompt(self, title, description):
+        """Append one report to the precomputed prompt prefix"""
+        return (f"{self.prompt_prefix}Titel: {title}\n"
+                f"Beschreibung: {(description or '')[:800]}\n\nKATEGORIE:")
 
-        categories_text = "\n".join([
-            f"- {cat}: {desc}" for cat, desc in self.categories.items()
-        ])
+    def build_messages(self, title, description):
+        """Chat messages for one report in the current mode"""
+        if not self.structured:
+            return [{'role': 'user', 'content': self.build_prompt(title, description)}]
+        return [self.system_message,
+                {'role': 'user', 'content': f"Titel: {title}\nBeschreibung: {(description or '')[:800]}"}]
 
-        prompt = f"""Du bist Experte für deutsche Polizeimeldungen. 
+    def chat_options(self):
+        if not self.structured:
+            return {}
+        return {"format": self.output_format, "options": self.options, "keep_alive": KEEP_ALIVE}
 
-Kategorisiere diese Meldung in GENAU EINE Kategorie:
+    def parse_response(self, response, elapsed):
+        """Category from a chat response; logs latency and token counts of the request"""
+        eval_count = response.get("eval_count") or 0
+        prompt_eval_count = response.get("prompt_eval_count") or 0
+        self.timings.append((elapsed, eval_count, prompt_eval_count))
+        logging.debug(f"Ollama: {elapsed * 1000:.0f} ms, {eval_count} generated / {prompt_eval_count} prompt tokens")
 
-{categories_text}
+        content = response['message']['content']
+        if self.structured:
+            try:
+                category = json.loads(content).get("kategorie")
+                if category in self.categories:
+                    return category
+            except (ValueError, AttributeError):
+                pass
+        return self.parse_category(content)
 
-REGELN:
-1. Antworte nur mit dem Kategorienamen (z.B. "Gewaltverbrechen")
-2. Keine Erklärungen oder zusätzlicher Text
-3. Bei Unsicherheit: "Sonstiges"
+    def timing_report(self):
+        if not self.timings:
+            return
+        latencies = sorted(t[0] for t in self.timings)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        generated = sum(t[1] for t in self.timings) / len(self.timings)
+        prompt = sum(t[2] for t in self.timings) / len(self.timings)
+        mode = "structured" if self.structured else "free text"
+        print(f"⏱️ Ollama ({mode}): {len(self.timings)} requests, p50 {p50 * 1000:.0f} ms, "
+              f"p95 {p95 * 1000:.0f} ms, {generated:.1f} generated / {prompt:.0f} prompt tokens per request")
 
-MELDUNG:
-Titel: {title}
-Beschreibung: {(description or "")[:800]}
+    def parse_category(self, result):
+        """Map the model's answer onto one of the known categories"""
+        result = result.strip().lower()
+        for category in self.categories.keys():
+            if category.lower() in result:
+                return category
+
+        return "Sonstiges"
+
+    def _cache_key(self, title, description):
+        version = f"s{STRUCTURED_PROMPT_VERSION}" if self.structured else PROMPT_VERSION
+        return ClassificationCache.make_key(self.model_name, version, title, description)
+
+    def classify_event(self, title, description):
+        """Classify a single police event"""
 
-KATEGORIE:"""
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(title, description)
+            category = self.cache.get(key)
+            if category is not None:
+                return category
 
         try:
-            response = ollama.chat(
+            start = time.perf_counter()
+            response = self.backoff.call(
+                self.client.chat,
                 model=self.model_name,
-                messages=[{'role': 'user', 'content': prompt}]
+                messages=self.build_messages(title, description),
+                retries=LLM_RETRIES,
+                **self.chat_options()
             )
 
-            result = response['message']['content'].strip()
-
-            # Validate and clean result
-            for category in self.categories.keys():
-                if category.lower() in result.lower():
-                    return category
+            category = self.parse_response(response, time.perf_counter() - start)
+            if key is not None:
+                self.cache.put(key, category)
+            return category
 
+        except Exception as e:
+            logging.error(f"Classification error: {e}")
             return "Sonstiges"
 
+    async def _aclassify(self, client, title, description, key):
+        try:
+            start = time.perf_counter()
+            response = await self.backoff.acall(
+                client.chat,
+                model=self.model_name,
+                messages=self.build_messages(title, description),
+                retries=LLM_RETRIES,
+                **self.chat_options()
+            )
+            category = self.parse_response(response, time.perf_counter() - start)
+            if key is not None:
+                self.cache.put(key, category)
+            return category
         except Exception as e:
             logging.error(f"Classification error: {e}")
             return "Sonstiges"
 
+    def async_client(self):
+        """One ollama.AsyncClient per event loop, reused by every aclassify_event call; closed by aclose()"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = ollama.AsyncClient(host=self.host)
+            self._async_loop = loop
+        return self._async_client
+
+    async def aclose(self):
+        if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_client.close()
+        self._async_client = self._async_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+    async def aclassify_event(self, title, description, client=None):
+        """Async classify_event; without a `client` the classifier's shared one is used
+
+        (use `async with classifier:` so it is closed at the end).
+        """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(title, description)
+            category = self.cache.get(key)
+            if category is not None:
+                return category
+        return await self._aclassify(client or self.async_client(), title, description, key)
+
+    async def aclassify_many(self, rows, concurrency=None):
+        """Async generator: classify (title, description) rows, yielding categories in input order.
+
+        Keeps up to `concurrency` requests open against the Ollama server.
+        Rows may be (title, description) tuples or dicts with those keys.
+        Cache hits are answered without occupying a request slot.
+        """
+        concurrency = concurrency or self.concurrency
+        client = ollama.AsyncClient(host=self.host)
+        loop = asyncio.get_running_loop()
+
+        def pending():
+            return sum(not future.done() for future in in_flight)
+
+        in_flight = deque()
+        try:
+            for row in rows:
+                if isinstance(row, dict):
+                    title, description = row.get("title"), row.get("description")
+                else:
+                    title, description = row
+
+                key = cached = None
+                if self.cache is not None:
+                    key = self._cache_key(title, description)
+                    cached = self.cache.get(key)
+                if cached is not None:
+                    future = loop.create_future()
+                    future.set_result(cached)
+                else:
+                    future = asyncio.ensure_future(self._aclassify(client, title, description, key))
+                in_flight.append(future)
+
+                while in_flight and (in_flight[0].done() or pending() >= concurrency
+                                     or len(in_flight) >= 4 * concurrency):
+                    yield await in_flight.popleft()
+
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            await client.close()
+            if self.cache is not None:
+                self.cache.commit()
+
+    def classify_many(self, rows, concurrency=None):
+        """Classify many rows concurrently; a generator streaming categories in input order.
+
+        Runs its own event loop, so use `aclassify_many` from async code or notebooks.
+        """
+        loop = asyncio.new_event_loop()
+        results = self.aclassify_many(rows, concurrency)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+
     def process_dataframe(self, df):
         """Process entire dataframe"""
 
         print(f"Verarbeite {len(df)} Polizeimeldungen mit {self.model_name}...")
 
-        categories = []
-
-        for idx, row in tqdm(df.iterrows(), total=len(df)):
-            category = self.classify_event(row['title'], row['description'])
-            categories.append(category)
-
-            # Small delay to prevent overwhelming the model
-            time.sleep(0.1)
+        rows = zip(df['title'], df['description'])
+        categories = list(tqdm(self.classify_many(rows), total=len(df)))
 
         df['kategorie'] = categories
         return df
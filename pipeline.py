@@ -0,0 +1,429 @@
+"""Pipeline orchestrator: runs only the stages and years that are out of date.
+
+Stages and their per-year dependencies:
+
+    scrape ──> describe ──> classify ──> embed
+       │           ├──────────────────────┘
+       │           └──────> near_duplicates
+       └─────> translate ──┘
+
+A stage is stale for a year when the content hash of its input files differs
+from the hash recorded after its last successful run (or its output is
+missing). `scrape` has the website as input: a year stays stale until it has
+been scraped once after the year ended. Independent work runs in parallel,
+e.g. translating 2024 while describing 2025; stages writing the same yearly
+CSV take turns.
+
+    python pipeline.py status
+    python pipeline.py run [--years 2024 2025] [--stages describe translate] [--force]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from report_index import write_json_atomic
+
+# ---- CONFIG ----
+DATA_FOLDER = "berlin_reports_yearly"
+CLASSIFIED_FOLDER = "berlin_reports_yearly_classified"
+STATE_FILE = "pipeline_state.json"
+NEAR_DUPLICATES_FILE = "near_duplicates.sqlite"
+EMBEDDINGS_FOLDER = "report_embeddings"
+FIRST_YEAR = 2014
+YEARS_IN_PARALLEL = 2   # years processed at once by each network stage
+
+
+def year_csv(year):
+    return os.path.join(DATA_FOLDER, f"berlin_polizei_{year}.csv")
+
+
+def classified_csv(year):
+    return os.path.join(CLASSIFIED_FOLDER, f"berlin_polizei_{year}_classified.csv")
+
+
+class Stage:
+    """One pipeline step, run per year.
+
+    `fills` names the yearly CSV column the stage fills in place; such stages
+    leave the other columns alone, so a stage that was up to date before they
+    ran is still up to date afterwards.
+    """
+
+    def __init__(self, name, deps, inputs, outputs, fills=None, writes_year_csv=False):
+        self.name = name
+        self.deps = deps
+        self.inputs = inputs
+        self.outputs = outputs
+        self.fills = fills
+        self.writes_year_csv = writes_year_csv
+
+
+STAGES = [
+    Stage("scrape", [], lambda y: [], lambda y: [year_csv(y)], writes_year_csv=True),
+    Stage("describe", ["scrape"], lambda y: [year_csv(y)], lambda y: [year_csv(y)],
+          fills="description", writes_year_csv=True),
+    Stage("translate", ["scrape"], lambda y: [year_csv(y)], lambda y: [year_csv(y)],
+          fills="en_title", writes_year_csv=True),
+    Stage("classify", ["describe", "translate"], lambda y: [year_csv(y)], lambda y: [classified_csv(y)]),
+    Stage("near_duplicates", ["describe"], lambda y: [year_csv(y)], lambda y: [NEAR_DUPLICATES_FILE]),
+    Stage("embed", ["describe", "classify"], lambda y: [year_csv(y), classified_csv(y)],
+          lambda y: [os.path.join(EMBEDDINGS_FOLDER, "meta.json")]),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+class PipelineState:
+    """Per-(stage, year) completion records and a file hash cache, kept in STATE_FILE.
+
+    File hashes are cached by (size, mtime_ns) so unchanged CSVs are not re-read.
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        data = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.files = data.get("files", {})
+        self.done = data.get("done", {})
+
+    def file_digest(self, path):
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = self.files.get(path)
+        if cached and cached["stamp"] == stamp:
+            return cached["digest"]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.files[path] = {"stamp": stamp, "digest": h.hexdigest()}
+        return h.hexdigest()
+
+    def digest(self, paths):
+        h = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            h.update(f"{path}={self.file_digest(path)};".encode("utf-8"))
+        return h.hexdigest()
+
+    def record(self, stage, year):
+        return self.done.get(stage.name, {}).get(str(year))
+
+    def stale_reason(self, stage, year, now=None):
+        """Why (stage, year) has to run, or None if it is up to date"""
+        record = self.record(stage, year)
+        if record is None:
+            return "never run"
+        if any(not os.path.exists(path) for path in stage.outputs(year)):
+            return "output missing"
+        if stage.name == "scrape":
+            # New reports keep appearing until the year is over
+            if datetime.fromisoformat(record["at"]) < datetime(year + 1, 1, 1):
+                return "year still open" if (now or datetime.now()).year <= year else "scraped before year end"
+            return None
+        if record["digest"] != self.digest(stage.inputs(year)):
+            return "input changed"
+        return None
+
+    def mark_done(self, stage, year, before):
+        """Record a finished run; `before` is the yearly CSV hash before the stage touched it"""
+        after = self.digest(stage.inputs(year))
+        entry = {"digest": after, "at": datetime.now().isoformat(timespec="seconds")}
+        self.done.setdefault(stage.name, {})[str(year)] = entry
+
+        if stage.fills:
+            # Other column-filling stages were up to date on `before`; still are on `after`
+            for other in STAGES:
+                record = self.record(other, year)
+                if other is not stage and other.fills and record and record["digest"] == before:
+                    record["digest"] = after
+        self.save()
+
+    def save(self):
+        write_json_atomic(self.path, {"files": self.files, "done": self.done})
+
+
+class AsyncRunner:
+    """Runs an async per-year coroutine; the shared resource is opened on first use"""
+
+    def __init__(self, setup, work, teardown):
+        self.setup = setup
+        self.work = work
+        self.teardown = teardown
+        self.resource = None
+        self.lock = asyncio.Lock()
+        self.slots = asyncio.Semaphore(YEARS_IN_PARALLEL)
+
+    async def run(self, year):
+        async with self.lock:
+            if self.resource is None:
+                self.resource = await self.setup()
+        async with self.slots:
+            return await self.work(self.resource, year)
+
+    async def close(self):
+        if self.resource is not None:
+            await self.teardown(self.resource)
+
+
+class ThreadedRunner:
+    """Runs a blocking per-year function on one dedicated thread.
+
+    SQLite handles and loaded models are created on that thread and stay on
+    it; years of the same stage run one after another.
+    """
+
+    def __init__(self, setup, work, teardown):
+        self.setup = setup
+        self.work = work
+        self.teardown = teardown
+        self.resource = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def _call(self, year):
+        if self.resource is None:
+            self.resource = self.setup()
+        return self.work(self.resource, year)
+
+    async def run(self, year):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, year)
+
+    async def close(self):
+        if self.resource is not None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.teardown, self.resource)
+        self.executor.shutdown()
+
+
+# --- Stage implementations (imported lazily: `status` needs none of them) ---
+
+async def open_scraper():
+    from dedup_index import ReportIdIndex
+    from scraper_async import AsyncListingCrawler
+    crawler = AsyncListingCrawler(verbose=False)
+    await crawler.__aenter__()
+    id_index = ReportIdIndex()
+    return crawler, id_index, id_index.ids()
+
+
+async def scrape_year(resource, year):
+    from scraper_updateForNewReports import update_year
+    crawler, id_index, known_ids = resource
+    return await update_year(crawler, year, id_index, known_ids)
+
+
+async def close_scraper(resource):
+    crawler, id_index, _ = resource
+    await crawler.__aexit__(None, None, None)
+    id_index.close()
+
+
+async def open_describer():
+    from description_fetcher import DescriptionFetcher
+    fetcher = DescriptionFetcher()
+    return await fetcher.__aenter__()
+
+
+async def describe_year(fetcher, year):
+    from description_fetcher import process_year
+    return await process_year(fetcher, year, DATA_FOLDER)
+
+
+async def close_describer(fetcher):
+    await fetcher.__aexit__(None, None, None)
+
+
+def open_translator():
+    from title_translator_with_batches import TRANSLATOR_BACKEND
+    from translation_backends import get_translator
+    from translation_memory import MEMORY_FILE, TranslationMemory
+    return get_translator(TRANSLATOR_BACKEND), TranslationMemory(MEMORY_FILE)
+
+
+def translate_year(resource, year):
+    from title_translator_with_batches import translate_year as translate
+    translator, memory = resource
+    return translate(translator, memory, year, DATA_FOLDER)
+
+
+def close_translator(resource):
+    _, memory = resource
+    memory.report()
+    memory.close()
+
+
+def open_classifier():
+    from ollama_classifer_working import build_classifier
+    os.makedirs(CLASSIFIED_FOLDER, exist_ok=True)
+    return build_classifier()
+
+
+def classify_year(classifier, year):
+    from ollama_classifer_working import classify_year as classify
+    return classify(classifier, year, DATA_FOLDER, CLASSIFIED_FOLDER)
+
+
+def close_classifier(classifier):
+    from analytics_cube import CUBE_FILE, update as update_cube
+    from report_table import TABLE_FOLDER, update as update_table
+    classifier.report()
+    if os.path.exists(CUBE_FILE):
+        update_cube(CLASSIFIED_FOLDER)
+    if os.path.exists(TABLE_FOLDER):
+        update_table(CLASSIFIED_FOLDER)
+
+
+def open_near_duplicates():
+    from near_duplicates import NearDuplicateIndex
+    return NearDuplicateIndex(NEAR_DUPLICATES_FILE)
+
+
+def index_near_duplicates(index, year):
+    added = index.add_file(year_csv(year), year)
+    index.update_clusters()
+    return added
+
+
+def close_near_duplicates(index):
+    index.close()
+
+
+def open_embeddings():
+    from embedding_store import EmbeddingStore, MODEL_NAME, SentenceEncoder
+    store = EmbeddingStore(EMBEDDINGS_FOLDER)
+    return store, SentenceEncoder(store.meta["model"] or MODEL_NAME)
+
+
+def embed_year(embeddings, year):
+    store, encoder = embeddings
+    return store.update(encoder, DATA_FOLDER, years={year})
+
+
+def close_embeddings(embeddings):
+    store, _ = embeddings
+    store.refresh_labels(CLASSIFIED_FOLDER)
+
+
+def make_runners():
+    return {
+        "scrape": AsyncRunner(open_scraper, scrape_year, close_scraper),
+        "describe": AsyncRunner(open_describer, describe_year, close_describer),
+        "translate": ThreadedRunner(open_translator, translate_year, close_translator),
+        "classify": ThreadedRunner(open_classifier, classify_year, close_classifier),
+        "near_duplicates": ThreadedRunner(open_near_duplicates, index_near_duplicates, close_near_duplicates),
+        "embed": ThreadedRunner(open_embeddings, embed_year, close_embeddings),
+    }
+
+
+# --- Scheduling ---
+
+async def run_pipeline(years, stage_names=STAGE_NAMES, force=False, state=None):
+    """Run every stale (stage, year) of the selection, each as soon as its dependencies finished"""
+    state = state or PipelineState()
+    runners = make_runners()
+    csv_locks = {year: asyncio.Lock() for year in years}
+    tasks = {}
+    results = {}
+
+    async def node(stage, year):
+        for dep in stage.deps:
+            if dep in stage_names and not await tasks[dep, year]:
+                results[stage.name, year] = "skipped (upstream failed)"
+                return False
+
+        if stage.name != "scrape" and not os.path.exists(year_csv(year)):
+            results[stage.name, year] = "skipped (no yearly CSV)"
+            return True
+
+        lock = csv_locks[year] if stage.writes_year_csv else None
+        if lock is not None:
+            await lock.acquire()
+        try:
+            reason = "forced" if force else state.stale_reason(stage, year)
+            if reason is None:
+                results[stage.name, year] = "up to date"
+                return True
+
+            print(f"▶️ [{stage.name} {year}] {reason}")
+            before = state.digest(stage.inputs(year))
+            try:
+                await runners[stage.name].run(year)
+            except Exception as e:
+                print(f"❌ [{stage.name} {year}] {e}")
+                results[stage.name, year] = f"failed: {e}"
+                return False
+            state.mark_done(stage, year, before)
+            results[stage.name, year] = f"ran ({reason})"
+            return True
+        finally:
+            if lock is not None:
+                lock.release()
+
+    for stage in STAGES:
+        if stage.name in stage_names:
+            for year in years:
+                tasks[stage.name, year] = asyncio.ensure_future(node(stage, year))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for runner in runners.values():
+            await runner.close()
+
+    from search_index import INDEX_FILE as SEARCH_INDEX_FILE, update as update_search_index
+    if any(result.startswith("ran") for result in results.values()) and os.path.exists(SEARCH_INDEX_FILE):
+        update_search_index()
+    return results
+
+
+def print_table(years, stage_names, cells):
+    print(f"{'year':<6}" + "".join(f"{name:>22}" for name in stage_names))
+    print("=" * (6 + 22 * len(stage_names)))
+    for year in years:
+        print(f"{year:<6}" + "".join(f"{cells.get((name, year), '-')[:21]:>22}" for name in stage_names))
+
+
+def status(years, stage_names=STAGE_NAMES, state=None):
+    """Show which (stage, year) pairs would run right now"""
+    state = state or PipelineState()
+    cells = {}
+    for stage in STAGES:
+        if stage.name not in stage_names:
+            continue
+        for year in years:
+            if stage.name != "scrape" and not os.path.exists(year_csv(year)):
+                cells[stage.name, year] = "no yearly CSV"
+                continue
+            reason = state.stale_reason(stage, year)
+            cells[stage.name, year] = "up to date" if reason is None else f"stale: {reason}"
+    state.save()  # keep freshly computed file hashes
+    print_table(years, stage_names, cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the stale parts of the report pipeline")
+    parser.add_argument("command", choices=["run", "status"])
+    parser.add_argument("--years", type=int, nargs="*",
+                        default=list(range(FIRST_YEAR, datetime.now().year + 1)))
+    parser.add_argument("--stages", nargs="*", choices=STAGE_NAMES, default=STAGE_NAMES)
+    parser.add_argument("--force", action="store_true", help="run the selection even if up to date")
+    parser.add_argument("--state", default=STATE_FILE)
+    args = parser.parse_args()
+
+    state = PipelineState(args.state)
+    if args.command == "status":
+        status(args.years, args.stages, state)
+        return
+
+    results = asyncio.run(run_pipeline(args.years, args.stages, args.force, state))
+    print("\n📋 PIPELINE RUN:")
+    print_table(args.years, args.stages, results)
+
+
+if __name__ == "__main__":
+    main()
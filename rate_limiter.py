@@ -0,0 +1,406 @@
+"""Adaptive (AIMD) rate limits shared by every network stage.
+
+Each endpoint (a host such as www.berlin.de, the MyMemory API) gets an
+AdaptiveLimiter: a token bucket whose rate grows by about `increase`
+requests/s every second while responses are healthy, and is cut by
+`decrease` on 429/5xx responses, TooManyRequests errors and timeouts
+(honouring Retry-After) or, more gently, when latency climbs well above its
+baseline. Starting points and bounds come from ENDPOINT_BUDGETS.
+
+The local Ollama server is bounded by the classifier's concurrency instead;
+its BackoffGate never paces healthy requests and only pauses everyone after
+a 429/503 or a timeout.
+
+Limiters work from threads (`acquire`, `call`) and from asyncio (`aacquire`,
+`acall`). When a process exits it writes its limiter state to its own file
+in limiter_metrics/ (one per script and process, so parallel workers never
+share a file); the commands below merge them:
+
+    python rate_limiter.py show
+    python rate_limiter.py prometheus
+"""
+import argparse
+import asyncio
+import atexit
+import glob
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+
+# ---- CONFIG ----
+METRICS_FOLDER = "limiter_metrics"
+INCREASE = 0.5            # requests/s added per second of healthy traffic
+DECREASE = 0.5            # rate factor on 429 / 5xx / TooManyRequests / timeout
+SLOWDOWN_DECREASE = 0.8   # rate factor when latency exceeds LATENCY_FACTOR x baseline
+LATENCY_FACTOR = 3.0
+LATENCY_SMOOTHING = 0.2   # weight of the newest sample in the latency EWMA
+
+# Starting rate and bounds (requests/s) per endpoint
+ENDPOINT_BUDGETS = {
+    "www.berlin.de": {"rate": 4.0, "min_rate": 0.5, "max_rate": 12.0},
+    "mymemory": {"rate": 1.0, "min_rate": 0.05, "max_rate": 5.0},
+}
+DEFAULT_BUDGET = {"rate": 4.0, "min_rate": 0.5, "max_rate": 20.0}
+BACKOFF = 1.0             # first pause (s) of a BackoffGate after a throttle error, doubled while they repeat
+MAX_BACKOFF = 30.0
+
+THROTTLE_ERRORS = {"TooManyRequests", "TooManyRequestsError", "TimeoutError", "ReadTimeout"}
+
+
+def is_throttle_error(error):
+    """429/5xx statuses, TooManyRequests-style exceptions and timeouts"""
+    if type(error).__name__ in THROTTLE_ERRORS or isinstance(error, asyncio.TimeoutError):
+        return True
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def budget_for(endpoint, rate=None, burst=None, max_rate=None):
+    """ENDPOINT_BUDGETS entry with explicit overrides; a starting rate outside the bounds widens them"""
+    budget = dict(ENDPOINT_BUDGETS.get(endpoint, DEFAULT_BUDGET))
+    if rate is not None:
+        budget["rate"] = rate
+        budget["min_rate"] = min(budget["min_rate"], rate)
+        budget["max_rate"] = max(budget["max_rate"], rate)
+    if max_rate is not None:
+        budget["max_rate"] = max(max_rate, budget["min_rate"])
+        budget["rate"] = min(budget["rate"], budget["max_rate"])
+    if burst is not None:
+        budget["burst"] = burst
+    return budget
+
+
+class _Gate:
+    """`call` / `acall` on top of acquire, observe, throttled and failed"""
+
+    def call(self, fn, *args, retries=0, **kwargs):
+        """Run a blocking request under the limit; throttle errors are retried `retries` times"""
+        for attempt in range(retries + 1):
+            self.acquire()
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e):
+                    self.failed()
+                    raise
+                self.throttled()
+                if attempt == retries:
+                    raise
+                continue
+            self.observe(time.perf_counter() - start)
+            return result
+
+    async def acall(self, fn, *args, retries=0, **kwargs):
+        """Async `call` for a coroutine function"""
+        for attempt in range(retries + 1):
+            await self.aacquire()
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e):
+                    self.failed()
+                    raise
+                self.throttled()
+                if attempt == retries:
+                    raise
+                continue
+            self.observe(time.perf_counter() - start)
+            return result
+
+
+class AdaptiveLimiter(_Gate):
+    """AIMD token bucket for one endpoint.
+
+    `reserve` takes a token right away (the balance may go negative) and
+    returns how long the caller has to wait, so the same limiter can pace
+    threads and coroutines; the lock is only held for the bookkeeping.
+    """
+
+    def __init__(self, name, rate, min_rate, max_rate, burst=None, increase=INCREASE, decrease=DECREASE,
+                 latency_factor=LATENCY_FACTOR):
+        self.name = name
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latency = None    # EWMA, seconds
+        self.baseline = None   # slowly rising minimum of the latency
+        self.samples = 0
+        self.counters = {"requests": 0, "throttled": 0, "slowdowns": 0, "failures": 0}
+        self.peak_rate = self.rate
+        self._lock = threading.Lock()
+
+    # --- pacing ---
+
+    def reserve(self):
+        """Take a token; returns the seconds to wait before sending"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            self.counters["requests"] += 1
+            return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+    async def aacquire(self):
+        await asyncio.sleep(self.reserve())
+
+    # --- feedback ---
+
+    def observe(self, latency):
+        """A healthy response: additive increase, or a gentle decrease if latency is far above baseline"""
+        with self._lock:
+            self.samples += 1
+            if self.latency is None:
+                self.latency = self.baseline = latency
+            else:
+                self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+                self.baseline = min(latency, self.baseline + 0.01 * (latency - self.baseline))
+            if self.latency_factor and self.samples >= 5 and self.latency > self.latency_factor * self.baseline:
+                if self._decrease(SLOWDOWN_DECREASE):
+                    self.counters["slowdowns"] += 1
+                return
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            self.peak_rate = max(self.peak_rate, self.rate)
+
+    def throttled(self, retry_after=None):
+        """429 / 5xx / TooManyRequests / timeout: multiplicative decrease, pause for Retry-After"""
+        with self._lock:
+            self.counters["throttled"] += 1
+            self._decrease(self.decrease)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def failed(self):
+        with self._lock:
+            self.counters["failures"] += 1
+
+    def _decrease(self, factor):
+        # One cut per round trip: requests already in flight fail together
+        now = time.monotonic()
+        if now - self.last_decrease < max(1.0, self.latency or 0.0):
+            return False
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.tokens = min(self.tokens, 0.0)  # no burst right after a cut
+        self.last_decrease = now
+        return True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "peak_rate": round(self.peak_rate, 3),
+                "min_rate": self.min_rate,
+                "max_rate": self.max_rate,
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "baseline_ms": round(self.baseline * 1000, 1) if self.baseline is not None else None,
+                "paused_s": round(max(0.0, self.paused_until - time.monotonic()), 1),
+                **self.counters,
+            }
+
+
+class BackoffGate(_Gate):
+    """No pacing, only a shared pause after 429/503/timeouts (for servers bounded by concurrency).
+
+    A healthy request costs one clock read; the pause doubles from `backoff`
+    up to `max_backoff` while throttle errors repeat and resets on success.
+    """
+
+    def __init__(self, name, backoff=BACKOFF, max_backoff=MAX_BACKOFF):
+        self.name = name
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.paused_until = 0.0
+        self.streak = 0
+        self.latency = None
+        self.counters = {"requests": 0, "throttled": 0, "failures": 0}
+        self._lock = threading.Lock()
+
+    def wait_time(self):
+        return max(0.0, self.paused_until - time.monotonic())
+
+    def acquire(self):
+        if self.paused_until:
+            time.sleep(self.wait_time())
+
+    async def aacquire(self):
+        if self.paused_until:
+            await asyncio.sleep(self.wait_time())
+
+    def observe(self, latency):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.streak = 0
+            self.latency = latency if self.latency is None else self.latency + LATENCY_SMOOTHING * (latency - self.latency)
+
+    def throttled(self, retry_after=None):
+        with self._lock:
+            self.counters["throttled"] += 1
+            self.streak += 1
+            pause = retry_after or min(self.max_backoff, self.backoff * 2 ** (self.streak - 1))
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def failed(self):
+        with self._lock:
+            self.counters["failures"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "paused_s": round(self.wait_time(), 1),
+                **self.counters,
+            }
+
+
+class HostLimiter:
+    """Per-host politeness for async fetchers: at most `max_in_flight` open requests and an adaptive rate.
+
+    Report outcomes to `bucket` (observe / throttled) so the rate can adapt.
+    """
+
+    def __init__(self, max_in_flight=4, rate=4.0, burst=None, name="host", max_rate=None):
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.bucket = register(AdaptiveLimiter(name, **budget_for(name, rate, burst, max_rate)))
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            await self.bucket.aacquire()
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+        return False
+
+
+# --- Registry and metrics ---
+
+_limiters = {}
+_registry_lock = threading.RLock()
+
+
+def register(limiter):
+    """Track a limiter for the metrics (a repeated name gets a #n suffix)"""
+    with _registry_lock:
+        if not _limiters:
+            atexit.register(export_metrics)
+        key, n = limiter.name, 1
+        while key in _limiters:
+            n += 1
+            key = f"{limiter.name}#{n}"
+        _limiters[key] = limiter
+    return limiter
+
+
+def get_limiter(endpoint, **overrides):
+    """The process-wide limiter of an endpoint, created from its budget on first use"""
+    with _registry_lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            limiter = register(AdaptiveLimiter(endpoint, **budget_for(endpoint, **overrides)))
+        return limiter
+
+
+def get_backoff(endpoint, **options):
+    """The process-wide BackoffGate of an endpoint"""
+    with _registry_lock:
+        gate = _limiters.get(endpoint)
+        if gate is None:
+            gate = register(BackoffGate(endpoint, **options))
+        return gate
+
+
+def metrics():
+    with _registry_lock:
+        return {key: limiter.snapshot() for key, limiter in _limiters.items()}
+
+
+def export_metrics(folder=METRICS_FOLDER):
+    """Write this process's limiter state to its own file (a later run of the same script and process replaces it)"""
+    current = metrics()
+    if not current:
+        return
+    process = f"{os.path.basename(sys.argv[0]) or 'python'}/{multiprocessing.current_process().name}"
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, re.sub(r"[^\w.-]", "_", process) + ".json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"process": process, "updated": time.strftime("%Y-%m-%d %H:%M:%S"), "limiters": current},
+                  f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_metrics(folder=METRICS_FOLDER):
+    """Merge the per-process metrics files: {process: {"updated", "limiters"}}"""
+    data = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        data[entry.pop("process")] = entry
+    return data
+
+
+def prometheus_text(data):
+    """Metrics file contents in the Prometheus text exposition format"""
+    lines = []
+    for process, entry in data.items():
+        for endpoint, values in entry["limiters"].items():
+            labels = f'process="{process}",endpoint="{endpoint}"'
+            for metric, value in values.items():
+                if value is not None:
+                    lines.append(f"rate_limiter_{metric}{{{labels}}} {value}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive rate limiter metrics")
+    parser.add_argument("command", choices=["show", "prometheus"])
+    parser.add_argument("--folder", default=METRICS_FOLDER)
+    args = parser.parse_args()
+
+    data = load_metrics(args.folder)
+    if not data:
+        print(f"⚠️ No metrics yet ({args.folder}/ is written when a network script exits)")
+        return
+    if args.command == "prometheus":
+        print(prometheus_text(data))
+        return
+    for process, entry in sorted(data.items()):
+        print(f"\n🚦 {process} ({entry['updated']})")
+        for endpoint, values in entry["limiters"].items():
+            if "rate" not in values:  # BackoffGate
+                print(f"   {endpoint:<28} backoff only, latency {values['latency_ms']} ms, "
+                      f"{values['requests']} requests, {values['throttled']} throttled, "
+                      f"{values['failures']} failed, paused {values['paused_s']}s")
+                continue
+            print(f"   {endpoint:<28} rate {values['rate']:>7.2f}/s (peak {values['peak_rate']:.2f}, "
+                  f"{values['min_rate']:g}-{values['max_rate']:g}), latency {values['latency_ms']} ms, "
+                  f"{values['requests']} requests, {values['throttled']} throttled, "
+                  f"{values['slowdowns']} slowdowns, {values['failures']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+from report_normalize import DATE_FORMAT, normalize_rows, parse_dates
+
+
+def parse_date(date_str):
+    # "13.07.2025 13:31 Uhr"
+    return datetime.strptime(date_str.replace(" Uhr", ""), DATE_FORMAT)
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file next to `path` and atomically rename it over `path`"""
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".json.tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class YearIndex:
+    """Sidecar index for one yearly CSV: newest report datetime and the set of known links.
+
+    Stored next to the CSV as `<csv>.index.json` together with the CSV's size
+    and mtime. If the CSV was changed by another writer the index is rebuilt
+    from it once; otherwise the high-water mark is read without touching the CSV.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.path = csv_path + ".index.json"
+        self.latest = None
+        self.links = set()
+        self._load()
+
+    def _csv_stamp(self):
+        if not os.path.exists(self.csv_path):
+            return None
+        stat = os.stat(self.csv_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load(self):
+        stamp = self._csv_stamp()
+        if stamp is None:
+            return
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("csv_stamp") == stamp:
+                self.latest = datetime.fromisoformat(data["latest"]) if data["latest"] else None
+                self.links = set(data["links"])
+                return
+        self.rebuild()
+
+    def rebuild(self):
+        """Re-read the CSV once (first use or after an external rewrite)"""
+        print(f"🧮 Building index for {self.csv_path}...")
+        df = pd.read_csv(self.csv_path, usecols=["date", "link"], dtype="string", keep_default_na=False)
+        self.links = set(df["link"])
+        latest = parse_dates(df["date"]).max()
+        self.latest = None if pd.isna(latest) else latest.to_pydatetime()
+        self.save()
+
+    def add(self, row):
+        self.links.add(row["link"])
+        try:
+            date_dt = parse_date(row["date"])
+        except (ValueError, TypeError, AttributeError):
+            return
+        if self.latest is None or date_dt > self.latest:
+            self.latest = date_dt
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "csv_stamp": self._csv_stamp(),
+            "latest": self.latest.isoformat() if self.latest else None,
+            "links": sorted(self.links),
+        })
+
+
+def read_header(csv_path):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def append_rows(csv_path, rows, fieldnames, index=None):
+    """Append rows to a yearly CSV (creating it with a header if needed) and update its index.
+
+    An existing file keeps its own column order; the normalized columns are
+    filled for the rows being written.
+    """
+    has_content = os.path.exists(csv_path) and os.path.getsize(csv_path) > 0
+    if has_content:
+        fieldnames = read_header(csv_path)
+        with open(csv_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) not in (b"\n", b"\r")
+    else:
+        needs_newline = False
+    normalize_rows(rows, fieldnames)
+
+    with open(csv_path, "a", newline="", encoding="utf-8") as f:
+        if needs_newline:
+            f.write("\r\n")
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        if not has_content:
+            writer.writeheader()
+        writer.writerows(rows)
+
+    if index is not None:
+        for row in rows:
+            index.add(row)
+        index.save()
+
+
+def prefix_digest(path, size):
+    """Hash of the first `size` bytes of a file"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+def read_new_rows(path, known=None):
+    """Rows of a CSV not read yet, for readers that keep derived data up to date.
+
+    `known` is the record returned by the previous call ({"size", "mtime_ns",
+    "digest", "header"}) or None. Returns (df, appended, record): if the file only
+    grew, just the bytes after the old size are parsed (appended=True); a
+    rewritten file, including one rewritten to the same size, is read whole.
+    df is None when nothing changed.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    if known is not None and known["size"] == size:
+        if known.get("mtime_ns") == stat.st_mtime_ns:
+            return None, False, known
+        if prefix_digest(path, size) == known["digest"]:
+            return None, False, dict(known, mtime_ns=stat.st_mtime_ns)  # touched, not changed
+
+    appended = (known is not None and size > known["size"]
+                and prefix_digest(path, known["size"]) == known["digest"])
+    if appended:
+        with open(path, "rb") as f:
+            f.seek(known["size"])
+            tail = f.read().decode("utf-8")
+        df = pd.read_csv(io.StringIO(tail), header=None, names=known["header"], dtype="string",
+                         keep_default_na=False)
+    else:
+        df = pd.read_csv(path, dtype="string", keep_default_na=False)
+    return df, appended, {"size": size, "mtime_ns": stat.st_mtime_ns, "digest": prefix_digest(path, size),
+                          "header": list(df.columns)}
@@ -0,0 +1,197 @@
+"""Normalized columns written next to the raw text of every report CSV.
+
+    date_epoch      int64   "05.11.2014 12:15 Uhr" as seconds since 1970-01-01 00:00
+                            (Berlin wall-clock time, no timezone shift); -1 if unparsable
+    location_code   int8    index into LOCATIONS: unknown, the 12 districts, berlinweit
+    kategorie_code  int8    index into CATEGORIES (classified files only)
+
+All conversions are vectorized over a whole column. The CSV writers
+(append_rows, write_csv_atomic, the scrapers, the classifier) fill the columns
+on every write, so readers can skip the string cleaning:
+
+    from report_normalize import read_normalized
+    df = read_normalized("berlin_reports_yearly_classified/berlin_polizei_2024_classified.csv")
+
+    python report_normalize.py backfill   # add the columns to the existing yearly files
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+FOLDERS = ["berlin_reports_yearly", "berlin_reports_yearly_classified"]
+DATE_FORMAT = "%d.%m.%Y %H:%M"
+MISSING_DATE = -1
+
+DISTRICTS = [
+    "Charlottenburg-Wilmersdorf", "Friedrichshain-Kreuzberg", "Lichtenberg", "Marzahn-Hellersdorf",
+    "Mitte", "Neukölln", "Pankow", "Reinickendorf", "Spandau", "Steglitz-Zehlendorf",
+    "Tempelhof-Schöneberg", "Treptow-Köpenick",
+]
+LOCATIONS = ["unknown"] + DISTRICTS + ["berlinweit"]
+# Reports that are not about a single district are filed under berlinweit
+LOCATION_ALIASES = {
+    "bezirksübergreifend": "berlinweit",
+    "bundesweit": "berlinweit",
+    "bundeslandübergreifend": "berlinweit",
+}
+
+CATEGORIES = ["unknown", "Gewaltverbrechen", "Eigentumsdelikte", "Verkehrsdelikte", "Betäubungsmittel",
+              "Brandstiftung", "Öffentliche Ordnung", "Sonstiges"]
+CATEGORY_FIXES = {"Gewaltverbreche": "Gewaltverbrechen"}
+
+NORMALIZED_COLUMNS = ["date_epoch", "location_code"]
+CLASSIFIED_NORMALIZED_COLUMNS = NORMALIZED_COLUMNS + ["kategorie_code"]
+
+_LOCATION_LOOKUP = {name: code for code, name in enumerate(LOCATIONS)}
+_LOCATION_LOOKUP.update({alias: _LOCATION_LOOKUP[name] for alias, name in LOCATION_ALIASES.items()})
+_CATEGORY_LOOKUP = {name: code for code, name in enumerate(CATEGORIES)}
+_CATEGORY_LOOKUP.update({typo: _CATEGORY_LOOKUP[name] for typo, name in CATEGORY_FIXES.items()})
+
+
+def parse_dates(values):
+    """Vectorized parse of "dd.mm.YYYY HH:MM Uhr" strings into datetime64 (NaT if unparsable)"""
+    values = pd.Series(values, dtype="string")
+    return pd.to_datetime(values.str.replace(" Uhr", "", regex=False), format=DATE_FORMAT, errors="coerce")
+
+
+def date_epochs(values):
+    seconds = parse_dates(values).to_numpy(dtype="datetime64[s]")
+    return np.where(np.isnat(seconds), MISSING_DATE, seconds.astype(np.int64))
+
+
+def clean_locations(values):
+    """"Ereignisort:Treptow - Köpenick" -> "Treptow-Köpenick" (the text the notebook plots)"""
+    values = pd.Series(values, dtype="string").fillna("")
+    values = values.str.replace("Ereignisort:", "", regex=False).str.strip()
+    return values.str.replace(r"\s*-\s*", "-", regex=True)
+
+
+def location_codes(values):
+    codes = clean_locations(values).map(_LOCATION_LOOKUP)
+    return codes.fillna(0).to_numpy(dtype=np.int8)
+
+
+def clean_categories(values):
+    values = pd.Series(values, dtype="string").fillna("").str.strip()
+    return values.replace(CATEGORY_FIXES)
+
+
+def category_codes(values):
+    codes = pd.Series(values, dtype="string").fillna("").str.strip().map(_CATEGORY_LOOKUP)
+    return codes.fillna(0).to_numpy(dtype=np.int8)
+
+
+def llm_labelled(df):
+    """Rows whose kategorie came from the LLM: all rows of files without `kategorie_tier`
+    (classified before the cascade), else those with an empty or "llm" tier"""
+    if "kategorie_tier" not in df.columns:
+        return df
+    tiers = pd.Series(df["kategorie_tier"], dtype="string").fillna("").str.strip()
+    return df[tiers.isin(["", "llm"])]
+
+
+# normalized column -> (source column, converter)
+NORMALIZERS = {
+    "date_epoch": ("date", date_epochs),
+    "location_code": ("location", location_codes),
+    "kategorie_code": ("kategorie", category_codes),
+}
+
+
+def normalize_frame(df):
+    """Fill the normalized columns for every source column `df` has (in place)"""
+    for column, (source, convert) in NORMALIZERS.items():
+        if source in df.columns:
+            df[column] = convert(df[source])
+    return df
+
+
+def normalize_rows(rows, fieldnames):
+    """Fill the normalized columns named in `fieldnames` into dict rows (in place)"""
+    wanted = [column for column in NORMALIZERS if column in fieldnames]
+    if not rows or not wanted:
+        return rows
+    for column in wanted:
+        source, convert = NORMALIZERS[column]
+        values = convert([row.get(source) for row in rows]).tolist()
+        for row, value in zip(rows, values):
+            row[column] = value
+    return rows
+
+
+def with_normalized_columns(fieldnames):
+    """`fieldnames` plus the normalized columns whose source column it contains"""
+    extra = [column for column, (source, _) in NORMALIZERS.items()
+             if source in fieldnames and column not in fieldnames]
+    return list(fieldnames) + extra
+
+
+def decode(df):
+    """Typed columns from the codes: date as datetime64, location / kategorie as categoricals"""
+    out = pd.DataFrame(index=df.index)
+    if "date_epoch" in df.columns:
+        epochs = df["date_epoch"].to_numpy(dtype=np.int64)
+        out["date"] = pd.to_datetime(np.where(epochs == MISSING_DATE, np.datetime64("NaT"),
+                                              epochs.astype("datetime64[s]")))
+    if "location_code" in df.columns:
+        out["location"] = pd.Categorical.from_codes(df["location_code"].to_numpy(dtype=np.int8), LOCATIONS)
+    if "kategorie_code" in df.columns:
+        out["kategorie"] = pd.Categorical.from_codes(df["kategorie_code"].to_numpy(dtype=np.int8), CATEGORIES)
+    return out
+
+
+def read_normalized(path, columns=("date_epoch", "location_code", "kategorie_code")):
+    """Read only the code columns of a backfilled CSV and decode them"""
+    header = pd.read_csv(path, nrows=0).columns
+    return decode(pd.read_csv(path, usecols=[column for column in columns if column in header]))
+
+
+def write_frame_atomic(df, path):
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".csv.tmp")
+    os.close(fd)
+    try:
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def backfill(folders=FOLDERS):
+    """Add / refresh the normalized columns of every yearly CSV"""
+    total = 0
+    for folder in folders:
+        for path in sorted(glob.glob(os.path.join(folder, "berlin_polizei_*.csv"))):
+            df = pd.read_csv(path, dtype="string", keep_default_na=False)
+            start = time.perf_counter()
+            normalize_frame(df)
+            elapsed = time.perf_counter() - start
+            write_frame_atomic(df, path)
+
+            unknown = int((df["location_code"] == 0).sum())
+            undated = int((df["date_epoch"] == MISSING_DATE).sum())
+            total += len(df)
+            print(f"🧹 {path}: {len(df)} rows normalized in {elapsed * 1000:.0f} ms "
+                  f"({unknown} unknown locations, {undated} unparsable dates)")
+    print(f"✅ Backfilled {total} rows")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalized date / location / category columns")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--folders", nargs="*", default=FOLDERS)
+    args = parser.parse_args()
+    backfill(args.folders)
+
+
+if __name__ == "__main__":
+    main()
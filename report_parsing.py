@@ -0,0 +1,234 @@
+from bs4 import BeautifulSoup
+
+# --- Base URL ---
+BASE_URL = "https://www.berlin.de"
+
+LISTING_FIELDS = ["date", "title", "link", "location"]
+
+# --- Parser backend: "bs4" (html.parser), "lxml" or "selectolax" ---
+PARSER_BACKEND = "bs4"
+PARSER_BACKENDS = ["bs4", "lxml", "selectolax"]
+
+# Text inside these tags is not part of get_text() in BeautifulSoup
+SKIPPED_TEXT_TAGS = {"script", "style", "template"}
+
+WARNING_MARKER = "Durchsuchungsbeschlüsse bei drei Polizeibeamten"
+
+
+def archive_url(year, page, base_url=BASE_URL):
+    """Build the archive listing URL for one year/page"""
+    return f"{base_url}/polizei/polizeimeldungen/archiv/{year}/?page_at_1_0={page}"
+
+
+def parse_listing(html, base_url=BASE_URL, context="", backend=None):
+    """Extract date/title/link/location records from an archive listing page.
+
+    Same selectors as scraper_fullscrape.py (`ul.list--tablelist > li`).
+    Returns an empty list when the page has no entries (past the last page).
+    All backends produce exactly the same records.
+    """
+    backend = backend or PARSER_BACKEND
+    if backend == "bs4":
+        return _parse_listing_bs4(html, base_url, context)
+    if backend == "lxml":
+        return _parse_listing_lxml(html, base_url, context)
+    if backend == "selectolax":
+        return _parse_listing_selectolax(html, base_url, context)
+    raise ValueError(f"Unknown parser backend: {backend}")
+
+
+def extract_description(html, backend=None):
+    """Extract the report text from a press-release detail page.
+
+    Same rules as description_scraper2.py: the first `div.textile` whose parent
+    is a `text` block (not the emergency box). The known generic warning page
+    is replaced by "[warning_placeholder]".
+    """
+    backend = backend or PARSER_BACKEND
+    if backend == "bs4":
+        return _extract_description_bs4(html)
+    if backend == "lxml":
+        return _extract_description_lxml(html)
+    if backend == "selectolax":
+        return _extract_description_selectolax(html)
+    raise ValueError(f"Unknown parser backend: {backend}")
+
+
+def _listing_record(date, href, title, location, base_url):
+    return {
+        "date": date,
+        "title": title,
+        "link": base_url + href,
+        "location": location.replace("Ereignisort: ", "")
+    }
+
+
+def _description_result(text):
+    # Optional: skip if it's still the known generic content
+    if WARNING_MARKER in text:
+        return "[warning_placeholder]"
+    return text
+
+
+def _join_strings(strings, separator=""):
+    """Same as BeautifulSoup get_text(separator, strip=True)"""
+    return separator.join(s for s in (s.strip() for s in strings) if s)
+
+
+# --- BeautifulSoup (html.parser) ---
+
+def _parse_listing_bs4(html, base_url, context):
+    soup = BeautifulSoup(html, "html.parser")
+    list_items = soup.select("ul.list--tablelist > li")
+
+    results = []
+    for li in list_items:
+        try:
+            date = li.select_one(".cell.nowrap.date").get_text(strip=True)
+            a_tag = li.select_one(".cell.text a")
+            title = a_tag.get_text(strip=True)
+            location = li.select_one(".category").get_text(strip=True)
+            results.append(_listing_record(date, a_tag["href"], title, location, base_url))
+        except Exception as e:
+            print(f"[{context}] Skipped entry due to error: {e}")
+            continue
+
+    return results
+
+
+def _extract_description_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    textile_divs = soup.select("div.textile")
+
+    for div in textile_divs:
+        parent_classes = div.find_parent().get("class", [])
+        if "text" in parent_classes and "emergency-box" not in parent_classes:
+            return _description_result(div.get_text(separator="\n", strip=True))
+
+    return ""
+
+
+# --- lxml with precompiled XPath ---
+
+_lxml = None
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _lxml_module():
+    """Import lxml and compile the XPath selectors once"""
+    global _lxml
+    if _lxml is None:
+        from lxml import etree, html as lxml_html
+        _lxml = {
+            "fromstring": lxml_html.document_fromstring,
+            "items": etree.XPath(f"//ul[{_has_class('list--tablelist')}]/li"),
+            "date": etree.XPath(f"(.//*[{_has_class('cell')} and {_has_class('nowrap')} and {_has_class('date')}])[1]"),
+            "link": etree.XPath(f"(.//*[{_has_class('cell')} and {_has_class('text')}]//a)[1]"),
+            "category": etree.XPath(f"(.//*[{_has_class('category')}])[1]"),
+            "textile": etree.XPath(f"//div[{_has_class('textile')}]"),
+        }
+    return _lxml
+
+
+def _lxml_strings(element):
+    if element.tag not in SKIPPED_TEXT_TAGS and element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):  # skip comments / processing instructions
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    if not found:
+        raise AttributeError("selector matched nothing")
+    return found[0]
+
+
+def _parse_listing_lxml(html, base_url, context):
+    lx = _lxml_module()
+    if not html.strip():
+        return []
+    tree = lx["fromstring"](html)
+
+    results = []
+    for li in lx["items"](tree):
+        try:
+            date = _join_strings(_lxml_strings(_first(lx["date"], li)))
+            a_tag = _first(lx["link"], li)
+            title = _join_strings(_lxml_strings(a_tag))
+            location = _join_strings(_lxml_strings(_first(lx["category"], li)))
+            results.append(_listing_record(date, a_tag.attrib["href"], title, location, base_url))
+        except Exception as e:
+            print(f"[{context}] Skipped entry due to error: {e}")
+            continue
+
+    return results
+
+
+def _extract_description_lxml(html):
+    lx = _lxml_module()
+    if not html.strip():
+        return ""
+    tree = lx["fromstring"](html)
+
+    for div in lx["textile"](tree):
+        parent_classes = (div.getparent().get("class") or "").split()
+        if "text" in parent_classes and "emergency-box" not in parent_classes:
+            return _description_result(_join_strings(_lxml_strings(div), "\n"))
+
+    return ""
+
+
+# --- selectolax (lexbor) ---
+
+def _selectolax_parser(html):
+    from selectolax.lexbor import LexborHTMLParser
+    return LexborHTMLParser(html)
+
+
+def _selectolax_strings(node):
+    for child in node.traverse(include_text=True):
+        if child.tag == "-text" and child.parent.tag not in SKIPPED_TEXT_TAGS:
+            yield child.text_content
+
+
+def _selectolax_first(node, selector):
+    found = node.css_first(selector)
+    if found is None:
+        raise AttributeError(f"selector {selector!r} matched nothing")
+    return found
+
+
+def _parse_listing_selectolax(html, base_url, context):
+    tree = _selectolax_parser(html)
+
+    results = []
+    for li in tree.css("ul.list--tablelist > li"):
+        try:
+            date = _join_strings(_selectolax_strings(_selectolax_first(li, ".cell.nowrap.date")))
+            a_tag = _selectolax_first(li, ".cell.text a")
+            title = _join_strings(_selectolax_strings(a_tag))
+            location = _join_strings(_selectolax_strings(_selectolax_first(li, ".category")))
+            results.append(_listing_record(date, a_tag.attributes["href"], title, location, base_url))
+        except Exception as e:
+            print(f"[{context}] Skipped entry due to error: {e}")
+            continue
+
+    return results
+
+
+def _extract_description_selectolax(html):
+    tree = _selectolax_parser(html)
+
+    for div in tree.css("div.textile"):
+        parent_classes = (div.parent.attributes.get("class") or "").split()
+        if "text" in parent_classes and "emergency-box" not in parent_classes:
+            return _description_result(_join_strings(_selectolax_strings(div), "\n"))
+
+    return ""
@@ -0,0 +1,272 @@
+"""Compact, memory-mapped table of all classified reports.
+
+One file per column in report_table/, opened with mmap, so the table is
+ready in a few milliseconds and only the pages of the columns (and rows)
+actually read become resident:
+
+    report_id.npy       int64
+    year.npy            int16
+    date.npy            datetime64[s] (NaT if unparsable)
+    location_code.npy   int8   index into report_normalize.LOCATIONS
+    kategorie_code.npy  int8   index into report_normalize.CATEGORIES
+    <text>.bin          UTF-8 bytes of all values of title / link / description / en_title, back to back
+    <text>.offsets.npy  int64  value i is bytes [offsets[i], offsets[i + 1])
+    meta.json           row count, location / category tables, source files
+
+The text columns use Arrow's large_string layout, so to_arrow() and
+to_pandas() wrap the mapped buffers instead of copying them (pandas gets
+pyarrow-backed string columns and categoricals over the code arrays).
+
+    python report_table.py build
+    python report_table.py update     # rebuild only if a classified CSV changed
+    python report_table.py info
+
+    from report_table import ReportTable
+    table = ReportTable.open()
+    table[42].title, table.text("description", 42)
+    df = table.to_pandas(["date", "location", "kategorie"])
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from dedup_index import extract_report_id
+from report_index import write_json_atomic
+from report_normalize import CATEGORIES, LOCATIONS, category_codes, location_codes, parse_dates
+
+# === CONFIG ===
+TABLE_FOLDER = "report_table"
+CSV_FOLDER = "berlin_reports_yearly_classified"
+CSV_GLOB = "berlin_polizei_*_classified.csv"
+
+NUMERIC_COLUMNS = ["report_id", "year", "date", "location_code", "kategorie_code"]
+TEXT_COLUMNS = ["title", "link", "description", "en_title"]
+# Columns of to_pandas() / to_arrow(): location and kategorie are decoded from their codes
+COLUMNS = ["report_id", "year", "date", "location", "kategorie"] + TEXT_COLUMNS
+
+
+def source_records(csv_folder=CSV_FOLDER):
+    return {path: [os.path.getsize(path), os.stat(path).st_mtime_ns]
+            for path in sorted(glob.glob(os.path.join(csv_folder, CSV_GLOB)))}
+
+
+def encode_strings(values):
+    """Strings -> (UTF-8 buffer, int64 offsets of length n + 1)"""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+class Report:
+    """One row; text fields are decoded when accessed"""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getattr__(self, name):
+        if name in TEXT_COLUMNS:
+            return self._table.text(name, self._row)
+        if name == "location":
+            return LOCATIONS[self._table.location_code[self._row]]
+        if name == "kategorie":
+            return CATEGORIES[self._table.kategorie_code[self._row]]
+        if name in NUMERIC_COLUMNS:
+            return getattr(self._table, name)[self._row]
+        raise AttributeError(name)
+
+    def __repr__(self):
+        return f"Report({self.date}, {self.location}, {self.kategorie}, {self.title!r})"
+
+
+class ReportTable:
+    """Column arrays memory-mapped from a folder written by build()"""
+
+    __slots__ = ["folder", "meta", "_texts"] + NUMERIC_COLUMNS
+
+    def __init__(self, folder, meta):
+        self.folder = folder
+        self.meta = meta
+        for column in NUMERIC_COLUMNS:
+            setattr(self, column, np.load(os.path.join(folder, f"{column}.npy"), mmap_mode="r"))
+        self._texts = {}
+
+    @classmethod
+    def open(cls, folder=TABLE_FOLDER):
+        with open(os.path.join(folder, "meta.json"), encoding="utf-8") as f:
+            return cls(folder, json.load(f))
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def __getitem__(self, row):
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return Report(self, row % len(self))
+
+    def _text(self, column):
+        """(buffer, offsets) of a text column, mapped on first use"""
+        if column not in self._texts:
+            path = os.path.join(self.folder, f"{column}.bin")
+            data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.empty(0, np.uint8)
+            offsets = np.load(os.path.join(self.folder, f"{column}.offsets.npy"), mmap_mode="r")
+            self._texts[column] = data, offsets
+        return self._texts[column]
+
+    def text(self, column, row):
+        data, offsets = self._text(column)
+        return bytes(data[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def row_of(self, link):
+        """Row of a report link (binary search on the sorted report IDs)"""
+        report_id = extract_report_id(link)
+        if report_id is None:
+            raise KeyError(link)
+        row = int(np.searchsorted(self.report_id, report_id))
+        if row == len(self) or self.report_id[row] != report_id:
+            raise KeyError(link)
+        return row
+
+    # --- zero-copy views ---
+
+    def arrow_column(self, column):
+        if column in TEXT_COLUMNS:
+            data, offsets = self._text(column)
+            return pa.LargeStringArray.from_buffers(len(self), pa.py_buffer(offsets), pa.py_buffer(data))
+        if column in ("location", "kategorie"):
+            codes = getattr(self, f"{column}_code")
+            table = LOCATIONS if column == "location" else CATEGORIES
+            indices = pa.Array.from_buffers(pa.int8(), len(self), [None, pa.py_buffer(codes)])
+            return pa.DictionaryArray.from_arrays(indices, pa.array(table))
+        if column == "date":
+            missing = np.isnat(self.date)
+            validity = pa.py_buffer(np.packbits(~missing, bitorder="little")) if missing.any() else None
+            return pa.Array.from_buffers(pa.timestamp("s"), len(self), [validity, pa.py_buffer(self.date)],
+                                         null_count=int(missing.sum()))
+        array = getattr(self, column)
+        return pa.Array.from_buffers(pa.from_numpy_dtype(array.dtype), len(self), [None, pa.py_buffer(array)])
+
+    def to_arrow(self, columns=COLUMNS):
+        return pa.table({column: self.arrow_column(column) for column in columns})
+
+    def to_pandas(self, columns=COLUMNS):
+        """DataFrame over the mapped buffers: numbers and dates as NumPy views, location / kategorie as
+        categoricals over the codes, text as pyarrow-backed strings"""
+        data = {}
+        for column in columns:
+            if column in TEXT_COLUMNS:
+                data[column] = pd.arrays.ArrowExtensionArray(self.arrow_column(column))
+            elif column in ("location", "kategorie"):
+                table = LOCATIONS if column == "location" else CATEGORIES
+                data[column] = pd.Categorical.from_codes(getattr(self, f"{column}_code"),
+                                                         dtype=pd.CategoricalDtype(table), validate=False)
+            else:
+                data[column] = getattr(self, column)
+        return pd.DataFrame(data, copy=False)
+
+
+def build(csv_folder=CSV_FOLDER, folder=TABLE_FOLDER):
+    """Write the table from the classified CSVs (sorted by report ID, last copy of a repeated ID wins)"""
+    start = time.perf_counter()
+    records = source_records(csv_folder)
+    frames = []
+    for path in records:
+        df = pd.read_csv(path, usecols=["date", "link", "location", "kategorie"] + TEXT_COLUMNS,
+                         dtype="string", keep_default_na=False)
+        df["year"] = int(os.path.basename(path).split("_")[2])
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df["report_id"] = df["link"].map(extract_report_id)
+    df = (df.dropna(subset=["report_id"]).drop_duplicates("report_id", keep="last")
+          .astype({"report_id": np.int64}).sort_values("report_id", kind="stable"))
+
+    tmp_folder = folder + ".tmp"
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    os.makedirs(tmp_folder)
+    columns = {
+        "report_id": df["report_id"].to_numpy(dtype=np.int64),
+        "year": df["year"].to_numpy(dtype=np.int16),
+        "date": parse_dates(df["date"]).to_numpy(dtype="datetime64[s]"),
+        "location_code": location_codes(df["location"]),
+        "kategorie_code": category_codes(df["kategorie"]),
+    }
+    for column, values in columns.items():
+        np.save(os.path.join(tmp_folder, f"{column}.npy"), values)
+    for column in TEXT_COLUMNS:
+        data, offsets = encode_strings(df[column])
+        with open(os.path.join(tmp_folder, f"{column}.bin"), "wb") as f:
+            f.write(data)
+        np.save(os.path.join(tmp_folder, f"{column}.offsets.npy"), offsets)
+    write_json_atomic(os.path.join(tmp_folder, "meta.json"),
+                      {"rows": len(df), "locations": LOCATIONS, "categories": CATEGORIES, "sources": records})
+
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
+    os.replace(tmp_folder, folder)
+    size = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+    print(f"✅ {len(df)} reports -> {folder} ({size / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+def update(csv_folder=CSV_FOLDER, folder=TABLE_FOLDER):
+    """Rebuild if the classified CSVs changed since the last build"""
+    meta_path = os.path.join(folder, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            if json.load(f)["sources"] == source_records(csv_folder):
+                print(f"✅ {folder} is up to date")
+                return
+    build(csv_folder, folder)
+
+
+def info(folder=TABLE_FOLDER, csv_folder=CSV_FOLDER):
+    """Open / convert times of the table next to the memory of the same data loaded from the CSVs"""
+    start = time.perf_counter()
+    table = ReportTable.open(folder)
+    open_time = time.perf_counter() - start
+    start = time.perf_counter()
+    df = table.to_pandas()
+    convert_time = time.perf_counter() - start
+    start = time.perf_counter()
+    arrow = table.to_arrow()
+    arrow_time = time.perf_counter() - start
+
+    csv_df = pd.concat([pd.read_csv(path) for path in sorted(glob.glob(os.path.join(csv_folder, CSV_GLOB)))])
+    print("\n📊 REPORT TABLE:")
+    print("=" * 60)
+    print(f"Rows:                    {len(table)}")
+    print(f"Open (mmap):             {open_time * 1000:.2f} ms")
+    print(f"to_pandas / to_arrow:    {convert_time * 1000:.2f} ms / {arrow_time * 1000:.2f} ms")
+    print(f"Arrow buffers:           {arrow.nbytes / 1e6:.1f} MB (mapped, not copied)")
+    print(f"pandas from CSV:         {csv_df.memory_usage(deep=True).sum() / 1e6:.1f} MB (object columns)")
+    print(f"First row:               {table[0]}")
+    print("=" * 60)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped report table")
+    parser.add_argument("command", choices=["build", "update", "info"])
+    parser.add_argument("--csv-folder", default=CSV_FOLDER)
+    parser.add_argument("--folder", default=TABLE_FOLDER)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.csv_folder, args.folder)
+    elif args.command == "update":
+        update(args.csv_folder, args.folder)
+    else:
+        info(args.folder, args.csv_folder)
+
+
+if __name__ == "__main__":
+    main()
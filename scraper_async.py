@@ -0,0 +1,128 @@
+import asyncio
+import csv
+import os
+import time
+from datetime import datetime
+
+from dedup_index import extract_report_id
+from http_cache import CACHE_FILE
+from http_fetch import AsyncFetcher, print_fetch_stats
+from report_normalize import NORMALIZED_COLUMNS, normalize_rows
+from report_parsing import BASE_URL, LISTING_FIELDS, archive_url, parse_listing
+
+# ---- CONFIG ----
+START_YEAR = 2014
+OUTPUT_FOLDER = "."          # scraper_fullscrape.py writes next to the script
+MAX_IN_FLIGHT = 4            # open requests per host
+RATE_PER_SECOND = 4.0        # starting rate per host (adapts, see rate_limiter.py)
+BURST = 4                    # token-bucket capacity
+MAX_RETRIES = 3
+TIMEOUT_SECONDS = 30
+
+
+class AsyncListingCrawler:
+    """Crawls the yearly archive listings over plain HTTP with pooled keep-alive connections.
+
+    Pages are requested in waves of `max_in_flight`; a year is finished at the
+    first page without `ul.list--tablelist > li` entries. `parser` picks the
+    report_parsing backend ("bs4", "lxml", "selectolax").
+    """
+
+    def __init__(self, fetch_base=BASE_URL, max_in_flight=MAX_IN_FLIGHT,
+                 rate=RATE_PER_SECOND, burst=BURST, max_retries=MAX_RETRIES,
+                 timeout=TIMEOUT_SECONDS, verbose=True, cache=CACHE_FILE, parser=None, max_rate=None):
+        self.fetch_base = fetch_base
+        self.parser = parser
+        self.max_in_flight = max_in_flight
+        self.verbose = verbose
+        self.fetcher = AsyncFetcher(max_in_flight=max_in_flight, rate=rate, burst=burst,
+                                    max_retries=max_retries, timeout=timeout, cache=cache, max_rate=max_rate)
+
+    async def __aenter__(self):
+        await self.fetcher.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self.fetcher.__aexit__(exc_type, exc, tb)
+
+    @property
+    def pages_fetched(self):
+        return self.fetcher.pages_fetched
+
+    async def fetch_page(self, year, page_num):
+        html = await self.fetcher.fetch(archive_url(year, page_num, self.fetch_base))
+        return parse_listing(html, context=f"{year} - Page {page_num}", backend=self.parser)
+
+    async def crawl_year(self, year):
+        """Return all listing records of one year, in archive order (newest first)"""
+        year_results = []
+        seen_ids = set()  # listings shift while crawling; the same report can show up twice
+        page_num = 1
+
+        while True:
+            wave = list(range(page_num, page_num + self.max_in_flight))
+            pages = await asyncio.gather(*(self.fetch_page(year, p) for p in wave))
+
+            finished = False
+            for p, entries in zip(wave, pages):
+                if not entries:
+                    finished = True
+                    break
+                for entry in entries:
+                    report_id = extract_report_id(entry["link"])
+                    if report_id is not None and report_id in seen_ids:
+                        continue
+                    seen_ids.add(report_id)
+                    year_results.append(entry)
+                if self.verbose:
+                    print(f"Scraped {len(entries)} entries from year {year}, page {p}")
+                page_num = p + 1
+
+            if finished:
+                print(f"✅ Finished year {year} with {page_num - 1} pages.")
+                return year_results
+
+    async def crawl_years(self, years, output_folder=OUTPUT_FOLDER, id_index=None):
+        """Crawl several years concurrently and write one CSV per year.
+
+        Crawled report IDs are registered in `id_index` (a ReportIdIndex) if given.
+        """
+        async def crawl_and_save(year):
+            results = await self.crawl_year(year)
+            save_year(year, results, output_folder)
+            if id_index is not None:
+                id_index.add_many(results, year)
+            return year, len(results)
+
+        return dict(await asyncio.gather(*(crawl_and_save(y) for y in years)))
+
+
+def save_year(year, year_results, output_folder=OUTPUT_FOLDER):
+    """Write berlin_polizei_<year>.csv with the same columns as scraper_fullscrape.py"""
+    os.makedirs(output_folder, exist_ok=True)
+    filename = os.path.join(output_folder, f"berlin_polizei_{year}.csv")
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=LISTING_FIELDS + NORMALIZED_COLUMNS)
+        writer.writeheader()
+        writer.writerows(normalize_rows(year_results, NORMALIZED_COLUMNS))
+
+    print(f"📁 Saved {len(year_results)} entries to {filename}")
+    return filename
+
+
+async def main(years=None, output_folder=OUTPUT_FOLDER, fetch_base=BASE_URL, **crawler_options):
+    if years is None:
+        years = range(START_YEAR, datetime.now().year + 1)
+
+    start = time.perf_counter()
+    async with AsyncListingCrawler(fetch_base=fetch_base, **crawler_options) as crawler:
+        counts = await crawler.crawl_years(list(years), output_folder)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n All years processed and saved: {sum(counts.values())} entries.")
+    print_fetch_stats(crawler.fetcher, elapsed)
+    return counts
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,9 +3,14 @@ from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 import time
 import csv
-import random
 from datetime import datetime
 
+from rate_limiter import get_limiter
+from report_normalize import NORMALIZED_COLUMNS, normalize_rows
+
+# Crawls one year after another and writes each year at the end;
+# sharded_crawl.py is the resumable, multi-process alternative.
+
 # --- Setup headless browser ---
 options = Options()
 options.add_argument('--headless')
@@ -13,6 +18,7 @@ driver = webdriver.Chrome(options=options)
 
 # --- Base URL ---
 base_url = "https://www.berlin.de"
+limiter = get_limiter("www.berlin.de")  # adaptive pace instead of a fixed random delay
 
 # --- Loop over years ---
 current_year = datetime.now().year
@@ -23,8 +29,10 @@ for year in range(2014, current_year + 1):
 
     while True:
         url = f"https://www.berlin.de/polizei/polizeimeldungen/archiv/{year}/?page_at_1_0={page_num}"
+        limiter.acquire()
+        start = time.perf_counter()
         driver.get(url)
-        time.sleep(random.uniform(1.5, 3.0))  # polite delay
+        limiter.observe(time.perf_counter() - start)
 
         soup = BeautifulSoup(driver.page_source, "html.parser")
         list_items = soup.select("ul.list--tablelist > li")
@@ -57,9 +65,9 @@ for year in range(2014, current_year + 1):
     # --- Save year's data ---
     filename = f"berlin_polizei_{year}.csv"
     with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["date", "title", "link", "location"])
+        writer = csv.DictWriter(f, fieldnames=["date", "title", "link", "location"] + NORMALIZED_COLUMNS)
         writer.writeheader()
-        writer.writerows(year_results)
+        writer.writerows(normalize_rows(year_results, NORMALIZED_COLUMNS))
 
     print(f"📁 Saved {len(year_results)} entries to {filename}")
 
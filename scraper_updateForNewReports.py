@@ -1,105 +1,107 @@
-import csv
+import asyncio
 import os
+import re
 from datetime import datetime
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import time
-import random
+
+from dedup_index import ReportIdIndex, extract_report_id
+from report_index import YearIndex, append_rows, parse_date
+from report_normalize import NORMALIZED_COLUMNS
+from scraper_async import AsyncListingCrawler
+from search_index import INDEX_FILE as SEARCH_INDEX_FILE, update as update_search_index
 
 # ---- CONFIG ----
-YEAR = 2025
-CSV_FILE = f"berlin_reports_yearly/berlin_polizei_{YEAR}.csv"
-BASE_URL = "https://www.berlin.de"
-START_URL = f"{BASE_URL}/polizei/polizeimeldungen/archiv/{YEAR}/?page_at_1_0="
-
-# ---- Load latest saved date ----
-def get_latest_saved_datetime():
-    if not os.path.exists(CSV_FILE):
-        return None
-    with open(CSV_FILE, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-        if not rows:
-            return None
-        latest_row = rows[0]  # newest is first if file sorted
-        return parse_date(latest_row["date"])
-
-def parse_date(date_str):
-    # "13.07.2025 13:31 Uhr"
-    return datetime.strptime(date_str.replace(" Uhr", ""), "%d.%m.%Y %H:%M")
-
-# ---- Setup browser ----
-options = Options()
-options.add_argument('--headless')
-driver = webdriver.Chrome(options=options)
-
-latest_saved = get_latest_saved_datetime()
-print(f"📌 Latest saved report: {latest_saved.strftime('%Y-%m-%d %H:%M') if latest_saved else 'None — full scrape'}")
-
-new_entries = []
-page = 1
-found_all = False
-
-while not found_all:
-    url = START_URL + str(page)
-    driver.get(url)
-    time.sleep(random.uniform(1.5, 3.0))
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-
-    list_items = soup.select("ul.list--tablelist > li")
-    if not list_items:
-        break
-
-    for li in list_items:
-        try:
-            date_str = li.select_one(".cell.nowrap.date").get_text(strip=True)
-            date_dt = parse_date(date_str)
-
-            if latest_saved and date_dt <= latest_saved:
-                found_all = True
-                break  # all remaining are already saved
-
-            a_tag = li.select_one(".cell.text a")
-            title = a_tag.get_text(strip=True)
-            link = BASE_URL + a_tag["href"]
-            location = li.select_one(".category").get_text(strip=True).replace("Ereignisort: ", "")
-
-            new_entries.append({
-                "date": date_str,
-                "title": title,
-                "link": link,
-                "location": location
-            })
-
-        except Exception as e:
-            print(f"[Page {page}] Skipped one item due to error: {e}")
-            continue
-
-    print(f"🔎 Checked page {page}, found {len(list_items)} entries.")
-    page += 1
-
-driver.quit()
-
-# ---- Write new entries (prepend to file) ----
-if new_entries:
-    print(f"\n🆕 Found {len(new_entries)} new entries. Updating {CSV_FILE}...")
-
-    if os.path.exists(CSV_FILE):
-        with open(CSV_FILE, "r", encoding="utf-8") as f:
-            existing = f.read()
-
-        with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["date", "title", "link", "location", "description", "en_title"])
-            writer.writeheader()
-            writer.writerows(new_entries)
-            f.write(existing.split('\n', 1)[-1])  # skip duplicate header
-    else:
-        with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["date", "title", "link", "location", "description", "en_title"])
-            writer.writeheader()
-            writer.writerows(new_entries)
-
-    print(f"✅ Appended new reports to {CSV_FILE}")
-else:
-    print("✅ No new reports to add.")
+DATA_FOLDER = "berlin_reports_yearly"
+FIRST_YEAR = 2014
+COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"] + NORMALIZED_COLUMNS
+
+
+def csv_path(year):
+    return os.path.join(DATA_FOLDER, f"berlin_polizei_{year}.csv")
+
+
+def years_to_update():
+    """From the newest year already on disk up to the current year (handles year rollover)"""
+    saved_years = [
+        int(m.group(1)) for name in os.listdir(DATA_FOLDER)
+        if (m := re.fullmatch(r"berlin_polizei_(\d{4})\.csv", name))
+    ] if os.path.isdir(DATA_FOLDER) else []
+    start = max(saved_years) if saved_years else FIRST_YEAR
+    return list(range(start, datetime.now().year + 1))
+
+
+async def iter_new_entries(crawler, year, index, known_ids):
+    """Walk the year's archive newest-first, yielding entries until the first already-known report"""
+    collected_ids = set()  # a report can repeat on the next page while new ones are published
+    page = 1
+
+    while True:
+        list_items = await crawler.fetch_page(year, page)
+        if not list_items:
+            return
+
+        for entry in list_items:
+            try:
+                date_dt = parse_date(entry["date"])
+            except ValueError as e:
+                print(f"[Page {page}] Skipped one item due to error: {e}")
+                continue
+
+            # Known report = everything after it is saved; the date check covers
+            # an index without links (e.g. older reports removed from the CSV)
+            report_id = extract_report_id(entry["link"])
+            if (report_id in known_ids or entry["link"] in index.links
+                    or (index.latest and date_dt < index.latest)):
+                return
+            if report_id in collected_ids:
+                continue
+
+            collected_ids.add(report_id)
+            yield entry
+
+        print(f"🔎 Checked page {page}, found {len(list_items)} entries.")
+        page += 1
+
+
+async def collect_new_entries(crawler, year, index, known_ids):
+    """All new entries of a year, newest first"""
+    return [entry async for entry in iter_new_entries(crawler, year, index, known_ids)]
+
+
+async def update_year(crawler, year, id_index, known_ids):
+    filename = csv_path(year)
+    index = YearIndex(filename)
+    latest_saved = index.latest
+    print(f"\n📌 [{year}] Latest saved report: "
+          f"{latest_saved.strftime('%Y-%m-%d %H:%M') if latest_saved else 'None — full scrape'}")
+
+    new_entries = await collect_new_entries(crawler, year, index, known_ids)
+    if not new_entries:
+        print(f"✅ [{year}] No new reports to add.")
+        return 0
+
+    # Archive pages are newest-first; append oldest-first so the file tail stays chronological
+    append_rows(filename, list(reversed(new_entries)), COLUMN_NAMES, index)
+    id_index.add_many(new_entries, year)
+    known_ids.update(extract_report_id(entry["link"]) for entry in new_entries)
+    print(f"✅ [{year}] Appended {len(new_entries)} new reports to {filename}")
+    return len(new_entries)
+
+
+async def main():
+    os.makedirs(DATA_FOLDER, exist_ok=True)
+    total = 0
+    id_index = ReportIdIndex()
+    known_ids = id_index.ids()
+    async with AsyncListingCrawler(verbose=False) as crawler:
+        for year in years_to_update():
+            total += await update_year(crawler, year, id_index, known_ids)
+    id_index.close()
+    print(f"\n🆕 {total} new reports in total.")
+    if total and os.path.exists(SEARCH_INDEX_FILE):
+        update_search_index()
+    if crawler.fetcher.cache is not None:
+        crawler.fetcher.cache.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,261 @@
+"""Full-text search over title, en_title and description of all reports.
+
+SQLite FTS5 index in report_search.sqlite, keyed on the press-release ID.
+Text is folded the German way before indexing and querying (lowercase,
+ä/ö/ü -> ae/oe/ue, ß -> ss), so "Neukölln", "Neukoelln", "Straße" and
+"Strasse" all match. Every query word is a prefix, so "messer" also finds
+"Messerangriff" and "hermannstr" finds "Hermannstraße".
+
+The yearly CSVs give the text, the classified CSVs the kategorie. Files that
+only grew are read from where they ended last time; a rewritten yearly file is
+re-indexed whole and reports no longer in it are removed from the index.
+
+    python search_index.py build
+    python search_index.py update
+    python search_index.py search "Hermannstraße messer" [--year 2024] [--location Neukölln] [--limit 20]
+
+    from search_index import SearchIndex
+    with SearchIndex() as index:
+        index.search("schusswaffe", kategorie="Gewaltverbrechen")
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+
+from dedup_index import extract_report_id
+from report_index import read_new_rows
+from report_normalize import clean_categories, clean_locations, date_epochs
+
+# === CONFIG ===
+INDEX_FILE = "report_search.sqlite"
+DATA_FOLDER = "berlin_reports_yearly"
+CLASSIFIED_FOLDER = "berlin_reports_yearly_classified"
+DEFAULT_LIMIT = 20
+
+GERMAN_FOLDING = [("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")]
+QUERY_WORD = re.compile(r"\w+")
+
+
+def fold(text):
+    """Lowercase with umlauts and ß spelled out; applied to indexed text and queries alike"""
+    text = (text or "").lower()
+    for char, spelled_out in GERMAN_FOLDING:
+        text = text.replace(char, spelled_out)
+    return text
+
+
+def match_expression(query):
+    """Plain words -> FTS5 query where every word must occur as a prefix"""
+    words = QUERY_WORD.findall(fold(query))
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+class SearchIndex:
+    """FTS5 table `report_text` (rowid = report ID) plus a `reports` table with the result columns"""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS reports (
+                report_id INTEGER PRIMARY KEY, link TEXT NOT NULL, title TEXT, date TEXT,
+                date_epoch INTEGER, year INTEGER, location TEXT, kategorie TEXT);
+            CREATE INDEX IF NOT EXISTS reports_date ON reports (date_epoch);
+            CREATE VIRTUAL TABLE IF NOT EXISTS report_text USING fts5(
+                title, en_title, description, tokenize = 'unicode61 remove_diacritics 2');
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, record TEXT NOT NULL);
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def clear(self):
+        self.conn.executescript("DELETE FROM reports; DELETE FROM report_text; DELETE FROM files;")
+
+    # --- indexing ---
+
+    def add_reports(self, df, year, whole_file=False):
+        """Insert or replace the text and metadata of yearly CSV rows (last copy of a repeated report wins).
+
+        With `whole_file` the rows are the complete yearly file: indexed reports of that year
+        missing from it are deleted.
+        """
+        ids = [extract_report_id(link) for link in df["link"]]
+        if whole_file:
+            self.remove_missing(year, ids)
+        locations = clean_locations(df["location"]).tolist()
+        epochs = date_epochs(df["date"]).tolist()
+        empty = [""] * len(df)
+        rows, texts = {}, {}
+        for report_id, link, title, date, epoch, location, en_title, description in zip(
+                ids, df["link"], df["title"], df["date"], epochs, locations,
+                df.get("en_title", empty), df.get("description", empty)):
+            if report_id is None:
+                continue
+            rows[report_id] = (report_id, link, title, date, epoch, year, location)
+            texts[report_id] = (report_id, fold(title), fold(en_title), fold(description))
+        # Keep the kategorie of already-indexed reports
+        self.conn.executemany(
+            "INSERT INTO reports (report_id, link, title, date, date_epoch, year, location) VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (report_id) DO UPDATE SET link = excluded.link, title = excluded.title,"
+            " date = excluded.date, date_epoch = excluded.date_epoch, year = excluded.year,"
+            " location = excluded.location", rows.values())
+        self.conn.executemany("DELETE FROM report_text WHERE rowid = ?", [(report_id,) for report_id in texts])
+        self.conn.executemany(
+            "INSERT INTO report_text (rowid, title, en_title, description) VALUES (?, ?, ?, ?)", texts.values())
+        return len(rows)
+
+    def remove_missing(self, year, report_ids):
+        """Delete the indexed reports of a year that are not in `report_ids`"""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (report_id INTEGER PRIMARY KEY)")
+        self.conn.execute("DELETE FROM keep_ids")
+        self.conn.executemany("INSERT OR IGNORE INTO keep_ids VALUES (?)",
+                              [(report_id,) for report_id in report_ids if report_id is not None])
+        gone = [row[0] for row in self.conn.execute(
+            "SELECT report_id FROM reports WHERE year = ? AND report_id NOT IN (SELECT report_id FROM keep_ids)",
+            (year,))]
+        self.conn.executemany("DELETE FROM report_text WHERE rowid = ?", [(report_id,) for report_id in gone])
+        self.conn.executemany("DELETE FROM reports WHERE report_id = ?", [(report_id,) for report_id in gone])
+        if gone:
+            print(f"🧹 {year}: removed {len(gone)} reports no longer in the file")
+        return len(gone)
+
+    def set_categories(self, df):
+        """Fill kategorie from classified CSV rows"""
+        updates = [
+            (kategorie or None, report_id)
+            for link, kategorie in zip(df["link"], clean_categories(df["kategorie"]))
+            if (report_id := extract_report_id(link)) is not None
+        ]
+        self.conn.executemany("UPDATE reports SET kategorie = ? WHERE report_id = ?", updates)
+        return len(updates)
+
+    def _update_files(self, paths, apply):
+        read = 0
+        for path in paths:
+            stored = self.conn.execute("SELECT record FROM files WHERE path = ?", (path,)).fetchone()
+            df, appended, record = read_new_rows(path, json.loads(stored[0]) if stored else None)
+            if df is None:
+                continue
+            apply(df, int(os.path.basename(path).split("_")[2].split(".")[0]), not appended)
+            self.conn.execute("INSERT OR REPLACE INTO files (path, record) VALUES (?, ?)", (path, json.dumps(record)))
+            self.conn.commit()
+            read += len(df)
+            print(f"🔎 {path}: {'appended' if appended else 'indexed'} {len(df)} reports")
+        return read
+
+    def update(self, data_folder=DATA_FOLDER, classified_folder=CLASSIFIED_FOLDER):
+        """Index new / changed rows of the yearly files, then their categories; returns rows read"""
+        yearly = sorted(glob.glob(os.path.join(data_folder, "berlin_polizei_*.csv")))
+        classified = sorted(glob.glob(os.path.join(classified_folder, "berlin_polizei_*_classified.csv")))
+        read = self._update_files(yearly, self.add_reports)
+        read += self._update_files(classified, lambda df, year, whole_file: self.set_categories(df))
+        return read
+
+    def optimize(self):
+        """Merge the FTS5 b-trees (after a full build)"""
+        self.conn.execute("INSERT INTO report_text (report_text) VALUES ('optimize')")
+        self.conn.commit()
+
+    # --- queries ---
+
+    def search(self, query, limit=DEFAULT_LIMIT, year=None, location=None, kategorie=None, newest_first=False):
+        """Matching reports as dicts {link, date, location, kategorie, title}, best match first.
+
+        `query` is plain words, all of which must occur (as prefixes).
+        """
+        expression = match_expression(query)
+        if not expression:
+            return []
+        return self.search_raw(expression, limit, year, location, kategorie, newest_first)
+
+    def search_raw(self, expression, limit=DEFAULT_LIMIT, year=None, location=None, kategorie=None,
+                   newest_first=False):
+        """Same as search, for an FTS5 expression such as '"messer" NOT "kuechenmesser"' (folded text)"""
+        sql = ("SELECT r.link, r.date, r.location, r.kategorie, r.title FROM report_text"
+               " JOIN reports r ON r.report_id = report_text.rowid WHERE report_text MATCH ?")
+        params = [expression]
+        for column, value in (("year", year), ("location", location), ("kategorie", kategorie)):
+            if value is not None:
+                sql += f" AND r.{column} = ?"
+                params.append(value)
+        sql += " ORDER BY r.date_epoch DESC" if newest_first else " ORDER BY report_text.rank"
+        sql += " LIMIT ?"
+        params.append(limit)
+        columns = ["link", "date", "location", "kategorie", "title"]
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def count(self, query):
+        expression = match_expression(query)
+        if not expression:
+            return 0
+        return self.conn.execute("SELECT COUNT(*) FROM report_text WHERE report_text MATCH ?",
+                                 (expression,)).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def build(path=INDEX_FILE, data_folder=DATA_FOLDER, classified_folder=CLASSIFIED_FOLDER):
+    start = time.perf_counter()
+    with SearchIndex(path) as index:
+        index.clear()
+        index.update(data_folder, classified_folder)
+        index.optimize()
+        print(f"✅ {len(index)} reports indexed in {time.perf_counter() - start:.1f}s -> {path}")
+
+
+def update(path=INDEX_FILE, data_folder=DATA_FOLDER, classified_folder=CLASSIFIED_FOLDER):
+    """Incremental update (builds the index if missing)"""
+    if not os.path.exists(path):
+        return build(path, data_folder, classified_folder)
+    with SearchIndex(path) as index:
+        read = index.update(data_folder, classified_folder)
+        print(f"✅ {read} rows read, {len(index)} reports in the index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over the police reports")
+    parser.add_argument("command", choices=["build", "update", "search"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--classified-folder", default=CLASSIFIED_FOLDER)
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--location", help="district as in the cleaned data, e.g. Neukölln")
+    parser.add_argument("--kategorie")
+    parser.add_argument("--newest-first", action="store_true", help="sort by date instead of relevance")
+    parser.add_argument("--raw", action="store_true", help="query is an FTS5 expression")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.index, args.data_folder, args.classified_folder)
+        return
+    if args.command == "update":
+        update(args.index, args.data_folder, args.classified_folder)
+        return
+
+    with SearchIndex(args.index) as index:
+        start = time.perf_counter()
+        search = index.search_raw if args.raw else index.search
+        results = search(args.query, args.limit, args.year, args.location, args.kategorie, args.newest_first)
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"{result['date']:<22} {result['location'] or '-':<28} {result['kategorie'] or '-':<20} "
+                  f"{result['title']}\n{'':<22} {result['link']}")
+        print(f"\n⏱️ {len(results)} results in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""Resumable full-archive crawl, sharded into (year, page range) units across processes.
+
+`plan` finds the last listing page of every year (exponential probe + bisection)
+and splits the years into units of SHARD_PAGES pages in crawl_queue.sqlite. The
+last unit of a year is open-ended: it keeps going until the first empty page,
+so reports published during the crawl are not cut off. The current year is one
+sequential unit: new reports push its entries onto later pages while it is
+crawled, and an entry crossing a unit boundary between two parallel fetches
+would be lost (read in order, it is only seen twice and deduplicated).
+
+`run` starts WORKERS processes. Each has its own AsyncListingCrawler (session,
+adaptive per-host limiter starting at RATE_PER_WORKER, capped at its share of
+the host's budget in rate_limiter.ENDPOINT_BUDGETS) and claims one pending
+unit at a time.
+Every fetched page is committed together with the unit's next page, so an
+interrupted crawl resumes at exactly the page it stopped at. Finished years are
+written as berlin_polizei_<year>.csv, same columns as scraper_fullscrape.py.
+
+    python sharded_crawl.py run [--years 2014 2025] [--workers 4]
+    python sharded_crawl.py status
+    python sharded_crawl.py export [--output-folder berlin_reports_yearly]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import sqlite3
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from dedup_index import extract_report_id
+from report_parsing import BASE_URL
+from rate_limiter import budget_for
+from scraper_async import AsyncListingCrawler, OUTPUT_FOLDER, save_year
+
+# ---- CONFIG ----
+QUEUE_FILE = "crawl_queue.sqlite"
+START_YEAR = 2014
+SHARD_PAGES = 10          # pages per work unit
+WORKERS = 4               # crawler processes
+RATE_PER_WORKER = 1.0     # starting requests per second per process; adapts up to budget / WORKERS
+MAX_ATTEMPTS = 3          # a unit failing this often is left as 'failed'
+PROGRESS_SECONDS = 10
+STATUS_WINDOW = 300       # `status` measures the page rate over the last 5 minutes
+
+
+class CrawlQueue:
+    """Work units, fetched pages and their entries in one SQLite file (WAL, shared by the workers)"""
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS years (year INTEGER PRIMARY KEY, pages INTEGER NOT NULL, exported_at REAL);
+            CREATE TABLE IF NOT EXISTS units (
+                unit_id INTEGER PRIMARY KEY, year INTEGER NOT NULL, first_page INTEGER NOT NULL,
+                last_page INTEGER NOT NULL, open_ended INTEGER NOT NULL, next_page INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending', worker INTEGER, attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT);
+            CREATE INDEX IF NOT EXISTS units_status ON units (status, year, first_page);
+            CREATE TABLE IF NOT EXISTS pages (
+                year INTEGER NOT NULL, page INTEGER NOT NULL, entries INTEGER NOT NULL, fetched_at REAL NOT NULL,
+                PRIMARY KEY (year, page));
+            CREATE TABLE IF NOT EXISTS entries (
+                year INTEGER NOT NULL, page INTEGER NOT NULL, position INTEGER NOT NULL, report_id INTEGER,
+                date TEXT, title TEXT, link TEXT, location TEXT, PRIMARY KEY (year, page, position));
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    def planned_years(self):
+        return {year for (year,) in self.conn.execute("SELECT year FROM years")}
+
+    def add_year(self, year, pages, shard_pages=SHARD_PAGES, still_growing=False):
+        """Units for pages 1..pages; the last one continues past `pages` until an empty page.
+
+        A year that still gets new reports is a single unit, crawled in page order.
+        """
+        if still_growing:
+            shard_pages = max(pages, 1)
+        starts = list(range(1, max(pages, 1) + 1, shard_pages))
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("INSERT INTO years (year, pages) VALUES (?, ?)", (year, pages))
+            self.conn.executemany(
+                "INSERT INTO units (year, first_page, last_page, open_ended, next_page) VALUES (?, ?, ?, ?, ?)",
+                [(year, first, min(first + shard_pages - 1, max(pages, 1)), int(first == starts[-1]), first)
+                 for first in starts])
+        return len(starts)
+
+    def reset_abandoned(self, retry_failed=False):
+        """Units left 'running' by killed workers (and optionally failed ones) go back to pending"""
+        with self.conn:
+            resumed = self.conn.execute("UPDATE units SET status = 'pending', worker = NULL"
+                                        " WHERE status = 'running'").rowcount
+            if retry_failed:
+                resumed += self.conn.execute("UPDATE units SET status = 'pending', attempts = 0"
+                                             " WHERE status = 'failed'").rowcount
+        return resumed
+
+    def claim(self, worker):
+        """Atomically take the oldest pending unit: (unit_id, year, next_page, last_page, open_ended) or None"""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn.execute(
+                "UPDATE units SET status = 'running', worker = ? WHERE unit_id = ("
+                " SELECT unit_id FROM units WHERE status = 'pending' ORDER BY year, first_page LIMIT 1)"
+                " RETURNING unit_id, year, next_page, last_page, open_ended", (worker,)).fetchone()
+
+    def record_page(self, unit_id, year, page, entries):
+        """Store one page's entries and move the unit on to the next page, in one transaction"""
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (year, page, position, report_id, date, title, link, location)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(year, page, position, extract_report_id(entry["link"]), entry["date"], entry["title"],
+                  entry["link"], entry["location"]) for position, entry in enumerate(entries)])
+            self.conn.execute("INSERT OR REPLACE INTO pages (year, page, entries, fetched_at) VALUES (?, ?, ?, ?)",
+                              (year, page, len(entries), time.time()))
+            self.conn.execute("UPDATE units SET next_page = ? WHERE unit_id = ?", (page + 1, unit_id))
+
+    def finish(self, unit_id):
+        with self.conn:
+            self.conn.execute("UPDATE units SET status = 'done', error = NULL WHERE unit_id = ?", (unit_id,))
+
+    def fail(self, unit_id, error):
+        """Back to pending for another try, or 'failed' after MAX_ATTEMPTS"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE units SET attempts = attempts + 1, error = ?, worker = NULL,"
+                " status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE unit_id = ?",
+                (error, MAX_ATTEMPTS, unit_id))
+
+    # --- progress ---
+
+    def progress(self, since=None):
+        """Planned / fetched pages, unit counts per status and the page rate since `since`"""
+        remaining = self.conn.execute(
+            "SELECT COALESCE(SUM(MAX(last_page - next_page + 1, 0)), 0) FROM units WHERE status != 'done'"
+        ).fetchone()[0]
+        fetched = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        statuses = dict(self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall())
+        rate = None
+        if since is not None:
+            recent = self.conn.execute("SELECT COUNT(*) FROM pages WHERE fetched_at >= ?", (since,)).fetchone()[0]
+            elapsed = time.time() - since
+            rate = recent / elapsed if recent and elapsed > 0 else None
+        return {"fetched": fetched, "remaining": remaining, "units": statuses, "rate": rate,
+                "eta": remaining / rate if rate else None}
+
+    def complete_years(self, include_exported=True):
+        """Planned years whose units are all done"""
+        return [year for (year,) in self.conn.execute(
+            "SELECT year FROM years WHERE NOT EXISTS ("
+            " SELECT 1 FROM units WHERE units.year = years.year AND status != 'done')"
+            f"{'' if include_exported else ' AND exported_at IS NULL'} ORDER BY year")]
+
+    def year_entries(self, year):
+        """Entries of a year in archive order (newest first), each report once"""
+        seen = set()
+        results = []
+        for report_id, date, title, link, location in self.conn.execute(
+                "SELECT report_id, date, title, link, location FROM entries WHERE year = ? ORDER BY page, position",
+                (year,)):
+            if report_id is not None and report_id in seen:
+                continue  # listings shift while crawling; the same report can show up twice
+            seen.add(report_id)
+            results.append({"date": date, "title": title, "link": link, "location": location})
+        return results
+
+    def mark_exported(self, year):
+        with self.conn:
+            self.conn.execute("UPDATE years SET exported_at = ? WHERE year = ?", (time.time(), year))
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "unknown"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def print_progress(queue, since=None):
+    progress = queue.progress(since)
+    units = ", ".join(f"{count} {status}" for status, count in sorted(progress["units"].items()))
+    rate = f"{progress['rate']:.2f} pages/s" if progress["rate"] else "-"
+    print(f"⏳ {progress['fetched']} pages fetched, ~{progress['remaining']} to go ({units}); "
+          f"{rate}, ETA {format_eta(progress['eta'])}")
+
+
+# --- Planning ---
+
+async def last_page(crawler, year):
+    """Highest non-empty listing page of a year (0 if the year has none)"""
+    if not await crawler.fetch_page(year, 1):
+        return 0
+    low, high = 1, 2
+    while await crawler.fetch_page(year, high):
+        low, high = high, high * 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        if await crawler.fetch_page(year, middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+async def probe_years(years, fetch_base=BASE_URL, rate=RATE_PER_WORKER * WORKERS):
+    async with AsyncListingCrawler(fetch_base=fetch_base, rate=rate, verbose=False) as crawler:
+        pages = await asyncio.gather(*(last_page(crawler, year) for year in years))
+    return dict(zip(years, pages))
+
+
+def plan(queue, years, fetch_base=BASE_URL, shard_pages=SHARD_PAGES):
+    """Add the units of every year not planned yet"""
+    new_years = [year for year in years if year not in queue.planned_years()]
+    if not new_years:
+        return 0
+    print(f"🔭 Probing the page count of {len(new_years)} years...")
+    for year, pages in asyncio.run(probe_years(new_years, fetch_base)).items():
+        units = queue.add_year(year, pages, shard_pages, still_growing=year >= datetime.now().year)
+        print(f"   {year}: {pages} pages -> {units} units")
+    return len(new_years)
+
+
+# --- Workers ---
+
+async def crawl_units(queue, worker, fetch_base, rate, max_rate):
+    async with AsyncListingCrawler(fetch_base=fetch_base, max_in_flight=1, rate=rate, burst=1,
+                                   max_rate=max_rate, verbose=False) as crawler:
+        while (unit := queue.claim(worker)) is not None:
+            unit_id, year, page, last, open_ended = unit
+            try:
+                while open_ended or page <= last:
+                    entries = await crawler.fetch_page(year, page)
+                    if not entries:
+                        break
+                    queue.record_page(unit_id, year, page, entries)
+                    page += 1
+            except Exception as e:
+                print(f"⚠️ Worker {worker}: {year} page {page} failed ({e})")
+                queue.fail(unit_id, str(e))
+                continue
+            queue.finish(unit_id)
+
+
+def worker_main(worker, path, fetch_base, rate, max_rate):
+    queue = CrawlQueue(path)
+    try:
+        asyncio.run(crawl_units(queue, worker, fetch_base, rate, max_rate))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()  # spawned workers run atexit handlers, so each exports its own limiter metrics
+
+
+def run(years, path=QUEUE_FILE, workers=WORKERS, rate=RATE_PER_WORKER, fetch_base=BASE_URL,
+        output_folder=OUTPUT_FOLDER, retry_failed=False):
+    """Plan missing years, crawl all pending units with `workers` processes, export finished years"""
+    queue = CrawlQueue(path)
+    plan(queue, years, fetch_base)
+    resumed = queue.reset_abandoned(retry_failed)
+    if resumed:
+        print(f"🔁 Resuming {resumed} interrupted units")
+
+    started = time.time()
+    max_rate = budget_for(urlparse(fetch_base).hostname)["max_rate"] / workers
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=worker_main, args=(worker, path, fetch_base, rate, max_rate))
+                 for worker in range(workers)]
+    for process in processes:
+        process.start()
+    print(f"🚀 {workers} workers starting at {rate:g} requests/s each (up to {max_rate:g})")
+    try:
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(timeout=PROGRESS_SECONDS / workers)
+            print_progress(queue, started)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping; run again to resume")
+        for process in processes:
+            process.terminate()  # an uncommitted page is rolled back and fetched again on resume
+            process.join()
+        queue.close()
+        return
+
+    export(queue, output_folder, include_exported=False)
+    queue.close()
+
+
+def export(queue, output_folder=OUTPUT_FOLDER, include_exported=True):
+    """Write the CSV of every finished year"""
+    for year in queue.complete_years(include_exported):
+        save_year(year, queue.year_entries(year), output_folder)
+        queue.mark_exported(year)
+    failed = queue.progress()["units"].get("failed", 0)
+    if failed:
+        print(f"⚠️ {failed} units failed {MAX_ATTEMPTS} times; rerun with --retry-failed")
+
+
+def status(queue):
+    for year, pages, exported_at, done, total, fetched in queue.conn.execute(
+            "SELECT y.year, y.pages, y.exported_at, SUM(u.status = 'done'), COUNT(u.unit_id),"
+            " (SELECT COUNT(*) FROM pages p WHERE p.year = y.year)"
+            " FROM years y LEFT JOIN units u ON u.year = y.year GROUP BY y.year ORDER BY y.year"):
+        state = "exported" if exported_at else f"{done}/{total} units"
+        print(f"{year}: {fetched}/{pages} pages, {state}")
+    print_progress(queue, time.time() - STATUS_WINDOW)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded, resumable crawl of the archive listings")
+    parser.add_argument("command", choices=["run", "status", "export"])
+    parser.add_argument("--years", type=int, nargs=2, metavar=("FIRST", "LAST"))
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--rate", type=float, default=RATE_PER_WORKER, help="starting requests per second per worker")
+    parser.add_argument("--queue", default=QUEUE_FILE)
+    parser.add_argument("--output-folder", default=OUTPUT_FOLDER)
+    parser.add_argument("--retry-failed", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        first, last = args.years or (START_YEAR, datetime.now().year)
+        run(list(range(first, last + 1)), args.queue, args.workers, args.rate,
+            output_folder=args.output_folder, retry_failed=args.retry_failed)
+        return
+    queue = CrawlQueue(args.queue)
+    if args.command == "status":
+        status(queue)
+    else:
+        export(queue, args.output_folder)
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Streaming mode: new reports flow from the listing crawl through description,
+translation and classification in one process, then are written once.
+
+    crawl ─q─> describe (N workers) ─q─> translate (batches) ─q─> classify (N workers) ─q─> writer
+
+Every queue is bounded, so a slow stage holds back the ones before it instead
+of buffering the whole backlog. No yearly CSV is re-read: the crawl stops at
+the first known report (sidecar index + report ID index), and the results are
+appended to the yearly and classified CSVs at the end.
+
+    python streaming_pipeline.py
+"""
+import asyncio
+import os
+import time
+
+import ollama
+
+from analytics_cube import CUBE_FILE, update as update_cube
+from dedup_index import ReportIdIndex
+from description_fetcher import DescriptionFetcher
+from http_fetch import percentile, print_fetch_stats
+from near_duplicates import INDEX_FILE as NEAR_DUPLICATES_FILE, NearDuplicateIndex
+from ollama_classifer_working import OUTPUT_FOLDER, build_classifier
+from report_index import YearIndex, append_rows
+from search_index import INDEX_FILE as SEARCH_INDEX_FILE, update as update_search_index
+from scraper_async import AsyncListingCrawler
+from scraper_updateForNewReports import COLUMN_NAMES, csv_path, iter_new_entries, years_to_update
+from translation_backends import get_translator
+from translation_memory import MEMORY_FILE, TranslationMemory
+
+# ---- CONFIG ----
+QUEUE_SIZE = 32          # max entries waiting in front of each stage (backpressure)
+DESCRIBE_WORKERS = 8
+TRANSLATE_WORKERS = 1    # each sends one batch at a time
+TRANSLATE_BATCH = 50     # max titles per translator call (whatever is queued, no waiting)
+CLASSIFY_WORKERS = 4     # rows classified at once; only rows reaching the LLM tier wait on Ollama
+TRANSLATOR_BACKEND = None  # None = translation_backends.TRANSLATOR_BACKEND
+CLASSIFIED_COLUMNS = COLUMN_NAMES + ["kategorie", "kategorie_tier", "kategorie_code"]
+
+
+def classified_path(year):
+    return os.path.join(OUTPUT_FOLDER, f"berlin_polizei_{year}_classified.csv")
+
+
+class StreamingPipeline:
+    """Bounded queues between one crawler and three pools of stage workers.
+
+    Items are dicts {"year", "seq", "row", "discovered"}; a None in a queue
+    tells one worker of the next stage to stop.
+    """
+
+    def __init__(self, describe_workers=DESCRIBE_WORKERS, translate_workers=TRANSLATE_WORKERS,
+                 classify_workers=CLASSIFY_WORKERS, queue_size=QUEUE_SIZE, translator_backend=TRANSLATOR_BACKEND):
+        self.workers = {"describe": describe_workers, "translate": translate_workers, "classify": classify_workers}
+        self.queues = {name: asyncio.Queue(maxsize=queue_size) for name in ["describe", "translate", "classify", "write"]}
+        self.translator = get_translator(translator_backend)
+        self.memory = TranslationMemory(MEMORY_FILE)
+        self.classifier = build_classifier()  # keyword rules → fast model → LLM
+        self.id_index = ReportIdIndex()
+        self.year_indexes = {}
+        self.done = []
+        self.discovered = 0
+        self.translation_failed = 0
+        self.crawl_error = None
+
+    # --- stages ---
+
+    async def crawl(self, crawler):
+        known_ids = self.id_index.ids()
+        for year in years_to_update():
+            index = self.year_indexes[year] = YearIndex(csv_path(year))
+            async for entry in iter_new_entries(crawler, year, index, known_ids):
+                row = dict(entry, description="", en_title="")
+                item = {"year": year, "seq": self.discovered, "row": row, "discovered": time.perf_counter()}
+                self.discovered += 1
+                await self.queues["describe"].put(item)
+
+    async def describe(self, fetcher, item):
+        item["row"]["description"] = await fetcher.fetch_description(item["row"]["link"])
+        return item
+
+    async def translate(self, items):
+        pending = []
+        for item in items:
+            remembered = self.memory.get(item["row"]["title"])
+            if remembered is not None:
+                item["row"]["en_title"] = remembered
+            else:
+                pending.append(item)
+
+        if pending:
+            titles = [item["row"]["title"] for item in pending]
+            try:
+                translations = await asyncio.to_thread(self.translator.translate_batch, titles)
+            except Exception as e:
+                # Leave en_title empty; title_translator*.py fills it on a later run
+                print(f"❌ Error in batch translation: {e}")
+                self.translation_failed += len(pending)
+            else:
+                self.memory.put_many(zip(titles, translations))
+                for item, translation in zip(pending, translations):
+                    item["row"]["en_title"] = translation
+        return items
+
+    async def classify(self, client, item):
+        row = item["row"]
+        row["kategorie"], row["kategorie_tier"] = await self.classifier.adecide(row["title"], row["description"], client)
+        item["enriched"] = time.perf_counter()
+        return item
+
+    # --- plumbing ---
+
+    async def run_stage(self, name, next_name, handle):
+        inbox, outbox = self.queues[name], self.queues[next_name]
+
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is None:
+                    return
+                await outbox.put(await handle(item))
+
+        await asyncio.gather(*(worker() for _ in range(self.workers[name])))
+        for _ in range(self.workers.get(next_name, 1)):
+            await outbox.put(None)
+
+    async def run_translate_stage(self):
+        inbox, outbox = self.queues["translate"], self.queues["classify"]
+
+        async def worker():
+            stop = False
+            while not stop:
+                item = await inbox.get()
+                if item is None:
+                    return
+                batch = [item]
+                # Take whatever else is already waiting, up to one batch
+                while len(batch) < TRANSLATE_BATCH and not inbox.empty():
+                    item = inbox.get_nowait()
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                for item in await self.translate(batch):
+                    await outbox.put(item)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers["translate"])))
+        for _ in range(self.workers["classify"]):
+            await outbox.put(None)
+
+    async def collect(self):
+        while (item := await self.queues["write"].get()) is not None:
+            self.done.append(item)
+            row = item["row"]
+            print(f"✅ [{item['year']}] {row['title']} → {row['kategorie']} "
+                  f"({item['enriched'] - item['discovered']:.1f}s after discovery)")
+
+    async def run(self):
+        async with ollama.AsyncClient(host=self.classifier.llm.host) as client, \
+                AsyncListingCrawler(verbose=False) as crawler, DescriptionFetcher() as fetcher:
+            self.fetcher = fetcher
+
+            async def produce():
+                try:
+                    await self.crawl(crawler)
+                except Exception as e:
+                    # Drain what is in flight; results stay in the caches for the next run
+                    print(f"❌ Crawl stopped: {e}")
+                    self.crawl_error = e
+                for _ in range(self.workers["describe"]):
+                    await self.queues["describe"].put(None)
+
+            await asyncio.gather(
+                produce(),
+                self.run_stage("describe", "translate", lambda item: self.describe(fetcher, item)),
+                self.run_translate_stage(),
+                self.run_stage("classify", "write", lambda item: self.classify(client, item)),
+                self.collect(),
+            )
+
+    def write(self):
+        """Append all enriched rows, oldest first, to the yearly and classified CSVs"""
+        if self.crawl_error is not None:
+            # A partial crawl would leave a gap below the newest saved report
+            print("⚠️ Crawl incomplete, nothing written. Run again to pick the reports up from the caches.")
+            return
+
+        by_year = {}
+        # Discovered newest-first per year, like the archive pages
+        for item in sorted(self.done, key=lambda item: item["seq"], reverse=True):
+            by_year.setdefault(item["year"], []).append(item["row"])
+
+        os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+        for year, rows in sorted(by_year.items()):
+            append_rows(csv_path(year), rows, COLUMN_NAMES, self.year_indexes[year])
+            append_rows(classified_path(year), rows, CLASSIFIED_COLUMNS)
+            self.id_index.add_many(rows, year)
+            print(f"📁 [{year}] Appended {len(rows)} enriched reports to {csv_path(year)} and {classified_path(year)}")
+
+        # Both read only the appended bytes
+        if by_year and os.path.exists(CUBE_FILE):
+            update_cube(OUTPUT_FOLDER)
+        if by_year and os.path.exists(SEARCH_INDEX_FILE):
+            update_search_index()
+        if by_year and os.path.exists(NEAR_DUPLICATES_FILE):
+            with NearDuplicateIndex(NEAR_DUPLICATES_FILE) as index:
+                for year, rows in sorted(by_year.items()):
+                    index.add_reports({"link": [row["link"] for row in rows],
+                                       "description": [row["description"] for row in rows]}, year)
+                index.update_clusters()
+
+    def close(self):
+        if self.classifier.cache is not None:
+            self.classifier.cache.commit()
+        self.classifier.report()
+        self.memory.report()
+        self.memory.close()
+        self.id_index.close()
+
+
+async def main():
+    start = time.perf_counter()
+    pipeline = StreamingPipeline()
+    try:
+        await pipeline.run()
+        pipeline.write()
+    finally:
+        pipeline.close()
+    elapsed = time.perf_counter() - start
+
+    latencies = [item["enriched"] - item["discovered"] for item in pipeline.done]
+    print(f"\n🆕 {len(pipeline.done)} new reports enriched in {elapsed:.1f}s")
+    if latencies:
+        print(f"⏱️ Discovery → classified: p50 {percentile(latencies, 50):.2f}s, "
+              f"p95 {percentile(latencies, 95):.2f}s")
+    if pipeline.translation_failed:
+        print(f"⚠️ {pipeline.translation_failed} titles left untranslated")
+    print_fetch_stats(pipeline.fetcher.fetcher, elapsed, "descriptions")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
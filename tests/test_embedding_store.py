@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import embedding_store
+from embedding_store import EmbeddingStore
+
+DIM = 8
+
+
+def unit_vectors(n, seed):
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def add_rows(store, first, n, seed):
+    ids = list(range(first, first + n))
+    store.add(ids, [f"https://example.org/pressemitteilung.{i}.php" for i in ids], [2024] * n,
+              unit_vectors(n, seed), "test-model")
+
+
+def test_interrupted_add_is_cut_off_on_open(tmp_path, monkeypatch):
+    folder = str(tmp_path / "store")
+    store = EmbeddingStore(folder)
+    add_rows(store, 1000, 40, seed=0)
+    store.build_ivf(n_lists=4)
+
+    # Crash after vectors, links and ivf.npz were appended but before meta.json
+    def crash(path, data):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(embedding_store, "write_json_atomic", crash)
+    with pytest.raises(KeyboardInterrupt):
+        add_rows(store, 2000, 10, seed=1)
+    monkeypatch.undo()
+
+    store = EmbeddingStore(folder)
+    assert len(store) == 40
+    assert store.ivf["rows"].max() < 40
+    with open(store.links_path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 40
+    rows, _ = store.search(store.vector(5), k=3)
+    assert rows[0] == 5
+
+    # The next update appends right after the valid rows
+    add_rows(store, 3000, 10, seed=2)
+    store = EmbeddingStore(folder)
+    assert len(store) == len(store.links) == len(store.ids) == 50
+    for row, report_id in enumerate(store.ids):
+        assert store.links[row] == f"https://example.org/pressemitteilung.{report_id}.php"
+    assert store.ivf["rows"].tolist() == list(range(50))
+    assert store.similar(3005, k=1)[0]["score"] < 1.0
@@ -3,18 +3,27 @@ import csv
 
 from deep_translator import MyMemoryTranslator
 
+from checkpoint_journal import CheckpointJournal
+from rate_limiter import get_limiter
+from report_normalize import NORMALIZED_COLUMNS
+from translation_memory import MEMORY_FILE, TranslationMemory
+
 # === CONFIG ===
 DATA_FOLDER = "berlin_reports_yearly"  # folder where CSV files are stored
 YEARS = list(range(2014, 2026))  # adjust as needed
-COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"]
+COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"] + NORMALIZED_COLUMNS
+FLUSH_EVERY = 25  # journal translated titles every N rows
 
 # === Translator Setup ===
 translator = MyMemoryTranslator(source='de-DE', target='en-GB')
+limiter = get_limiter("mymemory")  # adaptive pace, backs off on TooManyRequests
+THROTTLE_RETRIES = 2
+memory = TranslationMemory(MEMORY_FILE)  # German title -> en_title, checked before any network call
 # translated = translator.translate("Guten Tag")
 # print(translated)
 def translate_title(title):
     try:
-        return translator.translate(title)
+        return limiter.call(translator.translate, title, retries=THROTTLE_RETRIES)
     except Exception as e:
         print(f"❌ Error translating title '{title}': {e}")
         return ""
@@ -41,36 +50,50 @@ for year in YEARS:
         if 'en_title' not in row:
             row['en_title'] = ""
 
-    updated = False
+    # Re-apply translations from an interrupted run
+    journal = CheckpointJournal(filename, flush_every=FLUSH_EVERY)
+    updated = journal.replay(rows) > 0
+    memory.seed_from_rows(rows)
     tooManyRequests = False
-    for i, row in enumerate(rows):
-        title = row.get("title", "").strip()
-        if title and not row.get("en_title", "").strip():
-            print(f"[{year}] Translating ({i+1}/{len(rows)}): {title}")
+    try:
+        for i, row in enumerate(rows):
+            title = row.get("title", "").strip()
+            if title and not row.get("en_title", "").strip():
+                remembered = memory.get(title)
+                if remembered is not None:
+                    row["en_title"] = remembered
+                    journal.record(row["link"], en_title=remembered)
+                    updated = True
+                    continue
+
+                print(f"[{year}] Translating ({i+1}/{len(rows)}): {title}")
 
-            try:
-                row["en_title"] = translator.translate(title)
-            except Exception as e:
-                print(f"❌ Error translating title '{title}': {e}")
-                if e.__class__.__name__ == "TooManyRequests":
-                    tooManyRequests = True
-                    break
+                try:
+                    row["en_title"] = limiter.call(translator.translate, title, retries=THROTTLE_RETRIES)
+                    memory.put(title, row["en_title"])
+                    journal.record(row["link"], en_title=row["en_title"])
+                except Exception as e:
+                    print(f"❌ Error translating title '{title}': {e}")
+                    if e.__class__.__name__ == "TooManyRequests":
+                        tooManyRequests = True
+                        break
 
-            total_chars += len(title)
-            updated = True
-        else:
-            print(f"[{year}] Skipping ({i+1}/{len(rows)}): already has en_title")
+                total_chars += len(title)
+                updated = True
+            else:
+                print(f"[{year}] Skipping ({i+1}/{len(rows)}): already has en_title")
+    finally:
+        journal.flush()
 
     if updated:
-        with open(filename, "w", newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES)
-            writer.writeheader()
-            writer.writerows(rows)
+        journal.compact(rows, COLUMN_NAMES)
         print(f"✅ Updated {filename} with new translations.")
     else:
         print(f"📎 No new changes have been made to {filename}.")
 
     if tooManyRequests:
         print("🔒 You made too many requests to the server.According to google, you are allowed to make 5 requests per secondand up to 200k requests per day. You can wait and try again later oryou can try the translate_batch function")
+        memory.report()
         exit(0)
-print(f"🔤 Total characters translated: {total_chars}")
\ No newline at end of file
+print(f"🔤 Total characters translated: {total_chars}")
+memory.report()
\ No newline at end of file
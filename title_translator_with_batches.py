@@ -2,34 +2,38 @@
 
 import os
 import csv
-import time
-from deep_translator import MyMemoryTranslator
+
+from checkpoint_journal import CheckpointJournal
+from report_normalize import NORMALIZED_COLUMNS
+from translation_backends import get_translator
+from translation_memory import MEMORY_FILE, TranslationMemory, normalize_title
 
 # === CONFIG ===
 DATA_FOLDER = "berlin_reports_yearly"
 YEARS = list(range(2014, 2026))
-COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"]
-BATCH_SIZE = 50  # Max safe batch size (MyMemory may reject very large batches)
-WAIT_TIME = 2  # Seconds to wait between batches to avoid rate-limiting
-
-# === Translator Setup ===
-translator = MyMemoryTranslator(source='de-DE', target='en-GB')
+COLUMN_NAMES = ["date", "title", "link", "location", "description", "en_title"] + NORMALIZED_COLUMNS
+TRANSLATOR_BACKEND = "mymemory"  # "mymemory" (online, daily limit) or "marian" (local model on CPU)
+# Max safe batch size (MyMemory may reject very large batches); the local model re-buckets
+# each chunk by token length, so it is fed larger chunks. MyMemory requests are paced by the
+# adaptive "mymemory" limiter in rate_limiter.py
+BATCH_SIZE = 50 if TRANSLATOR_BACKEND == "mymemory" else 512
 
-total_chars = 0
 
-def translate_titles_batch(titles):
+def translate_titles_batch(translator, titles):
     try:
         return translator.translate_batch(titles)
     except Exception as e:
         print(f"❌ Error in batch translation: {e}")
         raise e
 
-# === Process all CSVs ===
-for year in YEARS:
-    filename = os.path.join(DATA_FOLDER, f"berlin_polizei_{year}.csv")
+
+def translate_year(translator, memory, year, data_folder=DATA_FOLDER):
+    """Fill missing en_title values of one yearly CSV; returns the characters sent to the translator"""
+    filename = os.path.join(data_folder, f"berlin_polizei_{year}.csv")
+    total_chars = 0
     if not os.path.exists(filename):
         print(f"⏭️ Skipping missing file: {filename}")
-        continue
+        return 0
 
     print(f"\n📂 Processing {filename}...")
 
@@ -42,55 +46,94 @@ for year in YEARS:
         row.setdefault("description", "")
         row.setdefault("en_title", "")
 
-    untranslated_rows = []
-    untranslated_titles = []
+    # Re-apply translations from an interrupted run
+    journal = CheckpointJournal(filename, flush_every=BATCH_SIZE)
+    replayed = journal.replay(rows) > 0
+
+    # Learn from rows translated earlier, then fill whatever the memory already knows
+    memory.seed_from_rows(rows)
+    from_memory = 0
+
+    # Untranslated rows grouped by normalized title: each unique title is sent once
+    untranslated = {}
 
     for i, row in enumerate(rows):
         title = row.get("title", "").strip()
         en_title = row.get("en_title", "").strip()
 
         if title and not en_title:
-            untranslated_rows.append((i, row))
-            untranslated_titles.append(title)
+            remembered = memory.get(title)
+            if remembered is not None:
+                row["en_title"] = remembered
+                journal.record(row["link"], en_title=remembered)
+                from_memory += 1
+                continue
+
+            key = normalize_title(title)
+            if key in untranslated:
+                memory.record_duplicate(title)
+            untranslated.setdefault(key, []).append((i, row))
         else:
             print(f"[{year}] Skipping ({i+1}/{len(rows)}): already has en_title")
 
-    if untranslated_titles:
+    if from_memory:
+        print(f"🧠 [{year}] Filled {from_memory} titles from the translation memory")
+
+    groups = list(untranslated.values())
+    updated = replayed or from_memory > 0
+
+    if groups:
         updated = True
-        print(f"🌐 Translating {len(untranslated_titles)} titles in batches of {BATCH_SIZE}...")
-
-        for i in range(0, len(untranslated_titles), BATCH_SIZE):
-            chunk = untranslated_titles[i:i + BATCH_SIZE]
-            chunk_rows = untranslated_rows[i:i + BATCH_SIZE]
-
-            try:
-                translations = translate_titles_batch(chunk)
-                for (row_idx, row), translation in zip(chunk_rows, translations):
-                    print(f"[{year}] ✅ ({row_idx+1}) {row['title']} -> {translation}")
-                    row["en_title"] = translation
-
-                time.sleep(WAIT_TIME)  # wait between batches
-            except Exception as e:
-                print("🔒 Stopping due to error:", e)
-                if e.__class__.__name__ == "TooManyRequests":
-                    print("⚠️ Too many requests. Try again later.")
-                break
-
-            # Count characters in this batch
-            batch_chars = sum(len(title) for title in chunk)
-            total_chars += batch_chars
-    else:
-        updated = False
+        print(f"🌐 Translating {len(groups)} unique titles ({sum(len(g) for g in groups)} rows) "
+              f"in batches of {BATCH_SIZE}...")
+
+        try:
+            for i in range(0, len(groups), BATCH_SIZE):
+                chunk_groups = groups[i:i + BATCH_SIZE]
+                chunk = [group[0][1]["title"].strip() for group in chunk_groups]
+
+                try:
+                    translations = translate_titles_batch(translator, chunk)
+                    memory.put_many(zip(chunk, translations))
+                    for group, translation in zip(chunk_groups, translations):
+                        # Fan the result out to every row with the same title
+                        for row_idx, row in group:
+                            print(f"[{year}] ✅ ({row_idx+1}) {row['title']} -> {translation}")
+                            row["en_title"] = translation
+                            journal.record(row["link"], en_title=translation)
+                except Exception as e:
+                    print("🔒 Stopping due to error:", e)
+                    if e.__class__.__name__ == "TooManyRequests":
+                        print("⚠️ Too many requests. Try again later.")
+                    break
+
+                # Count characters in this batch
+                batch_chars = sum(len(title) for title in chunk)
+                total_chars += batch_chars
+        finally:
+            journal.flush()
 
     # Write back changes
     if updated:
-        with open(filename, "w", newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=COLUMN_NAMES)
-            writer.writeheader()
-            writer.writerows(rows)
+        journal.compact(rows, COLUMN_NAMES)
         print(f"✅ Updated {filename} with new translations.")
     else:
         print(f"📎 No new changes have been made to {filename}.")
+    return total_chars
+
+
+def main(years=YEARS, data_folder=DATA_FOLDER):
+    translator = get_translator(TRANSLATOR_BACKEND)  # loaded once, reused for every year
+    memory = TranslationMemory(MEMORY_FILE)  # German title -> en_title, checked before any network call
+
+    total_chars = 0
+    for year in years:
+        total_chars += translate_year(translator, memory, year, data_folder)
+
+    print(f"\n🔢 Total characters translated: {total_chars}")
+    memory.report()
+    memory.close()
 
 
-print(f"\n🔢 Total characters translated: {total_chars}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import time
+
+from rate_limiter import get_limiter
+
+# --- Backends: "mymemory" (remote, rate-limited) or "marian" (local OPUS-MT on CPU) ---
+TRANSLATOR_BACKEND = "mymemory"
+TRANSLATOR_BACKENDS = ["mymemory", "marian"]
+
+MYMEMORY_RETRIES = 2       # retries of a request answered with TooManyRequests, after the limiter backed off
+
+MARIAN_MODEL = "Helsinki-NLP/opus-mt-de-en"
+MARIAN_THREADS = 4          # torch intra-op threads; leave cores for the rest of the pipeline
+MARIAN_MAX_TOKENS = 4096    # padded tokens per batch (batch size x longest title in it)
+MARIAN_MAX_BATCH = 64       # upper bound on titles per batch, whatever their length
+MARIAN_MAX_LENGTH = 256     # generation cap; titles are far shorter
+MARIAN_NUM_BEAMS = 1        # greedy decoding is plenty for one-line titles
+
+
+class MyMemoryBackend:
+    """The deep_translator MyMemory path used so far, paced by the shared "mymemory" limiter.
+
+    deep_translator sends one request per text anyway, so batches go through
+    translate() and every request is paced and fed back to the limiter.
+    """
+
+    remote = True
+
+    def __init__(self, source="de-DE", target="en-GB"):
+        from deep_translator import MyMemoryTranslator
+        self.translator = MyMemoryTranslator(source=source, target=target)
+        self.limiter = get_limiter("mymemory")
+
+    def translate(self, text):
+        return self.limiter.call(self.translator.translate, text, retries=MYMEMORY_RETRIES)
+
+    def translate_batch(self, texts):
+        return [self.translate(text) for text in texts]
+
+
+class MarianBackend:
+    """Local MarianMT (OPUS-MT de->en) on CPU with token-length bucketed batches.
+
+    The model is loaded once and reused for every call, so create one backend
+    for the whole run rather than one per year. Titles are sorted by token
+    length and packed into batches of at most MARIAN_MAX_TOKENS padded tokens,
+    so short titles are not padded to the length of a long one.
+    """
+
+    remote = False
+
+    def __init__(self, model_name=MARIAN_MODEL, threads=MARIAN_THREADS, max_tokens=MARIAN_MAX_TOKENS,
+                 max_batch=MARIAN_MAX_BATCH, num_beams=MARIAN_NUM_BEAMS):
+        import torch
+        from transformers import MarianMTModel, MarianTokenizer
+
+        torch.set_num_threads(threads)
+        self.torch = torch
+        self.max_tokens = max_tokens
+        self.max_batch = max_batch
+        self.num_beams = num_beams
+
+        start = time.perf_counter()
+        self.tokenizer = MarianTokenizer.from_pretrained(model_name)
+        self.model = MarianMTModel.from_pretrained(model_name).eval()
+        print(f"🧩 Loaded {model_name} in {time.perf_counter() - start:.1f}s ({threads} threads)")
+
+    def translate(self, text):
+        return self.translate_batch([text])[0]
+
+    def batches(self, texts):
+        """Yield lists of indices into texts, grouped by similar token length"""
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=MARIAN_MAX_LENGTH)["input_ids"]]
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+
+        batch = []
+        for i in order:
+            # Sorted ascending, so the current title is the longest in the batch
+            if batch and (lengths[i] * (len(batch) + 1) > self.max_tokens or len(batch) >= self.max_batch):
+                yield batch
+                batch = []
+            batch.append(i)
+        if batch:
+            yield batch
+
+    def translate_batch(self, texts):
+        results = [""] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not pending:
+            return results
+
+        subset = [texts[i] for i in pending]
+        with self.torch.inference_mode():
+            for batch in self.batches(subset):
+                inputs = self.tokenizer([subset[i] for i in batch], return_tensors="pt", padding=True,
+                                        truncation=True, max_length=MARIAN_MAX_LENGTH)
+                output = self.model.generate(**inputs, num_beams=self.num_beams, max_length=MARIAN_MAX_LENGTH)
+                for i, text in zip(batch, self.tokenizer.batch_decode(output, skip_special_tokens=True)):
+                    results[pending[i]] = text
+        return results
+
+
+def get_translator(backend=None, **options):
+    """Create the translator for a backend name (default TRANSLATOR_BACKEND)"""
+    backend = backend or TRANSLATOR_BACKEND
+    if backend == "mymemory":
+        return MyMemoryBackend(**options)
+    if backend == "marian":
+        return MarianBackend(**options)
+    raise ValueError(f"Unknown translator backend: {backend}")
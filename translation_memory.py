@@ -0,0 +1,102 @@
+import os
+import re
+import sqlite3
+import unicodedata
+
+MEMORY_FILE = "translation_memory.sqlite"
+
+QUOTES = str.maketrans({
+    "„": '"', "“": '"', "”": '"', "«": '"', "»": '"', "‟": '"',
+    "‚": "'", "‘": "'", "’": "'", "‹": "'", "›": "'", "`": "'", "´": "'",
+})
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_title(title):
+    """Key used for matching: NFC, unified quote styles, collapsed whitespace, case-folded"""
+    text = unicodedata.normalize("NFC", title or "").translate(QUOTES)
+    return WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class TranslationMemory:
+    """Persistent German title -> en_title memory, consulted before any translator call.
+
+    Matches on the exact title first, then on the normalized form. Counters
+    record how many translator calls and characters were avoided.
+    """
+
+    def __init__(self, path=MEMORY_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " normalized TEXT PRIMARY KEY, source TEXT NOT NULL, translation TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.exact = {}
+        self.normalized = {}
+        for normalized, source, translation in self.conn.execute(
+                "SELECT normalized, source, translation FROM translations"):
+            self.exact[source] = translation
+            self.normalized[normalized] = translation
+        self.exact_hits = 0
+        self.normalized_hits = 0
+        self.calls_avoided = 0
+        self.chars_avoided = 0
+
+    def __len__(self):
+        return len(self.normalized)
+
+    def get(self, title):
+        """Return a remembered translation or None"""
+        translation = self.exact.get(title)
+        if translation is not None:
+            self.exact_hits += 1
+        else:
+            translation = self.normalized.get(normalize_title(title))
+            if translation is None:
+                return None
+            self.normalized_hits += 1
+        self.calls_avoided += 1
+        self.chars_avoided += len(title)
+        return translation
+
+    def put(self, title, translation, commit=True):
+        if not translation:
+            return
+        normalized = normalize_title(title)
+        self.exact[title] = translation
+        self.normalized[normalized] = translation
+        self.conn.execute(
+            "INSERT OR REPLACE INTO translations (normalized, source, translation) VALUES (?, ?, ?)",
+            (normalized, title, translation),
+        )
+        if commit:
+            self.conn.commit()
+
+    def put_many(self, pairs):
+        for title, translation in pairs:
+            self.put(title, translation, commit=False)
+        self.conn.commit()
+
+    def seed_from_rows(self, rows):
+        """Learn from rows that already have an en_title"""
+        self.put_many(
+            (row["title"].strip(), row["en_title"].strip()) for row in rows
+            if (row.get("title") or "").strip() and (row.get("en_title") or "").strip()
+            and row["title"].strip() not in self.exact
+        )
+
+    def record_duplicate(self, title):
+        """A title served by another copy of itself in the same batch"""
+        self.calls_avoided += 1
+        self.chars_avoided += len(title)
+
+    def report(self):
+        print(f"🧠 Translation memory: {len(self)} entries, {self.exact_hits} exact + "
+              f"{self.normalized_hits} normalized hits; avoided {self.calls_avoided} translator calls "
+              f"({self.chars_avoided} characters)")
+
+    def close(self):
+        self.conn.close()